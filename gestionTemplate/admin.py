@@ -5,16 +5,90 @@ import zipfile
 from io import TextIOWrapper
 
 from .models import (
-    Campaign, CampaignTemplate, Plasmide, MappingTemplate, PublicationRequest
+    Campaign, CampaignTemplate, Plasmide, MappingTemplate, PublicationRequest, BackgroundJob,
+    SimulationCacheEntry, CacheStat, ExtractedArchive, ArchiveMember
 )
+from .timing import summarize
+from . import features
 
 # --- Enregistrements standards ---
-admin.site.register(Campaign)
 admin.site.register(CampaignTemplate)
-admin.site.register(Plasmide)
 admin.site.register(MappingTemplate)
 
 
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ("name", "user", "status", "created_at", "total_time")
+    list_filter = ("status",)
+    change_list_template = "admin/gestionTemplate/campaign/change_list.html"
+    # Nombre de campagnes récentes prises en compte pour les percentiles
+    timing_sample_size = 500
+
+    def total_time(self, obj):
+        if not obj.timings:
+            return "-"
+        return f"{sum(obj.timings.get(stage, 0) for stage in obj.timings if '.' not in stage):.2f} s"
+    total_time.short_description = "Durée totale"
+
+    def changelist_view(self, request, extra_context=None):
+        """Ajoute au-dessus de la liste le p50 / p95 de chaque étape (campagnes filtrées)."""
+        response = super().changelist_view(request, extra_context=extra_context)
+        try:
+            queryset = response.context_data['cl'].queryset
+        except (AttributeError, KeyError):
+            return response
+        recent = queryset.exclude(timings={}).order_by('-created_at').values_list('timings', flat=True)
+        response.context_data['timing_summary'] = summarize(recent[:self.timing_sample_size])
+        return response
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "campaign", "user", "created_at", "started_at", "finished_at")
+    list_filter = ("kind", "status")
+
+
+@admin.register(SimulationCacheEntry)
+class SimulationCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("key", "size", "hits", "created_at", "last_used_at")
+    ordering = ("-last_used_at",)
+
+
+@admin.register(CacheStat)
+class CacheStatAdmin(admin.ModelAdmin):
+    list_display = ("name", "hits", "misses")
+
+
+@admin.register(ExtractedArchive)
+class ExtractedArchiveAdmin(admin.ModelAdmin):
+    list_display = ("digest", "file_count", "size", "hits", "last_used_at")
+    ordering = ("-last_used_at",)
+
+
+@admin.register(Plasmide)
+class PlasmideAdmin(admin.ModelAdmin):
+    list_display = ("name", "dossier", "organism", "length", "user")
+    search_fields = ("name", "organism", "dossier")
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # Liste : la séquence et les features brutes ne sont pas affichées
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.listing()
+        return queryset
+
+
+@admin.register(ArchiveMember)
+class ArchiveMemberAdmin(admin.ModelAdmin):
+    list_display = ("name", "source", "member_path", "organism", "length")
+    list_filter = ("source",)
+    search_fields = ("name", "organism", "member_path")
+    exclude = ("sequence",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("sequence")
+
+
 # ----- PublicationRequest Admin -----
 @admin.register(PublicationRequest)
 class PublicationRequestAdmin(admin.ModelAdmin):
@@ -48,8 +122,9 @@ class PublicationRequestAdmin(admin.ModelAdmin):
                                                 "dossier": "public",
                                                 "organism": record.annotations.get("organism", ""),
                                                 "length": len(record.seq),
+                                                "topology": record.annotations.get("topology", "circular"),
                                                 "sequence": str(record.seq),
-                                                "features": {"raw": [feat.qualifiers for feat in record.features]}
+                                                "features": features.raw_features(record),
                                             }
                                         )
                                         return True
@@ -0,0 +1,139 @@
+"""
+Stock persistant des archives de plasmides extraites.
+
+Chaque archive n'est décompressée qu'une fois, dans ARCHIVE_STORE_DIR/<empreinte>.
+Les simulations y puisent leurs fichiers par lien physique (ou symbolique, ou
+copie en dernier recours) vers leur bac à sable : une collection réutilisée ne
+coûte plus rien à préparer. Le stock est limité par ARCHIVE_STORE_MAX_BYTES
+(éviction des archives les moins récemment utilisées).
+"""
+import os
+import shutil
+import uuid
+import zipfile
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .caching import archive_sha256, record_hit, record_miss
+from .models import ExtractedArchive
+
+
+def store_root():
+    return getattr(settings, 'ARCHIVE_STORE_DIR', os.path.join(settings.MEDIA_ROOT, 'archives'))
+
+
+def _tree_size(directory):
+    size, count = 0, 0
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            size += os.path.getsize(os.path.join(root, file))
+            count += 1
+    return size, count
+
+
+def extract(archive_path, digest=None):
+    """
+    Retourne le dossier où l'archive est extraite, en la décompressant
+    seulement si son contenu n'est pas déjà dans le stock.
+    """
+    digest = digest or archive_sha256(archive_path)
+    target = os.path.join(store_root(), digest)
+
+    entry = ExtractedArchive.objects.filter(digest=digest).first()
+    if entry is not None and os.path.isdir(entry.path):
+        ExtractedArchive.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+        record_hit('archive')
+        return entry.path
+
+    record_miss('archive')
+    if not os.path.isdir(target):
+        # Extraction dans un dossier temporaire puis renommage atomique :
+        # un autre worker ne voit jamais d'extraction partielle
+        tmp_dir = os.path.join(store_root(), f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                zip_ref.extractall(tmp_dir)
+            os.rename(tmp_dir, target)
+        except OSError:
+            # Dossier créé entre-temps par un autre worker
+            if not os.path.isdir(target):
+                raise
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    size, count = _tree_size(target)
+    try:
+        ExtractedArchive.objects.update_or_create(
+            digest=digest,
+            defaults={'path': target, 'size': size, 'file_count': count, 'last_used_at': timezone.now()},
+        )
+    except IntegrityError:
+        pass
+
+    evict(keep=digest)
+    return target
+
+
+def stage(source_dir, dest_dir, only=None):
+    """
+    Reproduit l'arborescence de source_dir dans dest_dir sans copier les données :
+    lien physique si possible, sinon lien symbolique, sinon copie.
+    only : chemins relatifs à placer (tous par défaut).
+    Les fichiers ne doivent pas être modifiés dans le bac à sable.
+    """
+    for root, dirs, files in os.walk(source_dir):
+        rel_path = os.path.relpath(root, source_dir)
+        current_dest = os.path.join(dest_dir, rel_path) if rel_path != "." else dest_dir
+        os.makedirs(current_dest, exist_ok=True)
+        for file in files:
+            if only is not None and os.path.normpath(os.path.join(rel_path, file)) not in only:
+                continue
+            src = os.path.join(root, file)
+            dst = os.path.join(current_dest, file)
+            if os.path.lexists(dst):
+                continue
+            try:
+                os.link(src, dst)
+            except OSError:
+                try:
+                    os.symlink(os.path.abspath(src), dst)
+                except OSError:
+                    shutil.copy2(src, dst)
+
+
+def extract_to(archive_path, dest_dir, digest=None, only=None):
+    """Extrait (via le stock) puis place les fichiers de l'archive dans dest_dir."""
+    stage(extract(archive_path, digest=digest), dest_dir, only=only)
+
+
+def evict(max_bytes=None, keep=None):
+    """
+    Supprime les archives les moins récemment utilisées tant que le stock
+    dépasse max_bytes. L'archive `keep` (en cours d'utilisation) est conservée.
+    Retourne le nombre d'archives supprimées.
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'ARCHIVE_STORE_MAX_BYTES', 5 * 1024 ** 3)
+
+    total = ExtractedArchive.objects.aggregate(total=Sum('size'))['total'] or 0
+    deleted = 0
+    if total <= max_bytes:
+        return deleted
+
+    candidates = ExtractedArchive.objects.order_by('last_used_at')
+    if keep:
+        candidates = candidates.exclude(digest=keep)
+    for entry in candidates:
+        if total <= max_bytes:
+            break
+        # Les liens physiques déjà posés dans les bacs à sable restent valides
+        shutil.rmtree(entry.path, ignore_errors=True)
+        total -= entry.size
+        entry.delete()
+        deleted += 1
+    return deleted
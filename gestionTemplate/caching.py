@@ -0,0 +1,163 @@
+"""
+Cache des résultats de simulation, adressé par le contenu des entrées.
+
+Deux simulations dont les fichiers (template, correspondance, archive de
+plasmides, amorces, concentrations) et les options sont identiques produisent
+la même archive : on la conserve dans SimulationCacheEntry et on la réutilise
+sans relancer compute_all.
+"""
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import CacheStat, SimulationCacheEntry
+
+# Incrémenter pour invalider toutes les entrées (changement du pipeline)
+SIMULATION_CACHE_VERSION = 1
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Empreinte SHA-256 d'un fichier, lu par blocs."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def archive_sha256(path, chunk_size=1024 * 1024):
+    """
+    Empreinte du contenu d'une archive zip : paires (nom, SHA-256 du contenu)
+    des membres triées par nom. Indépendante des dates et de la compression,
+    elle ne change pas quand les mêmes plasmides sont re-zippés. Fichier qui
+    n'est pas un zip : empreinte de ses octets.
+    """
+    try:
+        zf = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        return file_sha256(path, chunk_size)
+    members = []
+    with zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            h = hashlib.sha256()
+            with zf.open(info) as fh:
+                for chunk in iter(lambda: fh.read(chunk_size), b''):
+                    h.update(chunk)
+            members.append([info.filename, h.hexdigest()])
+    members.sort()
+    return hashlib.sha256(json.dumps(members).encode('utf-8')).hexdigest()
+
+
+def record_hit(name):
+    stat, _ = CacheStat.objects.get_or_create(name=name)
+    CacheStat.objects.filter(pk=stat.pk).update(hits=F('hits') + 1)
+
+
+def record_miss(name):
+    stat, _ = CacheStat.objects.get_or_create(name=name)
+    CacheStat.objects.filter(pk=stat.pk).update(misses=F('misses') + 1)
+
+
+def simulation_cache_key(payload, digests=None):
+    """
+    Clé du cache : empreinte des fichiers d'entrée et des options normalisées.
+    L'archive de plasmides est identifiée par son contenu (archive_sha256).
+    À calculer avant compute_all, qui réécrit le fichier de concentrations.
+    digests : empreintes déjà calculées, par champ du payload.
+    """
+    digests = digests or {}
+    files = {}
+    for field in ('template_path', 'mapping_path', 'plasmids_archive', 'primers_path', 'concentration_path'):
+        path = payload.get(field)
+        digest = archive_sha256 if field == 'plasmids_archive' else file_sha256
+        files[field] = (digests.get(field) or digest(path)) if path else None
+
+    primer_pairs = payload.get('primer_pairs') or []
+    normalized = {
+        'version': SIMULATION_CACHE_VERSION,
+        'files': files,
+        'enzyme': payload.get('enzyme') or None,
+        'default_concentration': float(payload.get('default_concentration') or 200.0),
+        'primer_pairs': [[str(p).strip() for p in pair] for pair in primer_pairs],
+    }
+    raw = json.dumps(normalized, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+
+def get_cached_result(key):
+    """Retourne l'entrée de cache valide pour cette clé (ou None) et met à jour les compteurs."""
+    entry = SimulationCacheEntry.objects.filter(key=key).first()
+    if entry is not None and not (entry.result_file and os.path.exists(entry.result_file.path)):
+        # Fichier disparu : l'entrée n'est plus utilisable
+        entry.delete()
+        entry = None
+
+    if entry is None:
+        record_miss('simulation')
+        return None
+
+    SimulationCacheEntry.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    record_hit('simulation')
+    return entry
+
+
+def store_result(key, zip_path):
+    """Conserve une copie de l'archive de résultats puis applique la politique d'éviction."""
+    entry, created = SimulationCacheEntry.objects.get_or_create(key=key)
+    if created or not entry.result_file:
+        with open(zip_path, 'rb') as f:
+            entry.result_file.save(f"{key}.zip", File(f), save=False)
+        entry.size = os.path.getsize(zip_path)
+        entry.last_used_at = timezone.now()
+        entry.save()
+    evict()
+    return entry
+
+
+def copy_cached_result(entry, destination):
+    """Copie l'archive mise en cache vers destination (chemin)."""
+    with entry.result_file.open('rb') as src, open(destination, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+
+
+def _delete_entry(entry):
+    if entry.result_file:
+        entry.result_file.delete(save=False)
+    entry.delete()
+
+
+def evict(max_age=None, max_bytes=None):
+    """
+    Supprime les entrées non utilisées depuis max_age, puis les moins récemment
+    utilisées tant que la taille totale dépasse max_bytes.
+    Retourne le nombre d'entrées supprimées.
+    """
+    if max_age is None:
+        max_age = timedelta(days=getattr(settings, 'SIMULATION_CACHE_MAX_AGE_DAYS', 30))
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'SIMULATION_CACHE_MAX_BYTES', 2 * 1024 ** 3)
+
+    deleted = 0
+    for entry in SimulationCacheEntry.objects.filter(last_used_at__lt=timezone.now() - max_age):
+        _delete_entry(entry)
+        deleted += 1
+
+    total = SimulationCacheEntry.objects.aggregate(total=Sum('size'))['total'] or 0
+    if total > max_bytes:
+        for entry in SimulationCacheEntry.objects.order_by('last_used_at'):
+            if total <= max_bytes:
+                break
+            total -= entry.size
+            _delete_entry(entry)
+            deleted += 1
+    return deleted
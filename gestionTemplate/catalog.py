@@ -0,0 +1,78 @@
+"""
+Catalogue des plasmides contenus dans les archives (modèle ArchiveMember).
+
+Chaque archive est parsée une seule fois, à l'upload ou à la production du
+résultat ; la recherche privée interroge ensuite uniquement la base (séquences :
+index k-mer, voir seqindex.index_members) et les pages de campagne y lisent la
+clé et les données de carte de chaque membre.
+"""
+import hashlib
+
+from django.db import transaction
+
+from . import map_cache, seqindex
+from .ingest import BATCH_SIZE, parse_archive
+from .models import ArchiveMember
+
+
+def sequence_hash(sequence):
+    return hashlib.sha256(sequence.upper().encode('ascii', 'ignore')).hexdigest() if sequence else ''
+
+
+def feature_labels(features):
+    """Libellés distincts (qualificatifs gene puis label) des features d'un enregistrement."""
+    labels = []
+    for feature in features or []:
+        for key in ('gene', 'label'):
+            for value in feature['qualifiers'].get(key, []):
+                if value and value not in labels:
+                    labels.append(value)
+    return labels
+
+
+def member_from_record(record, source, name_from_locus=False, **owner):
+    sequence = record.get('sequence', '')
+    name = record.get('locus') if name_from_locus and record.get('locus') else record['name']
+    shown = map_cache.member_name(record['member'])
+    return ArchiveMember(
+        source=source,
+        member_path=record['member'],
+        name=name[:255],
+        organism=record.get('organism', '')[:255],
+        length=record.get('length'),
+        feature_labels='\n'.join(feature_labels(record.get('features'))),
+        sequence_hash=sequence_hash(sequence),
+        sequence=sequence,
+        map_key=map_cache.record_key(record, shown),
+        map_data=map_cache.record_data(record, shown),
+        **owner,
+    )
+
+
+def index_records(records, errors, source, name_from_locus=False, **owner):
+    """
+    Remplace le catalogue d'une source (ex. source='result', campaign=c) par
+    les enregistrements parsés ; les fichiers illisibles sont conservés avec leur erreur.
+    owner : campaign=, collection= ou team_collection=.
+    """
+    members = [member_from_record(r, source, name_from_locus=name_from_locus, **owner) for r in records]
+    members += [
+        ArchiveMember(source=source, member_path=member, name=f"{member} (Erreur parsing: {error})"[:255],
+                      error=error, **owner)
+        for member, error in errors
+    ]
+    with transaction.atomic():
+        ArchiveMember.objects.filter(source=source, **owner).delete()
+        ArchiveMember.objects.bulk_create(members, batch_size=BATCH_SIZE)
+        # Index k-mer pour la recherche par séquence (clés primaires renvoyées par bulk_create)
+        seqindex.index_members(members)
+    return members
+
+
+def index_archive(archive, source, name_from_locus=False, **owner):
+    """Parse une archive zip (en parallèle si elle est grosse) puis l'ajoute au catalogue."""
+    try:
+        records, errors = parse_archive(archive, dossier_nom=None)
+    except Exception as e:
+        records, errors = [], [(str(archive), f"Erreur lecture archive : {e}")]
+    return index_records(records, errors, source, name_from_locus=name_from_locus, **owner)
@@ -0,0 +1,118 @@
+"""
+Tables de dilution des résultats de campagne (modèles DilutionTable / DilutionRow).
+
+Les fichiers dilution-*.json du résultat sont chargés une seule fois, à la fin
+de la simulation, avec l'ordre de leurs colonnes. La page de digestion lit
+ensuite la base ; les exports CSV / XLSX sont produits ligne à ligne, sans
+construire le fichier entier en mémoire.
+"""
+import csv
+import json
+import tempfile
+
+from django.db import transaction
+from openpyxl import Workbook
+
+from . import result_manifest
+from .ingest import BATCH_SIZE
+from .models import DilutionRow, DilutionTable
+
+# Colonnes affichées en premier, les autres suivent par ordre alphabétique
+PREFERRED_COLUMNS = ('plasmid_id', 'h2o_volume', 'buffer')
+LABELS = {'10x': 'Dilution 10x', 'direct': 'Dilution Direct'}
+# Lignes lues par requête pendant un export
+EXPORT_CHUNK_SIZE = 2000
+
+
+def ordered_columns(rows):
+    columns = set()
+    for row in rows:
+        columns.update(row.keys())
+    ordered = [column for column in PREFERRED_COLUMNS if column in columns]
+    ordered.extend(sorted(columns - set(ordered)))
+    return ordered
+
+
+def label(table):
+    return LABELS.get(table.dilution_type, table.member_path.rsplit('/', 1)[-1])
+
+
+def load(campaign):
+    """
+    (Re)charge les tables de dilution de la campagne depuis son résultat.
+    Un seul fichier par type (le premier du zip) ; les JSON illisibles sont ignorés.
+    """
+    tables, rows = [], []
+    for entry in result_manifest.manifest(campaign):
+        if entry['category'] != result_manifest.DILUTION:
+            continue
+        dilution_type = result_manifest.dilution_type(entry['path'])
+        if any(table.dilution_type == dilution_type for table, data in tables):
+            continue
+        try:
+            data = json.loads(result_manifest.read(campaign, entry).decode('utf-8'))
+        except ValueError:
+            continue
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            continue
+        tables.append((DilutionTable(campaign=campaign, dilution_type=dilution_type,
+                                     member_path=entry['path'], columns=ordered_columns(data)), data))
+
+    with transaction.atomic():
+        DilutionTable.objects.filter(campaign=campaign).delete()
+        for table, data in tables:
+            table.save()
+            rows.extend(
+                DilutionRow(table=table, position=i, plasmid_id=str(row.get('plasmid_id', ''))[:255], values=row)
+                for i, row in enumerate(data)
+            )
+        DilutionRow.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return [table for table, data in tables]
+
+
+def tables(campaign):
+    """Tables de la campagne ; chargées au premier accès pour les campagnes plus anciennes."""
+    result = list(campaign.dilution_tables.all())
+    if not result and any(e['category'] == result_manifest.DILUTION for e in result_manifest.manifest(campaign)):
+        result = load(campaign)
+    return result
+
+
+def iter_values(table):
+    """Valeurs des lignes, dans l'ordre, lues par paquets."""
+    return table.rows.order_by('position').values_list('values', flat=True).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer : chaque ligne écrite est renvoyée telle quelle."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(table):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(table.columns)
+    for values in iter_values(table):
+        yield writer.writerow([values.get(column, '') for column in table.columns])
+
+
+def _cell(value):
+    # Une cellule ne contient qu'une valeur simple
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def xlsx_file(table):
+    """
+    Classeur XLSX de la table dans un fichier temporaire (supprimé à sa fermeture),
+    écrit en mode write_only : les lignes ne sont pas gardées en mémoire.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(table.dilution_type[:31])
+    sheet.append(table.columns)
+    for values in iter_values(table):
+        sheet.append([_cell(values.get(column)) for column in table.columns])
+    fh = tempfile.TemporaryFile()
+    workbook.save(fh)
+    fh.seek(0)
+    return fh
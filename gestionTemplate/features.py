@@ -0,0 +1,143 @@
+"""
+Features structurées des plasmides (modèle PlasmidFeature).
+
+Les features sont normalisées une seule fois, à l'import ou à l'enregistrement
+d'un plasmide, avec un résumé de leurs libellés dans Plasmide.feature_summary :
+les listes affichent ce résumé sans relire les features brutes.
+"""
+import hashlib
+import io
+import json
+
+from django.db import transaction
+
+from .genbank import iter_genbank
+from .models import PlasmidFeature, Plasmide
+
+BATCH_SIZE = 500
+# Qualificatifs utilisés comme libellé d'une feature, par ordre de préférence
+LABEL_QUALIFIERS = ('label', 'allele', 'gene', 'product')
+# Nombre de libellés repris dans le résumé affiché en liste
+SUMMARY_LABELS = 5
+# Traductions protéiques : recalculables à partir de la séquence, non stockées
+SKIPPED_QUALIFIERS = ('translation',)
+
+
+def feature_label(qualifiers):
+    for key in LABEL_QUALIFIERS:
+        for value in qualifiers.get(key, []):
+            if value:
+                return value
+    return ''
+
+
+def summary(features):
+    """Libellés distincts des premières features, séparés par des virgules."""
+    labels = []
+    for feature in features:
+        label = feature_label(feature.get('qualifiers', {}))
+        if label and label not in labels:
+            labels.append(label)
+            if len(labels) == SUMMARY_LABELS:
+                break
+    return ", ".join(labels)[:255]
+
+
+def _qualifiers(feature):
+    return {k: v for k, v in feature.get('qualifiers', {}).items() if k not in SKIPPED_QUALIFIERS}
+
+
+def feature_hash(features):
+    """Empreinte des features normalisées (clé du cache des cartes, voir map_cache.py)."""
+    rows = [
+        [feature.get('type', ''), feature.get('start'), feature.get('end'), feature.get('strand') or 1,
+         _qualifiers(feature)]
+        for feature in features
+    ]
+    return hashlib.sha256(json.dumps(rows, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def as_dicts(rows):
+    """PlasmidFeature -> dictionnaires au format de genbank.parse_genbank (pour le rendu des cartes)."""
+    return [
+        {'type': row.type, 'start': row.start, 'end': row.end, 'strand': row.strand, 'qualifiers': row.qualifiers}
+        for row in rows
+    ]
+
+
+def structured_features(plasmide):
+    """
+    Features structurées (format de genbank.iter_genbank) relues depuis
+    Plasmide.features : texte brut du bloc FEATURES, ou ancienne liste de
+    dictionnaires de qualificatifs (sans localisation).
+    """
+    raw = plasmide.features.get('raw') if isinstance(plasmide.features, dict) else plasmide.features
+    if isinstance(raw, str):
+        if not raw.strip():
+            return []
+        # features_raw est stocké sans l'indentation de sa première ligne
+        text = f"LOCUS       {plasmide.name or 'plasmide'}\nFEATURES             Location/Qualifiers\n     {raw.lstrip()}\n//\n"
+        record = next(iter_genbank(io.StringIO(text)), None)
+        return record['features'] if record else []
+    features = []
+    for qualifiers in raw if isinstance(raw, list) else []:
+        if isinstance(qualifiers, dict):
+            features.append({
+                'type': '', 'start': None, 'end': None, 'strand': 1,
+                'qualifiers': {k: v if isinstance(v, list) else [v] for k, v in qualifiers.items()},
+            })
+    return features
+
+
+def raw_features(record):
+    """Features d'un SeqRecord Biopython au format de Plasmide.features ({'raw': bloc FEATURES})."""
+    parsed = next(iter_genbank(io.StringIO(record.format('genbank'))), None)
+    return {'raw': parsed['features_raw'] if parsed else ''}
+
+
+def feature_rows(plasmide, features):
+    return [
+        PlasmidFeature(
+            plasmide_id=plasmide.pk,
+            type=feature.get('type', '')[:50],
+            start=feature.get('start'),
+            end=feature.get('end'),
+            strand=feature.get('strand') or 1,
+            label=feature_label(feature.get('qualifiers', {}))[:255],
+            qualifiers=_qualifiers(feature),
+        )
+        for feature in features
+    ]
+
+
+def index_plasmides(plasmides, parsed=None, created=False, changed_only=False):
+    """
+    (Ré)crée les PlasmidFeature, le résumé et l'empreinte des features des plasmides, par lots.
+    parsed : features déjà parsées, dans l'ordre des plasmides (relues depuis
+    Plasmide.features sinon) ; created : plasmides tout juste insérés, sans
+    features à supprimer ; changed_only : ignore les plasmides dont l'empreinte
+    enregistrée (Plasmide.feature_hash) est inchangée.
+    """
+    plasmides = list(plasmides)
+    if parsed is None:
+        parsed = [structured_features(p) for p in plasmides]
+    rows, changed, indexed = [], [], []
+    for p, features in zip(plasmides, parsed):
+        text, digest = summary(features), feature_hash(features)
+        if changed_only and digest == p.feature_hash:
+            continue
+        indexed.append(p.pk)
+        rows.extend(feature_rows(p, features))
+        if (text, digest) != (p.feature_summary, p.feature_hash):
+            p.feature_summary, p.feature_hash = text, digest
+            changed.append(p)
+
+    # Sans savepoint : appelée à l'intérieur de la transaction d'import
+    with transaction.atomic(savepoint=False):
+        if not created:
+            for i in range(0, len(indexed), BATCH_SIZE):
+                PlasmidFeature.objects.filter(plasmide_id__in=indexed[i:i + BATCH_SIZE]).delete()
+        PlasmidFeature.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        if changed:
+            Plasmide.objects.bulk_update(changed, ['feature_summary', 'feature_hash'], batch_size=BATCH_SIZE)
+    return len(rows)
@@ -0,0 +1,108 @@
+"""
+Envoi de fichiers du disque avec cache HTTP.
+
+ETag / Last-Modified et requêtes conditionnelles (304), requêtes partielles
+(Range, une seule plage : 206 ou 416). Sans plage, FileResponse laisse le
+serveur WSGI utiliser sendfile. Avec FILE_SERVING_OFFLOAD, l'envoi est confié
+au serveur web frontal : 'x-accel-redirect' (nginx, location interne
+FILE_SERVING_ACCEL_PREFIX pointant sur MEDIA_ROOT) ou 'x-sendfile' (Apache).
+"""
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_etags
+
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    (début, fin incluse) d'un en-tête Range à une seule plage ; None si l'en-tête
+    est absent ou non géré (le fichier entier est alors envoyé), ValueError si la
+    plage est hors du fichier.
+    """
+    match = _RANGE.match((header or '').replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffixe : les N derniers octets
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def _iter_file(path, start, length):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path):
+    mode = getattr(settings, 'FILE_SERVING_OFFLOAD', None)
+    response = HttpResponse()
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'FILE_SERVING_ACCEL_PREFIX', '/protected-media/')
+        relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = path
+    else:
+        return None
+    # Le corps est envoyé (et Range géré) par le serveur frontal
+    return response
+
+
+def serve_file(request, path, content_type, etag, last_modified=None, filename=None,
+               as_attachment=False, max_age=3600):
+    """
+    Réponse pour le fichier path. etag : ETag fort (avec guillemets), dérivé du
+    contenu ; last_modified : timestamp. Les réponses sont privées (données d'utilisateur).
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _offload(path)
+    if response is None:
+        size = os.path.getsize(path)
+        # If-Range : plage seulement si le client a la même version du fichier
+        if_range = request.META.get('HTTP_IF_RANGE')
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        else:
+            if byte_range and if_range and if_range not in parse_etags(etag):
+                byte_range = None
+            if byte_range:
+                start, end = byte_range
+                response = StreamingHttpResponse(_iter_file(path, start, end - start + 1), status=206)
+                response['Content-Range'] = f'bytes {start}-{end}/{size}'
+                response['Content-Length'] = str(end - start + 1)
+            else:
+                response = FileResponse(open(path, 'rb'))
+        response['Accept-Ranges'] = 'bytes'
+    if response.status_code != 304:
+        response['Content-Type'] = content_type
+        if filename and response.status_code in (200, 206):
+            response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, max_age=max_age)
+    return response
@@ -0,0 +1,202 @@
+"""
+Recherche plein texte (SQLite FTS5) sur les métadonnées des plasmides, des
+templates et des tables de correspondance.
+
+Une table virtuelle unique, tokenisée en trigrammes, remplace les filtres
+``icontains`` : la recherche de sous-chaîne (au moins 3 caractères) passe par
+l'index et les résultats sont classés par bm25. Le rowid encode le type et la
+clé primaire de l'objet, ce qui permet de restreindre la recherche au queryset
+de l'appelant dans la même requête SQL ; la table est tenue à jour par les signaux
+(voir signals.py) et par ingest pour les insertions en masse.
+Sur une autre base que SQLite, ou pour un terme trop court, on revient aux
+filtres ``icontains``.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+TABLE = 'gestiontemplate_search'
+COLUMNS = ('name', 'description', 'organism', 'keywords', 'definition', 'features')
+# Poids bm25 par colonne (même ordre que COLUMNS)
+WEIGHTS = (10.0, 2.0, 4.0, 3.0, 2.0, 1.0)
+KINDS = ('plasmide', 'template', 'mapping')
+MIN_TERM_LENGTH = 3
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    + ", ".join(COLUMNS)
+    + ", tokenize='trigram')"
+)
+
+# Champ du modèle équivalent à chaque colonne, pour le repli icontains
+FALLBACK_FIELDS = {
+    'plasmide': {'name': 'name', 'description': 'description', 'organism': 'organism',
+                 'keywords': 'keywords', 'definition': 'genbank_definition', 'features': 'features'},
+    'template': {'name': 'name', 'description': 'description'},
+    'mapping': {'name': 'name', 'description': 'description'},
+}
+
+_QUALIFIER = re.compile(r'/(?:label|gene|product|note)="?([^"\n]+)')
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def feature_text(features):
+    """Valeurs des qualificatifs label/gene/product/note des features brutes d'un Plasmide."""
+    raw = features.get('raw', '') if isinstance(features, dict) else ''
+    values = []
+    for value in _QUALIFIER.findall(str(raw)):
+        value = value.strip()
+        if value and value not in values:
+            values.append(value)
+    return ' '.join(values)
+
+
+def document(kind, obj):
+    """Valeurs des colonnes indexées d'un objet."""
+    if kind == 'plasmide':
+        return (obj.name, obj.description, obj.organism, obj.keywords, obj.genbank_definition,
+                feature_text(obj.features))
+    return (obj.name, obj.description, '', '', '', '')
+
+
+def _rowid(kind, pk):
+    return pk * len(KINDS) + KINDS.index(kind)
+
+
+def index_objects(kind, objects):
+    """Ajoute ou remplace les objets dans l'index, en une requête."""
+    if not available():
+        return
+    rows = [(_rowid(kind, obj.pk), *document(kind, obj)) for obj in objects if obj.pk is not None]
+    if not rows:
+        return
+    placeholders = ', '.join(['%s'] * (len(COLUMNS) + 1))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {TABLE}(rowid, {', '.join(COLUMNS)}) VALUES ({placeholders})", rows
+        )
+
+
+def remove_objects(kind, pks):
+    if not available() or not pks:
+        return
+    rowids = [_rowid(kind, pk) for pk in pks]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {TABLE} WHERE rowid IN ({', '.join(['%s'] * len(rowids))})", rowids
+        )
+
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def match_expression(terms):
+    """Expression MATCH FTS5 : chaque terme est une sous-chaîne, éventuellement limitée à une colonne."""
+    return ' AND '.join(
+        f"{column} : {_phrase(text)}" if column else _phrase(text) for column, text in terms.items()
+    )
+
+
+def search(kind, terms, queryset=None, limit=None):
+    """
+    Clés primaires des objets correspondant à tous les termes, du plus au moins pertinent.
+    terms : {colonne ou None (toutes colonnes): texte}.
+    queryset : restreint les résultats à ses objets, dans la même requête (le
+    classement et l'éventuelle limite portent sur les objets visibles seulement).
+    Retourne None si l'index ne peut pas servir (base non SQLite, terme trop court).
+    """
+    terms = {column: text.strip() for column, text in terms.items() if text and text.strip()}
+    if not available() or any(len(text) < MIN_TERM_LENGTH for text in terms.values()):
+        return None
+    weights = ', '.join(str(w) for w in WEIGHTS)
+    sql = f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% %s = %s"
+    params = [match_expression(terms), len(KINDS), KINDS.index(kind)]
+    if queryset is not None:
+        subquery, subparams = queryset.order_by().values('pk').query.sql_with_params()
+        sql += f" AND rowid / %s IN ({subquery})"
+        params += [len(KINDS), *subparams]
+    sql += f" ORDER BY bm25({TABLE}, {weights})"
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [rowid // len(KINDS) for (rowid,) in cursor.fetchall()]
+
+
+def _fallback(queryset, kind, terms):
+    fields = FALLBACK_FIELDS[kind]
+    for column, text in terms.items():
+        if not text or not text.strip():
+            continue
+        if column:
+            queryset = queryset.filter(**{f"{fields[column]}__icontains": text.strip()})
+        else:
+            condition = Q()
+            for field in dict.fromkeys(fields.values()):
+                condition |= Q(**{f"{field}__icontains": text.strip()})
+            queryset = queryset.filter(condition)
+    return queryset
+
+
+class Ranked:
+    """
+    Résultats classés par pertinence : identifiants ordonnés des objets du
+    queryset (voir search). Les objets ne sont chargés que pour les
+    identifiants demandés (voir pagination.paginate) ou à l'itération.
+    """
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.model = queryset.model
+        self.ids = ids
+
+    def fetch(self, ids):
+        objects = {obj.pk: obj for obj in self.queryset.filter(pk__in=ids)}
+        return [objects[pk] for pk in ids if pk in objects]
+
+    def __iter__(self):
+        return iter(self.fetch(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def ranked(queryset, kind, terms):
+    """
+    Restreint le queryset aux objets correspondant aux termes, classés par
+    pertinence (Ranked). Sans terme, ou si l'index ne peut pas servir, rend un queryset.
+    """
+    if not any(text and text.strip() for text in terms.values()):
+        return queryset
+    ids = search(kind, terms, queryset)
+    if ids is None:
+        return _fallback(queryset, kind, terms)
+    return Ranked(queryset, ids)
+
+
+def rebuild():
+    """Reconstruit tout l'index à partir de la base."""
+    from .models import CampaignTemplate, MappingTemplate, Plasmide
+    if not available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        cursor.execute(f"DELETE FROM {TABLE}")
+    total = 0
+    for kind, model in (('plasmide', Plasmide), ('template', CampaignTemplate), ('mapping', MappingTemplate)):
+        batch = []
+        for obj in model.objects.all().iterator(chunk_size=1000):
+            batch.append(obj)
+            if len(batch) >= 1000:
+                index_objects(kind, batch)
+                total += len(batch)
+                batch = []
+        index_objects(kind, batch)
+        total += len(batch)
+    return total
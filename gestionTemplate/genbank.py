@@ -0,0 +1,252 @@
+"""
+Lecture en flux des fichiers GenBank.
+
+Le fichier est parcouru une seule fois, ligne par ligne : les métadonnées,
+les features (brutes et structurées), la séquence, sa longueur et son taux de
+GC sont calculés au fil de la lecture. La source peut être un chemin ou tout
+objet fichier, texte ou binaire (upload Django, ``zipfile.ZipFile.open``...),
+sans passer par un fichier temporaire.
+"""
+import io
+import os
+import re
+
+_LOCUS_LENGTH = re.compile(r'(\d+)\s+bp')
+_LOCUS_MOL_TYPE = re.compile(r'\d+\s+bp\s+([^\s]+)')
+_NON_ACGT = re.compile(r'[^acgtACGT]')
+# Lignes ORIGIN : on garde A/C/G/T (en majuscules) et on supprime tout autre caractère ASCII
+_ORIGIN_TABLE = str.maketrans({chr(i): None for i in range(128)})
+_ORIGIN_TABLE.update({ord(c): c.upper() for c in 'acgtACGT'})
+_RANGE = re.compile(r'<?(\d+)(?:\s*(?:\.\.|\^)\s*>?(\d+))?')
+
+# Mots-clés de premier niveau qui terminent un champ sur plusieurs lignes
+_HEADER_KEYWORDS = ('ACCESSION', 'VERSION', 'KEYWORDS', 'SOURCE', 'REFERENCE', 'FEATURES',
+                    'ORIGIN', 'LOCUS', 'DEFINITION')
+
+
+def source_name(source):
+    """Nom du plasmide déduit du nom de fichier de la source (sans extension)."""
+    if isinstance(source, (str, os.PathLike)):
+        filename = os.fspath(source)
+    else:
+        filename = getattr(source, 'name', '') or ''
+    return os.path.splitext(os.path.basename(str(filename)))[0]
+
+
+def _open_text(source):
+    """Retourne (flux texte, nom du fichier, à fermer ?) pour un chemin ou un objet fichier."""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'r', encoding='utf-8', errors='replace'), os.fspath(source), True
+
+    name = getattr(source, 'name', '') or ''
+    if isinstance(source, io.TextIOBase):
+        return source, name, False
+    # Flux binaire (upload, membre d'archive zip, BytesIO...)
+    if hasattr(source, 'seek') and hasattr(source, 'tell'):
+        try:
+            source.seek(0)
+        except (OSError, ValueError):
+            pass
+    text = io.TextIOWrapper(source, encoding='utf-8', errors='replace')
+    return text, name, False
+
+
+def parse_location(location):
+    """
+    Convertit une localisation GenBank (ex. ``complement(join(1..10,20..30))``)
+    en (start, end, strand, parts), coordonnées 0-based, fin exclue.
+    """
+    strand = -1 if location.startswith('complement(') else 1
+    parts = []
+    for match in _RANGE.finditer(location):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        parts.append([start - 1, end])
+    if not parts:
+        return None, None, strand, []
+    return min(p[0] for p in parts), max(p[1] for p in parts), strand, parts
+
+
+def _finish_qualifier(feature, key, value):
+    if key is None:
+        return
+    if value is not None:
+        value = value.strip()
+        if value.startswith('"'):
+            value = value[1:]
+        if value.endswith('"'):
+            value = value[:-1]
+        value = value.replace('""', '"')
+        if key == 'translation':
+            value = value.replace(' ', '')
+    feature['qualifiers'].setdefault(key, []).append(value if value is not None else '')
+
+
+def _finish_feature(features, feature, key, value):
+    if feature is None:
+        return
+    _finish_qualifier(feature, key, value)
+    feature['start'], feature['end'], feature['strand'], feature['parts'] = parse_location(feature['location'])
+    features.append(feature)
+
+
+def _finish_record(record, feature_lines, features, seq_parts, gc):
+    record['features_raw'] = '\n'.join(feature_lines).strip()
+    record['features'] = features
+    seq = ''.join(seq_parts)
+    record['sequence'] = seq
+    if seq:
+        record['length'] = len(seq)
+        record['gc_content'] = round(gc / len(seq) * 100, 2)
+    return record
+
+
+def iter_genbank(source):
+    """Parcourt les enregistrements GenBank de la source, un dictionnaire par enregistrement."""
+    stream, filename, should_close = _open_text(source)
+    try:
+        record = None
+        section = None
+        feature_lines = []
+        features = []
+        feature = None
+        qual_key = qual_value = None
+        seq_parts = []
+        gc = 0
+        last_field = None
+
+        for raw in stream:
+            line = raw.rstrip('\r\n')
+
+            if line.startswith('//'):
+                if record is not None:
+                    _finish_feature(features, feature, qual_key, qual_value)
+                    yield _finish_record(record, feature_lines, features, seq_parts, gc)
+                record, section = None, None
+                feature_lines, features, feature = [], [], None
+                qual_key = qual_value = None
+                seq_parts, gc, last_field = [], 0, None
+                continue
+
+            if section == 'origin':
+                chunk = line.translate(_ORIGIN_TABLE)
+                if not chunk.isascii():
+                    chunk = _NON_ACGT.sub('', chunk)
+                if chunk:
+                    seq_parts.append(chunk)
+                    gc += chunk.count('G') + chunk.count('C')
+                continue
+
+            if section == 'features':
+                if line[:1] not in (' ', '') or line.startswith('ORIGIN'):
+                    _finish_feature(features, feature, qual_key, qual_value)
+                    feature, qual_key, qual_value = None, None, None
+                    section = None
+                else:
+                    feature_lines.append(line)
+                    key = line[5:21].strip() if len(line) > 5 and line[5] != ' ' else ''
+                    content = line[21:].strip()
+                    if key:
+                        # Nouvelle feature
+                        _finish_feature(features, feature, qual_key, qual_value)
+                        feature = {'type': key, 'location': content, 'qualifiers': {}}
+                        qual_key = qual_value = None
+                    elif feature is not None and content.startswith('/'):
+                        _finish_qualifier(feature, qual_key, qual_value)
+                        name, sep, value = content[1:].partition('=')
+                        qual_key, qual_value = name, (value if sep else None)
+                    elif feature is not None and qual_key is not None:
+                        # Suite d'une valeur de qualificatif
+                        sep = '' if qual_key == 'translation' else ' '
+                        qual_value = content if qual_value is None else qual_value + sep + content
+                    elif feature is not None:
+                        # Suite de la localisation
+                        feature['location'] += content
+                    continue
+
+            if line.startswith('LOCUS'):
+                name = source_name(filename)
+                tokens = line.split()
+                record = {
+                    'locus': tokens[1] if len(tokens) > 1 else '',
+                    'name': name or (tokens[1] if len(tokens) > 1 else ''),
+                    'topology': 'circular' if 'circular' in tokens[2:] else 'linear',
+                }
+                m_len = _LOCUS_LENGTH.search(line)
+                if m_len:
+                    record['length'] = int(m_len.group(1))
+                m_mol = _LOCUS_MOL_TYPE.search(line)
+                if m_mol:
+                    record['mol_type'] = m_mol.group(1)
+                last_field = None
+            elif record is None:
+                continue
+            elif line.startswith('DEFINITION'):
+                record['definition'] = line[len('DEFINITION'):].strip()
+                last_field = 'definition'
+            elif line.startswith(' ') and last_field == 'definition':
+                cont = line.strip()
+                if cont and cont.split()[0] in _HEADER_KEYWORDS:
+                    last_field = None
+                else:
+                    record['definition'] += ' ' + cont
+            elif line.startswith('ACCESSION'):
+                record['accession'] = line[len('ACCESSION'):].strip()
+                last_field = None
+            elif line.startswith('VERSION'):
+                record['version'] = line[len('VERSION'):].strip()
+                last_field = None
+            elif line.startswith('KEYWORDS'):
+                record['keywords'] = line[len('KEYWORDS'):].strip().rstrip('.')
+                last_field = None
+            elif line.lstrip().startswith('ORGANISM'):
+                parts = line.strip().split(None, 1)
+                record['organism'] = parts[1] if len(parts) > 1 else ''
+                last_field = None
+            elif line.startswith('FEATURES'):
+                section = 'features'
+                last_field = None
+            elif line.startswith('ORIGIN'):
+                section = 'origin'
+                last_field = None
+            elif not line.startswith(' '):
+                last_field = None
+
+        # Fichier tronqué (sans '//') : on rend tout de même l'enregistrement
+        if record is not None:
+            _finish_feature(features, feature, qual_key, qual_value)
+            yield _finish_record(record, feature_lines, features, seq_parts, gc)
+    finally:
+        if should_close:
+            stream.close()
+        elif isinstance(stream, io.TextIOWrapper) and stream is not source:
+            # Ne pas fermer le flux binaire de l'appelant avec l'enveloppe texte
+            stream.detach()
+
+
+def parse_genbank(source):
+    """Lit le premier enregistrement GenBank de la source (chemin ou objet fichier)."""
+    records = iter_genbank(source)
+    try:
+        return next(records)
+    except StopIteration:
+        raise ValueError("Aucun enregistrement GenBank trouvé.") from None
+    finally:
+        records.close()
+
+
+def parse_genbank_members(members):
+    """
+    Parse une liste de (nom, contenu en octets) ; exécuté dans les processus
+    du pool de parsing (aucun accès à la base).
+    Retourne une liste de (nom, enregistrement ou None, erreur ou None).
+    """
+    results = []
+    for name, data in members:
+        try:
+            handle = io.BytesIO(data)
+            handle.name = name
+            results.append((name, parse_genbank(handle), None))
+        except Exception as e:
+            results.append((name, None, str(e)))
+    return results
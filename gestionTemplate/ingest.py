@@ -0,0 +1,198 @@
+"""
+Import en masse de plasmides (collections, archives de simulation, import initial).
+
+Tous les fichiers GenBank sont d'abord parsés, puis les Plasmide et les liens
+many-to-many sont insérés par lots dans une seule transaction. Les couples
+(nom, dossier) déjà présents sont récupérés en amont au lieu d'une requête
+par fichier.
+"""
+import atexit
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from .genbank import parse_genbank_members, source_name
+from .models import Plasmide
+from . import features, fulltext, map_render, seqindex
+
+BATCH_SIZE = 500
+
+# Pool de parsing partagé par les requêtes d'un même processus (créé à la demande)
+_pool = None
+
+
+def is_genbank_member(member):
+    return member.lower().endswith(('.gb', '.gbk')) and not member.startswith('__MACOSX')
+
+
+def _get_pool(workers):
+    global _pool
+    if _pool is None:
+        # 'spawn' : pas de fork d'un serveur multi-thread ; genbank.py n'importe pas Django
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def parse_members(members):
+    """
+    Parse une liste de (nom, contenu) GenBank. Au-delà de GENBANK_PARALLEL_MIN_MEMBERS
+    fichiers, le travail est réparti sur un pool de GENBANK_PARSE_WORKERS processus ;
+    les petites archives sont parsées dans le processus courant.
+    """
+    workers = getattr(settings, 'GENBANK_PARSE_WORKERS', 4)
+    min_members = getattr(settings, 'GENBANK_PARALLEL_MIN_MEMBERS', 32)
+    if workers <= 1 or len(members) < min_members:
+        return parse_genbank_members(members)
+
+    # Quelques lots par processus pour équilibrer fichiers courts et longs
+    nb_chunks = min(len(members), workers * 4)
+    chunks = [members[i::nb_chunks] for i in range(nb_chunks)]
+    global _pool
+    try:
+        results = []
+        for chunk_results in _get_pool(workers).map(parse_genbank_members, chunks):
+            results.extend(chunk_results)
+    except Exception as e:
+        # Pool indisponible (processus tué...) : repli séquentiel, le pool sera recréé
+        print(f"Parsing parallèle impossible, repli séquentiel : {e}")
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        return parse_genbank_members(members)
+    # Conserver l'ordre de l'archive
+    order = {name: i for i, (name, data) in enumerate(members)}
+    results.sort(key=lambda result: order[result[0]])
+    return results
+
+
+def parse_archive(archive, dossier_nom):
+    """
+    Parse les .gb d'une archive zip (chemin, objet fichier ou ZipFile).
+    dossier_nom : nom du dossier, ou fonction membre -> dossier.
+    Retourne (enregistrements, erreurs) ; chaque enregistrement porte son 'dossier'.
+    """
+    zf = archive if isinstance(archive, zipfile.ZipFile) else zipfile.ZipFile(archive)
+    try:
+        # La décompression reste dans ce processus, seul le parsing est réparti
+        members = [(member, zf.read(member)) for member in zf.namelist() if is_genbank_member(member)]
+    finally:
+        if zf is not archive:
+            zf.close()
+
+    records, errors = [], []
+    for member, record, error in parse_members(members):
+        if error is not None:
+            errors.append((member, error))
+            continue
+        record['member'] = member
+        record['name'] = source_name(member)
+        record['dossier'] = dossier_nom(member) if callable(dossier_nom) else dossier_nom
+        records.append(record)
+    return records, errors
+
+
+def plasmide_from_record(record, user=None):
+    """Instance Plasmide (non sauvegardée) à partir d'un enregistrement de genbank.parse_genbank."""
+    return Plasmide(
+        name=record['name'],
+        description=record.get('definition', ''),
+        dossier=record['dossier'],
+        user=user,
+        accession=record.get('accession', ''),
+        version=record.get('version', ''),
+        genbank_definition=record.get('definition', '')[:255],
+        organism=record.get('organism', ''),
+        mol_type=record.get('mol_type', ''),
+        keywords=record.get('keywords', ''),
+        length=record.get('length'),
+        topology=record.get('topology', 'circular'),
+        sequence=record.get('sequence', ''),
+        features={'raw': record.get('features_raw', '')},
+        feature_summary=features.summary(record.get('features', [])),
+        feature_hash=features.feature_hash(record.get('features', [])),
+        gc_content=record.get('gc_content'),
+    )
+
+
+def _existing_plasmides(keys):
+    """Retourne {(nom, dossier): Plasmide} pour les couples déjà en base."""
+    names = sorted({name for name, dossier in keys})
+    existing = {}
+    for i in range(0, len(names), BATCH_SIZE):
+        for p in Plasmide.objects.listing().filter(name__in=names[i:i + BATCH_SIZE]):
+            if (p.name, p.dossier) in keys:
+                existing[(p.name, p.dossier)] = p
+    return existing
+
+
+def link_plasmides(manager, plasmides):
+    """Ajoute les plasmides à une relation many-to-many (collection.plasmides, campaign.plasmids) par lots."""
+    through = manager.through
+    source = f"{manager.source_field_name}_id"
+    target = f"{manager.target_field_name}_id"
+    owner_id = manager.instance.pk
+    rows = [through(**{source: owner_id, target: p.pk}) for p in plasmides]
+    through.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def ingest_records(records, user=None, collection=None, campaign=None):
+    """
+    Crée les Plasmide manquants, attribue l'utilisateur et les lie à la
+    collection / campagne, le tout dans une transaction.
+    Retourne (plasmides existants ou créés dans l'ordre des enregistrements, plasmides créés).
+    """
+    keys = {(r['name'], r['dossier']) for r in records}
+
+    with transaction.atomic():
+        existing = _existing_plasmides(keys)
+
+        to_create = {}
+        parsed_features = []
+        for record in records:
+            key = (record['name'], record['dossier'])
+            if key not in existing and key not in to_create:
+                to_create[key] = plasmide_from_record(record, user=user)
+                parsed_features.append(record.get('features', []))
+        created = Plasmide.objects.bulk_create(list(to_create.values()), batch_size=BATCH_SIZE)
+        # bulk_create n'émet pas post_save : indexation explicite (k-mers, features, plein texte)
+        seqindex.index_plasmides(created)
+        features.index_plasmides(created, parsed_features, created=True)
+        fulltext.index_objects('plasmide', created)
+        # Cartes pré-rendues par les workers avant la première consultation
+        map_render.enqueue_plasmides(created)
+
+        # Plasmides déjà connus : ils passent à l'utilisateur qui les importe
+        if user is not None and existing:
+            ids = [p.pk for p in existing.values()]
+            for i in range(0, len(ids), BATCH_SIZE):
+                Plasmide.objects.filter(pk__in=ids[i:i + BATCH_SIZE]).update(user=user)
+            for p in existing.values():
+                p.user = user
+
+        by_key = dict(existing)
+        by_key.update(zip(to_create.keys(), created))
+        plasmides = []
+        seen = set()
+        for record in records:
+            key = (record['name'], record['dossier'])
+            if key not in seen:
+                seen.add(key)
+                plasmides.append(by_key[key])
+
+        if collection is not None:
+            link_plasmides(collection.plasmides, plasmides)
+        if campaign is not None:
+            link_plasmides(campaign.plasmids, plasmides)
+
+    return plasmides, created
+
+
+def ingest_archive(archive, dossier_nom, user=None, collection=None, campaign=None):
+    """Parse puis importe une archive zip. Retourne (plasmides, créés, erreurs)."""
+    records, errors = parse_archive(archive, dossier_nom)
+    plasmides, created = ingest_records(records, user=user, collection=collection, campaign=campaign)
+    return plasmides, created, errors
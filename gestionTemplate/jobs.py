@@ -0,0 +1,108 @@
+"""
+File d'attente des traitements longs (simulations, rendu des cartes...).
+
+Les vues se contentent d'enregistrer un BackgroundJob en base puis rendent la
+main ; la commande ``python manage.py run_workers`` réclame les jobs en attente
+et les exécute dans un pool de processus.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob, Campaign
+
+# Type de job -> fonction exécutée par le worker (chemin importable)
+HANDLERS = {
+    BackgroundJob.KIND_SIMULATION: 'gestionTemplate.simulation.run_simulation_job',
+    BackgroundJob.KIND_MAPS: 'gestionTemplate.map_render.run_map_job',
+}
+
+
+def enqueue(kind, payload, campaign=None, user=None, session_key=''):
+    """Ajoute un job à la file et passe la campagne associée en attente."""
+    job = BackgroundJob.objects.create(
+        kind=kind,
+        payload=payload,
+        campaign=campaign,
+        user=user,
+        session_key=session_key or '',
+    )
+    if campaign is not None and campaign.status != Campaign.STATUS_PENDING:
+        campaign.status = Campaign.STATUS_PENDING
+        campaign.save(update_fields=['status'])
+    return job
+
+
+def claim_next(kinds=None):
+    """
+    Réserve le plus ancien job en attente.
+    La mise à jour conditionnelle (status=pending) garantit qu'un seul worker l'obtient.
+    """
+    pending = BackgroundJob.objects.filter(status=Campaign.STATUS_PENDING)
+    if kinds:
+        pending = pending.filter(kind__in=kinds)
+
+    for job_id in pending.order_by('created_at').values_list('id', flat=True)[:10]:
+        claimed = BackgroundJob.objects.filter(id=job_id, status=Campaign.STATUS_PENDING).update(
+            status=Campaign.STATUS_RUNNING,
+            started_at=timezone.now(),
+            worker_pid=os.getpid(),
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale(max_age=None):
+    """Remet en attente les jobs restés 'running' (worker arrêté brutalement)."""
+    if max_age is None:
+        max_age = timedelta(seconds=getattr(settings, 'JOB_STALE_AFTER', 3600))
+    limit = timezone.now() - max_age
+    return BackgroundJob.objects.filter(
+        status=Campaign.STATUS_RUNNING, started_at__lt=limit
+    ).update(status=Campaign.STATUS_PENDING, started_at=None, worker_pid=None)
+
+
+def run_job(job_id):
+    """Exécute un job déjà réservé. Appelé dans un processus du pool."""
+    job = BackgroundJob.objects.select_related('campaign').get(id=job_id)
+    handler = import_string(HANDLERS[job.kind])
+
+    if job.campaign_id:
+        job.campaign.status = Campaign.STATUS_RUNNING
+        job.campaign.save(update_fields=['status'])
+
+    try:
+        handler(job)
+    except Exception as e:
+        job.status = Campaign.STATUS_FAILED
+        job.error_message = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'finished_at'])
+        if job.campaign_id:
+            Campaign.objects.filter(id=job.campaign_id).update(
+                status=Campaign.STATUS_FAILED, error_message=str(e)
+            )
+        return job.status
+
+    job.status = Campaign.STATUS_DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result_path', 'finished_at'])
+    if job.campaign_id:
+        Campaign.objects.filter(id=job.campaign_id).update(status=Campaign.STATUS_DONE)
+    return job.status
+
+
+def run_pending(kinds=None, limit=None):
+    """Exécute les jobs en attente dans le processus courant (tests, dépannage)."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim_next(kinds)
+        if job is None:
+            break
+        run_job(job.id)
+        done += 1
+    return done
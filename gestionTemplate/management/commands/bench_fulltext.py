@@ -0,0 +1,93 @@
+import random
+import sqlite3
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from gestionTemplate import fulltext
+
+ORGANISMS = ['Escherichia coli', 'Saccharomyces cerevisiae', 'synthetic construct', 'Bacillus subtilis',
+             'Homo sapiens', 'Arabidopsis thaliana']
+FEATURES = ['CamR', 'AmpR', 'KanR', 'ColE1', 'GFP', 'Venus', 'mCherry', 'pTDH3', 'tENO1', 'ConLS', 'ConR1',
+            'URA3', 'LEU2', 'HIS3', 'CEN6/ARS4', '2micron', 'lacZ', 'BsaI site', 'BsmBI site']
+WORDS = ['plasmid', 'part', 'promoter', 'terminator', 'cassette', 'backbone', 'vector', 'toolkit', 'yeast',
+         'golden', 'gate', 'assembly', 'level', 'connector', 'marker', 'origin', 'reporter']
+
+QUERIES = [
+    {'name': 'YTK001234'},
+    {'name': 'YTK01'},
+    {'name': 'pLVL2'},
+    {'organism': 'cerevisiae'},
+    {'features': 'mCherry'},
+    {'name': 'YTK0', 'organism': 'coli'},
+    {'features': 'URA3', 'organism': 'Saccharomyces'},
+]
+
+
+def _synthetic_rows(count, seed):
+    rng = random.Random(seed)
+    prefixes = ['pYTK', 'pLVL1-', 'pLVL2-', 'pMOD', 'pGG', 'pUC', 'pCDF']
+    for i in range(count):
+        yield (
+            f"{rng.choice(prefixes)}{i:06d}",
+            ' '.join(rng.choice(WORDS) for _ in range(12)),
+            rng.choice(ORGANISMS),
+            ' '.join(rng.sample(WORDS, 3)),
+            ' '.join(rng.choice(WORDS) for _ in range(6)),
+            ' '.join(rng.sample(FEATURES, 5)),
+        )
+
+
+class Command(BaseCommand):
+    help = ("Compare, sur une banque synthétique en mémoire, les filtres LIKE '%x%' "
+            "actuels à l'index FTS5 trigramme de fulltext.py.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000, help="Nombre de plasmides synthétiques.")
+        parser.add_argument('--repeat', type=int, default=20, help="Exécutions par requête.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _time(self, db, sql, params, repeat):
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = db.execute(sql, params).fetchall()
+            durations.append(time.perf_counter() - start)
+        return statistics.median(durations) * 1000, len(rows)
+
+    def handle(self, *args, **options):
+        columns = ', '.join(fulltext.COLUMNS)
+        db = sqlite3.connect(':memory:')
+        db.execute(f"CREATE TABLE plasmide (id INTEGER PRIMARY KEY, {columns})")
+        db.execute(fulltext.CREATE_SQL)
+
+        start = time.perf_counter()
+        rows = list(_synthetic_rows(options['count'], options['seed']))
+        placeholders = ', '.join('?' * len(fulltext.COLUMNS))
+        db.executemany(f"INSERT INTO plasmide ({columns}) VALUES ({placeholders})", rows)
+        db.execute(f"INSERT INTO {fulltext.TABLE}(rowid, {columns}) SELECT id, {columns} FROM plasmide")
+        self.stdout.write(f"{options['count']} plasmides indexés en {time.perf_counter() - start:.1f} s")
+
+        weights = ', '.join(str(w) for w in fulltext.WEIGHTS)
+        self.stdout.write(f"{'requête':<40} {'LIKE':>9} {'FTS5':>9} {'FTS5+bm25':>10} {'résultats':>10}  (médianes, ms)")
+        for terms in QUERIES:
+            where = ' AND '.join(f"{column} LIKE ?" for column in terms)
+            like_ms, like_count = self._time(
+                db, f"SELECT id FROM plasmide WHERE {where}",
+                [f"%{text}%" for text in terms.values()], options['repeat'],
+            )
+            match = [fulltext.match_expression(terms)]
+            fts_ms, fts_count = self._time(
+                db, f"SELECT rowid FROM {fulltext.TABLE} WHERE {fulltext.TABLE} MATCH ?", match, options['repeat'],
+            )
+            # Requête de fulltext.search : classement bm25 de tous les résultats
+            ranked_ms, ranked_count = self._time(
+                db, f"SELECT rowid FROM {fulltext.TABLE} WHERE {fulltext.TABLE} MATCH ? "
+                    f"ORDER BY bm25({fulltext.TABLE}, {weights})",
+                match, options['repeat'],
+            )
+            if like_count != fts_count:
+                self.stdout.write(self.style.WARNING(f"  résultats différents : LIKE {like_count}, FTS5 {fts_count}"))
+            label = ', '.join(f"{k}={v}" for k, v in terms.items())
+            self.stdout.write(f"{label:<40} {like_ms:>9.2f} {fts_ms:>9.2f} {ranked_ms:>10.2f} {like_count:>10}")
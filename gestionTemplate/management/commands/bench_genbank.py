@@ -0,0 +1,71 @@
+import glob
+import os
+import time
+
+from Bio import SeqIO
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gestionTemplate.genbank import parse_genbank
+
+
+def _gc(seq):
+    seq = seq.upper()
+    return (seq.count('G') + seq.count('C')) / len(seq) * 100 if seq else None
+
+
+def _parse_biopython(path):
+    # Équivalent Bio.SeqIO de parse_genbank : séquence, longueur, GC, features
+    record = SeqIO.read(path, 'genbank')
+    seq = str(record.seq)
+    return len(seq), _gc(seq), len(record.features)
+
+
+def _parse_stream(path):
+    record = parse_genbank(path)
+    return record.get('length'), record.get('gc_content'), len(record['features'])
+
+
+class Command(BaseCommand):
+    help = "Compare le parseur GenBank en flux à Bio.SeqIO sur les corpus data_web/p*."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pattern', default=os.path.join(settings.BASE_DIR, 'data_web', 'p*', '*.gb'),
+                            help="Motif glob des fichiers GenBank à lire.")
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Nombre de passes sur le corpus (meilleur temps retenu).")
+
+    def handle(self, *args, **options):
+        files = sorted(glob.glob(options['pattern']))
+        if not files:
+            self.stdout.write(self.style.ERROR(f"Aucun fichier pour {options['pattern']}"))
+            return
+        total_bytes = sum(os.path.getsize(f) for f in files)
+        self.stdout.write(f"{len(files)} fichiers, {total_bytes / 1024:.0f} Ko, {options['repeat']} passe(s)")
+
+        # Vérification : mêmes longueurs et nombres de features
+        mismatches = 0
+        for path in files:
+            length, gc, nb_features = _parse_stream(path)
+            bio_length, bio_gc, bio_features = _parse_biopython(path)
+            if length != bio_length or nb_features != bio_features:
+                mismatches += 1
+                self.stdout.write(self.style.WARNING(f"  Différence sur {path}"))
+
+        results = {}
+        for label, func in (('Bio.SeqIO', _parse_biopython), ('genbank.parse_genbank', _parse_stream)):
+            best = None
+            for _ in range(max(1, options['repeat'])):
+                start = time.perf_counter()
+                for path in files:
+                    func(path)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = best
+            self.stdout.write(
+                f"{label:<24} {best * 1000:8.1f} ms  "
+                f"({best / len(files) * 1000:.2f} ms/fichier, {total_bytes / best / 1024 / 1024:.1f} Mo/s)"
+            )
+
+        speedup = results['Bio.SeqIO'] / results['genbank.parse_genbank']
+        self.stdout.write(self.style.SUCCESS(f"Accélération : x{speedup:.2f} ({mismatches} différence(s))"))
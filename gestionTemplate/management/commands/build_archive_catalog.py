@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from gestionTemplate import catalog
+from gestionTemplate.models import ArchiveMember, Campaign, PlasmidCollection
+from users.models import Seqcollection
+
+
+class Command(BaseCommand):
+    help = "Construit le catalogue ArchiveMember des archives déjà présentes (campagnes, collections, équipes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing-only', action='store_true',
+                            help="Ne traiter que les archives absentes du catalogue.")
+
+    def _index(self, owner_field, obj, file_field, source, **kwargs):
+        if not file_field:
+            return 0
+        if self.missing_only and ArchiveMember.objects.filter(source=source, **{owner_field: obj}).exists():
+            return 0
+        members = catalog.index_archive(file_field.path, source, **kwargs, **{owner_field: obj})
+        return len(members)
+
+    def handle(self, *args, **options):
+        self.missing_only = options['missing_only']
+        total = 0
+        for camp in Campaign.objects.all():
+            total += self._index('campaign', camp, camp.plasmid_archive, ArchiveMember.SOURCE_ARCHIVE, name_from_locus=True)
+            total += self._index('campaign', camp, camp.result_file, ArchiveMember.SOURCE_RESULT, name_from_locus=True)
+        for collection in PlasmidCollection.objects.all():
+            total += self._index('collection', collection, collection.plasmid_archive, ArchiveMember.SOURCE_COLLECTION)
+        for seqcol in Seqcollection.objects.all():
+            total += self._index('team_collection', seqcol, seqcol.fichier, ArchiveMember.SOURCE_TEAM)
+        self.stdout.write(self.style.SUCCESS(f"{total} fichier(s) catalogué(s)."))
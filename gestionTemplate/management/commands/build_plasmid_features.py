@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from gestionTemplate import features
+from gestionTemplate.models import PlasmidFeature, Plasmide
+
+
+class Command(BaseCommand):
+    help = "Normalise les features des plasmides existants (PlasmidFeature, résumé des libellés, empreinte)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Nombre de plasmides traités par transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        for plasmide in Plasmide.objects.only('pk', 'name', 'features', 'feature_summary', 'feature_hash').iterator(chunk_size=batch_size):
+            batch.append(plasmide)
+            if len(batch) >= batch_size:
+                features.index_plasmides(batch)
+                batch = []
+        features.index_plasmides(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"{PlasmidFeature.objects.count()} feature(s) pour {Plasmide.objects.count()} plasmide(s)."
+        ))
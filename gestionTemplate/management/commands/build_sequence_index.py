@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from gestionTemplate import seqindex
+from gestionTemplate.models import ArchiveMember, ArchiveMemberKmer, Plasmide, SequenceKmer
+
+
+class Command(BaseCommand):
+    help = "Construit ou met à jour l'index k-mer des séquences de plasmides et du catalogue des archives."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Nombre de plasmides indexés par transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        indexed = 0
+        batch = []
+        for plasmide in Plasmide.objects.only('pk', 'sequence', 'sequence_index_hash').iterator(chunk_size=batch_size):
+            batch.append(plasmide)
+            if len(batch) >= batch_size:
+                indexed += seqindex.index_plasmides(batch)
+                batch = []
+        indexed += seqindex.index_plasmides(batch)
+
+        # Membres du catalogue des archives catalogués avant l'index
+        members = 0
+        pending = ArchiveMember.objects.filter(sequence_indexed=False).only('pk', 'sequence', 'sequence_indexed')
+        batch = []
+        for member in pending.iterator(chunk_size=batch_size):
+            batch.append(member)
+            if len(batch) >= batch_size:
+                members += seqindex.index_members(batch)
+                batch = []
+        members += seqindex.index_members(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"{indexed} plasmide(s) (ré)indexé(s), {SequenceKmer.objects.count()} k-mers dans l'index ; "
+            f"{members} membre(s) d'archives indexé(s), {ArchiveMemberKmer.objects.count()} k-mers."
+        ))
@@ -5,7 +5,8 @@ from django.core.management.base import BaseCommand
 from django.core.files import File
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
-from gestionTemplate.models import CorrespondanceTable, PlasmidCollection, Plasmide, CampaignTemplate, MappingTemplate
+from gestionTemplate.models import CorrespondanceTable, PlasmidCollection, Plasmide, CampaignTemplate, MappingTemplate, ArchiveMember
+from gestionTemplate import catalog, ingest
 
 User = get_user_model()
 
@@ -23,31 +24,14 @@ class Command(BaseCommand):
             return
 
         zip_source_path = os.path.join(data_path, zip_source_name)
-        liste_plasmides = []
 
-        with zipfile.ZipFile(zip_source_path, 'r') as archive:
-            gb_files = [f for f in archive.namelist() if f.endswith('.gb') and not f.startswith('__MACOSX')]
-            
-            for file_path_in_zip in gb_files:
-                # On extrait le nom de fichier pur (sans le chemin du dossier)
-                base_name = os.path.basename(file_path_in_zip)
-                
-                with archive.open(file_path_in_zip) as file_content:
-                    # Création du fichier temporaire pour le parser
-                    temp_path = os.path.join(data_path, "temp_parsing.gb")
-                    with open(temp_path, "wb") as f:
-                        f.write(file_content.read())
-                    
-                    plasmide = Plasmide.create_from_genbank(temp_path, dossier_nom="Import_ZIP")
-                    plasmide.user = admin_user
-                    # On force le nom si create_from_genbank utilise le nom du fichier temp
-                    plasmide.name = os.path.splitext(base_name)[0]
-                    plasmide.save()
-                    
-                    liste_plasmides.append(plasmide)
-                    os.remove(temp_path)
-                
-                self.stdout.write(f"  - Importé : {base_name}")
+        # Parsing de toute l'archive puis insertion en une transaction
+        records, errors = ingest.parse_archive(zip_source_path, dossier_nom="Import_ZIP")
+        for member, error in errors:
+            self.stdout.write(self.style.WARNING(f"  - Erreur {member} : {error}"))
+        liste_plasmides, created = ingest.ingest_records(records, user=admin_user)
+        for plasmide in liste_plasmides:
+            self.stdout.write(f"  - Importé : {plasmide.name}")
 
         # Création de la collection
         if liste_plasmides:
@@ -61,6 +45,7 @@ class Command(BaseCommand):
             
             collection.plasmides.set(liste_plasmides)
             collection.save()
+            catalog.index_records(records, errors, ArchiveMember.SOURCE_COLLECTION, collection=collection)
             self.stdout.write(self.style.SUCCESS(f"Collection '{collection_name}' créée !"))
 
         # --- 2. IMPORT DES TEMPLATES (.xlsx) ---
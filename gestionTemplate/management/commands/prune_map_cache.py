@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from gestionTemplate import map_cache
+
+
+class Command(BaseCommand):
+    help = "Supprime les cartes de plasmides les moins récemment servies au-delà de la taille maximale du cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-size-mb', type=int, default=None,
+                            help="Taille totale maximale du cache (défaut : settings).")
+
+    def handle(self, *args, **options):
+        max_bytes = options['max_size_mb'] * 1024 * 1024 if options['max_size_mb'] is not None else None
+        deleted = map_cache.evict(max_bytes=max_bytes)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} carte(s) supprimée(s)."))
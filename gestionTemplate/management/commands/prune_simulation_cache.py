@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from gestionTemplate.caching import evict
+from gestionTemplate.models import SimulationCacheEntry, CacheStat
+
+
+class Command(BaseCommand):
+    help = "Supprime les résultats de simulation en cache trop anciens ou en excès."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-days', type=int, default=None,
+                            help="Âge maximal depuis la dernière utilisation (défaut : settings).")
+        parser.add_argument('--max-size-mb', type=int, default=None,
+                            help="Taille totale maximale du cache (défaut : settings).")
+
+    def handle(self, *args, **options):
+        max_age = timedelta(days=options['max_age_days']) if options['max_age_days'] is not None else None
+        max_bytes = options['max_size_mb'] * 1024 * 1024 if options['max_size_mb'] is not None else None
+
+        deleted = evict(max_age=max_age, max_bytes=max_bytes)
+
+        total = SimulationCacheEntry.objects.aggregate(total=Sum('size'))['total'] or 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{deleted} entrée(s) supprimée(s). Cache : {SimulationCacheEntry.objects.count()} entrée(s), {total / 1024 / 1024:.1f} Mo."
+        ))
+        stat = CacheStat.objects.filter(name='simulation').first()
+        if stat:
+            self.stdout.write(f"Hits : {stat.hits} / Misses : {stat.misses}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from gestionTemplate import fulltext
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte (plasmides, templates, tables de correspondance)."
+
+    def handle(self, *args, **options):
+        if not fulltext.available():
+            self.stdout.write(self.style.WARNING("Index plein texte disponible uniquement avec SQLite."))
+            return
+        total = fulltext.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{total} objet(s) indexé(s)."))
@@ -0,0 +1,82 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from gestionTemplate import jobs
+
+
+def _init_worker():
+    # Processus lancé en 'spawn' : il faut initialiser Django
+    import django
+    django.setup()
+
+
+def _run_job(job_id):
+    try:
+        return jobs.run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ("Lance les workers qui exécutent les jobs en attente (simulations, cartes...). "
+            "Ex. : un pool dédié au rendu des cartes avec --kind maps.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'JOB_WORKERS', 2),
+                            help="Nombre de processus du pool.")
+        parser.add_argument('--kind', action='append', dest='kinds',
+                            help="Ne traiter que ce type de job (option répétable).")
+        parser.add_argument('--poll-interval', type=float, default=getattr(settings, 'JOB_POLL_INTERVAL', 2),
+                            help="Secondes entre deux consultations de la file.")
+        parser.add_argument('--once', action='store_true',
+                            help="Vide la file puis s'arrête.")
+
+    def handle(self, *args, **options):
+        nb_workers = max(1, options['workers'])
+        kinds = options['kinds']
+
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"{requeued} job(s) interrompu(s) remis en attente."))
+
+        self.stdout.write(f"--- {nb_workers} worker(s) démarré(s) ---")
+        # Les connexions ne doivent pas être partagées avec les processus du pool
+        connections.close_all()
+        running = {}
+
+        with ProcessPoolExecutor(max_workers=nb_workers,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker) as pool:
+            try:
+                while True:
+                    # Récupérer les jobs terminés
+                    for future in [f for f in running if f.done()]:
+                        job_id = running.pop(future)
+                        try:
+                            status = future.result()
+                            self.stdout.write(self.style.SUCCESS(f"Job {job_id} : {status}"))
+                        except Exception as e:
+                            self.stdout.write(self.style.ERROR(f"Job {job_id} : erreur worker {e}"))
+
+                    # Réserver de nouveaux jobs tant qu'il reste des processus libres
+                    claimed = False
+                    while len(running) < nb_workers:
+                        job = jobs.claim_next(kinds)
+                        if job is None:
+                            break
+                        claimed = True
+                        self.stdout.write(f"Job {job.id} ({job.kind}) lancé.")
+                        running[pool.submit(_run_job, job.id)] = job.id
+
+                    if options['once'] and not running and not claimed:
+                        break
+                    time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write("Arrêt demandé, attente des jobs en cours...")
+
+        self.stdout.write(self.style.SUCCESS("Workers arrêtés."))
@@ -0,0 +1,262 @@
+"""
+Cache disque des cartes de plasmides (linéaire et circulaire).
+
+Chaque carte est produite en une seule mise en page dans plusieurs tailles :
+vignette PNG, PNG écran et SVG (voir SIZES). Elle ne dépend que des features,
+de la longueur de la séquence, du nom affiché, de la version du rendu et des
+résolutions : la clé est l'empreinte de ces éléments (pour les membres
+d'archives, calculée au catalogage : ArchiveMember.map_key). Une page déjà vue ne
+coûte qu'un stat du fichier en cache ; au-delà de PLASMID_MAP_CACHE_MAX_BYTES,
+les cartes les moins récemment servies sont supprimées. Le parcours du cache
+n'a lieu que tous les PLASMID_MAP_EVICT_EVERY rendus d'un processus, ou par la
+commande prune_map_cache (tâche périodique).
+"""
+import hashlib
+import io
+import os
+import tempfile
+from collections import namedtuple
+
+from django.conf import settings
+from django.urls import reverse
+
+from . import features as plasmid_features
+from .genbank import parse_genbank, source_name
+from .plasmid_mapping import map_data, render_plasmid_maps
+
+# Incrémenter à chaque changement du rendu (couleurs, mise en page...) pour invalider le cache
+RENDERER_VERSION = 3
+KINDS = ('lineaire', 'circulaire')
+CACHE_SUBDIR = 'plasmid_maps'
+# Tailles produites par un même rendu (la vignette sert aux pages qui listent beaucoup de cartes)
+SIZES = ('thumb', 'screen', 'svg')
+# Fichier publié en dernier : sa présence signifie que toutes les tailles sont prêtes
+LAST_FILE = ('lineaire', 'svg')
+
+# Rendus effectués par ce processus depuis la dernière éviction
+_renders_since_evict = 0
+
+
+def cache_dir():
+    return os.path.join(settings.MEDIA_ROOT, CACHE_SUBDIR)
+
+
+def resolutions():
+    """Résolution (dpi) de chaque taille PNG ; le SVG est vectoriel."""
+    return {
+        'thumb': getattr(settings, 'PLASMID_MAP_THUMB_DPI', 30),
+        'screen': getattr(settings, 'PLASMID_MAP_SCREEN_DPI', 100),
+    }
+
+
+def filename(kind, size):
+    return f"{kind}_{size}.{'svg' if size == 'svg' else 'png'}"
+
+
+def map_path(key, kind, size='screen'):
+    return os.path.join(cache_dir(), key[:2], f"{key}_{filename(kind, size)}")
+
+
+def map_urls(key, kind):
+    """URL de chaque taille d'une carte : {'thumb': ..., 'screen': ..., 'svg': ...}."""
+    return {size: reverse("templates:plasmid_map", args=[key, filename(kind, size)]) for size in SIZES}
+
+
+def parse_filename(name):
+    """Nom de fichier d'URL -> (carte, taille), None s'il est inconnu."""
+    for kind in KINDS:
+        for size in SIZES:
+            if filename(kind, size) == name:
+                return kind, size
+    return None
+
+
+def display_name(name):
+    """Nom affiché dans le titre des cartes (sans le préfixe « p »)."""
+    return name[1:] if name.startswith("p") else name
+
+
+def map_key(content, name):
+    """content : octets identifiant le dessin (features et longueur)."""
+    dpis = sorted(resolutions().items())
+    h = hashlib.sha256(f"{RENDERER_VERSION}|{dpis}|{display_name(name)}|".encode("utf-8"))
+    h.update(content)
+    return h.hexdigest()
+
+
+class Maps(namedtuple("Maps", "key ready lineaire circulaire")):
+    """
+    Cartes d'un plasmide ; ready : fichiers présents dans le cache.
+    lineaire, circulaire : URL de chaque taille (voir map_urls).
+    """
+
+    @property
+    def linear(self):
+        return self.lineaire['screen']
+
+    @property
+    def circular(self):
+        return self.circulaire['screen']
+
+
+def _maps(key, ready):
+    return Maps(key, ready, *(map_urls(key, kind) for kind in KINDS))
+
+
+def is_ready(key):
+    return os.path.exists(map_path(key, *LAST_FILE))
+
+
+def features_key(length, digest, name):
+    """Clé d'une carte d'après la longueur et l'empreinte des features (features.feature_hash)."""
+    return map_key(f"{length or 0}|{digest}".encode("ascii"), name)
+
+
+def plasmide_key(plasmide):
+    if not plasmide.feature_hash:
+        # Plasmide antérieur à la normalisation des features
+        plasmid_features.index_plasmides([plasmide])
+    return features_key(plasmide.length, plasmide.feature_hash, plasmide.name)
+
+
+def plasmide_maps(plasmide, render=True):
+    """
+    Cartes d'un Plasmide, dessinées depuis ses PlasmidFeature si elles ne sont
+    pas en cache (render=False : seulement leur état, voir map_render).
+    """
+    key = plasmide_key(plasmide)
+    ready = is_ready(key)
+    if not ready and render:
+        rows = plasmid_features.as_dicts(plasmide.feature_set.all())
+        _render(key, plasmide.length or 0, rows, plasmide.name)
+        ready = True
+    return _maps(key, ready)
+
+
+def member_name(member):
+    """Nom affiché d'un membre .gb d'archive (celui utilisé par les pages de campagne)."""
+    return os.path.basename(member).replace('.gb', '')
+
+
+def record_key(record, name):
+    """Clé d'un enregistrement GenBank hors banque : même empreinte que les features d'un Plasmide."""
+    return features_key(record.get("length"), plasmid_features.feature_hash(record["features"]), name)
+
+
+def record_data(record, name):
+    """Données de carte d'un enregistrement GenBank hors banque, pour le rendu dans le navigateur."""
+    return map_data(display_name(name), record.get("length") or 0, record.get("topology", "circular"),
+                    record["features"])
+
+
+def cached_maps(key):
+    """Cartes d'une clé connue (ArchiveMember.map_key), sans rendu."""
+    return _maps(key, is_ready(key))
+
+
+def plasmid_maps(source, name=None, render=True):
+    """
+    Cartes d'un fichier GenBank hors banque (membre d'archive de campagne),
+    chemin ou contenu en octets.
+    name : nom du plasmide, celui du fichier par défaut.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    else:
+        name = name or source_name(source)
+        with open(source, "rb") as fh:
+            data = fh.read()
+    name = name or ""
+    record = parse_genbank(io.BytesIO(data))
+    key = record_key(record, name)
+    ready = is_ready(key)
+    if not ready and render:
+        _render(key, record.get("length") or 0, record["features"], name)
+        ready = True
+    return _maps(key, ready)
+
+
+def pending_path(key):
+    return os.path.join(cache_dir(), key[:2], f"{key}.pending")
+
+
+def _render(key, length, features, name):
+    directory = os.path.dirname(map_path(key, *LAST_FILE))
+    os.makedirs(directory, exist_ok=True)
+    dpis = resolutions()
+    # Écriture dans des fichiers temporaires puis renommage : pas de carte partielle servie
+    temp = {}
+    try:
+        outputs = {kind: [] for kind in KINDS}
+        for kind in KINDS:
+            for size in SIZES:
+                fd, temp[kind, size] = tempfile.mkstemp(suffix=".tmp", dir=directory)
+                os.close(fd)
+                fmt = 'svg' if size == 'svg' else 'png'
+                outputs[kind].append((temp[kind, size], fmt, dpis.get(size)))
+        render_plasmid_maps(length, features, display_name(name), outputs)
+        for kind, size in sorted(temp, key=lambda item: item == LAST_FILE):
+            os.replace(temp[kind, size], map_path(key, kind, size))
+    finally:
+        for path in list(temp.values()) + [pending_path(key)]:
+            if os.path.exists(path):
+                os.remove(path)
+    _count_render()
+
+
+def _count_render():
+    """Lance l'éviction tous les PLASMID_MAP_EVICT_EVERY rendus (0 : seulement par prune_map_cache)."""
+    global _renders_since_evict
+    every = getattr(settings, "PLASMID_MAP_EVICT_EVERY", 100)
+    if not every:
+        return
+    _renders_since_evict += 1
+    if _renders_since_evict >= every:
+        _renders_since_evict = 0
+        evict()
+
+
+def touch(key):
+    """Marque les cartes comme servies (date de modification utilisée pour l'éviction LRU)."""
+    try:
+        os.utime(map_path(key, *LAST_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def evict(max_bytes=None):
+    """
+    Supprime les cartes les moins récemment servies tant que la taille du
+    cache dépasse max_bytes. Retourne le nombre de plasmides supprimés.
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, "PLASMID_MAP_CACHE_MAX_BYTES", 512 * 1024 ** 2)
+
+    entries = {}  # clé -> [taille, dernier usage, chemins]
+    for root, dirs, files in os.walk(cache_dir()):
+        for name in files:
+            if not name.endswith((".png", ".svg")):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entry = entries.setdefault(name.split("_", 1)[0], [0, 0, []])
+            entry[0] += stat.st_size
+            entry[1] = max(entry[1], stat.st_mtime)
+            entry[2].append(path)
+
+    total = sum(size for size, used, paths in entries.values())
+    deleted = 0
+    for size, used, paths in sorted(entries.values(), key=lambda entry: entry[1]):
+        if total <= max_bytes:
+            break
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+        deleted += 1
+    return deleted
@@ -0,0 +1,109 @@
+"""
+Pré-rendu des cartes de plasmides par les workers (jobs de type 'maps').
+
+Les pages dessinent les cartes dans le navigateur (static/js/plasmid_map.js) ;
+les fichiers PNG / SVG servent au téléchargement et aux navigateurs sans
+JavaScript. pyplot n'est pas thread-safe et un rendu bloque la requête : ces
+fichiers sont dessinés dans les processus de run_workers (backend Agg ; pool
+dédié avec ``run_workers --kind maps``), dès l'import des plasmides. Une page
+dont les fichiers manquent met un job en file.
+"""
+import os
+import time
+import zipfile
+
+from django.conf import settings
+
+from . import jobs, map_cache
+from .map_cache import member_name
+from .models import ArchiveMember, BackgroundJob, Campaign, Plasmide
+
+# Nombre de plasmides par job de rendu
+BATCH_SIZE = 50
+
+
+def enqueue_plasmides(plasmides):
+    ids = [p.pk for p in plasmides]
+    return [
+        jobs.enqueue(BackgroundJob.KIND_MAPS, {'plasmides': ids[i:i + BATCH_SIZE]})
+        for i in range(0, len(ids), BATCH_SIZE)
+    ]
+
+
+def enqueue_archive(campaign, field):
+    """Cartes des .gb d'une archive de campagne (field : 'plasmid_archive' ou 'result_file')."""
+    return jobs.enqueue(BackgroundJob.KIND_MAPS, {'campaign': campaign.pk, 'archive': field})
+
+
+def _claim(key):
+    """Marque la carte comme demandée ; False si un job récent doit déjà la produire."""
+    path = map_cache.pending_path(key)
+    try:
+        if time.time() - os.path.getmtime(path) < getattr(settings, 'JOB_STALE_AFTER', 3600):
+            return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w'):
+        pass
+    return True
+
+
+def plasmide_maps(plasmide):
+    """Cartes d'un Plasmide pour une page : jamais dessinées dans la requête, mises en file si absentes."""
+    maps = map_cache.plasmide_maps(plasmide, render=False)
+    if not maps.ready and _claim(maps.key):
+        enqueue_plasmides([plasmide])
+    return maps
+
+
+def archive_maps(campaign, field, source, plasmid_name=None):
+    """
+    Cartes des .gb d'une archive de campagne (field : 'plasmid_archive' ou
+    'result_file' ; source : ArchiveMember.SOURCE_ARCHIVE ou SOURCE_RESULT),
+    lues dans le catalogue sans ouvrir l'archive : [(nom affiché, Maps, données
+    de la carte)]. Les membres catalogués avant le calcul des cartes sont
+    recatalogués au premier accès ; un job de rendu de l'archive est mis en file
+    s'il manque des fichiers.
+    """
+    from . import catalog  # catalog -> ingest -> map_render
+    members = ArchiveMember.objects.filter(campaign=campaign, source=source, error='')
+    archive = getattr(campaign, field)
+    if archive and (not members.exists() or members.filter(map_key='').exists()):
+        catalog.index_archive(archive.path, source, name_from_locus=True, campaign=campaign)
+    result = []
+    for member in members.only('member_path', 'map_key', 'map_data'):
+        name = member_name(member.member_path)
+        if not member.member_path.lower().endswith('.gb') or (plasmid_name and name != plasmid_name):
+            continue
+        result.append((name, map_cache.cached_maps(member.map_key), member.map_data))
+    claimed = [_claim(maps.key) for name, maps, data in result if not maps.ready]
+    if any(claimed):
+        enqueue_archive(campaign, field)
+    return result
+
+
+def run_map_job(job):
+    """Dessine les cartes manquantes des plasmides ou de l'archive du payload."""
+    payload = job.payload
+    errors = []
+    if 'plasmides' in payload:
+        for plasmide in Plasmide.objects.listing().filter(pk__in=payload['plasmides']):
+            try:
+                map_cache.plasmide_maps(plasmide)
+            except Exception as e:
+                errors.append(f"{plasmide.name} : {e}")
+    else:
+        campaign = Campaign.objects.get(pk=payload['campaign'])
+        archive = getattr(campaign, payload['archive'])
+        if archive:
+            with zipfile.ZipFile(archive.path) as zf:
+                for member in zf.namelist():
+                    if not member.lower().endswith('.gb'):
+                        continue
+                    try:
+                        map_cache.plasmid_maps(zf.read(member), name=member_name(member))
+                    except Exception as e:
+                        errors.append(f"{member} : {e}")
+    if errors:
+        raise Exception("Cartes non générées : " + " ; ".join(errors))
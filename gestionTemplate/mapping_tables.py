@@ -0,0 +1,127 @@
+"""
+Aperçu des fichiers de correspondance (CorrespondanceTable.mapping).
+
+Le fichier CSV/Excel d'un MappingTemplate est lu une seule fois, à l'upload
+(signal post_save), et ses premières lignes sont enregistrées avec le nombre
+total de lignes dans la CorrespondanceTable associée. La liste des tables
+affiche cet aperçu sans relire les fichiers ; il est recalculé quand le
+contenu du fichier change (empreinte SHA-256, MappingTemplate.file_hash).
+Les simulations utilisent toujours le fichier d'origine.
+"""
+import datetime
+import hashlib
+import math
+import numbers
+
+import pandas as pd
+from django.conf import settings
+
+from .models import CorrespondanceTable, MappingTemplate
+
+# Nombre de lignes conservées pour l'aperçu (MAPPING_PREVIEW_ROWS)
+DEFAULT_PREVIEW_ROWS = 20
+
+
+def preview_rows():
+    return getattr(settings, 'MAPPING_PREVIEW_ROWS', DEFAULT_PREVIEW_ROWS)
+
+
+def file_hash(field_file):
+    digest = hashlib.sha256()
+    with field_file.open('rb') as fh:
+        for chunk in fh.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def json_value(value):
+    """Valeur d'une cellule en type JSON (cellules vides : '')."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def read(path):
+    """DataFrame d'un fichier de correspondance (CSV séparé par des ';' ou Excel)."""
+    if path.lower().endswith('.csv'):
+        return pd.read_csv(path, sep=';')
+    return pd.read_excel(path)
+
+
+def parse(mapping_template):
+    """Colonnes, premières lignes et nombre de lignes du fichier ; vide si illisible."""
+    mapping = {'source': mapping_template.mapping_file.name or '', 'file_hash': mapping_template.file_hash,
+               'columns': [], 'preview': [], 'row_count': 0}
+    if not mapping_template.mapping_file:
+        return mapping
+    try:
+        df = read(mapping_template.mapping_file.path)
+    except Exception as e:
+        mapping['error'] = str(e)
+        return mapping
+    mapping['columns'] = [json_value(c) for c in df.columns]
+    mapping['preview'] = [[json_value(v) for v in row] for row in df.head(preview_rows()).itertuples(index=False)]
+    mapping['row_count'] = len(df)
+    return mapping
+
+
+def is_current(table, mapping_template):
+    return table is not None and table.mapping.get('file_hash') == mapping_template.file_hash
+
+
+def update_hash(mapping_template):
+    """Met à jour l'empreinte du fichier (sans nouveau post_save)."""
+    digest = file_hash(mapping_template.mapping_file) if mapping_template.mapping_file else ''
+    if digest != mapping_template.file_hash:
+        MappingTemplate.objects.filter(pk=mapping_template.pk).update(file_hash=digest)
+        mapping_template.file_hash = digest
+
+
+def store(mapping_template, rehash=True):
+    """
+    Crée ou met à jour la CorrespondanceTable du fichier ; ne relit le fichier
+    que si son contenu a changé. rehash=False : fichier inchangé, l'empreinte
+    enregistrée n'est pas recalculée (sauf si elle manque).
+    """
+    if rehash or (mapping_template.mapping_file and not mapping_template.file_hash):
+        update_hash(mapping_template)
+    table = CorrespondanceTable.objects.filter(mapping_template=mapping_template).first()
+    fields = {
+        'name': mapping_template.name[:100],
+        'description': mapping_template.description,
+        'is_public': mapping_template.is_public,
+        'uploaded_by_id': mapping_template.user_id,
+    }
+    if table is None:
+        table = CorrespondanceTable(mapping_template=mapping_template)
+    elif is_current(table, mapping_template) and all(getattr(table, k) == v for k, v in fields.items()):
+        return table
+    if not is_current(table, mapping_template):
+        table.mapping = parse(mapping_template)
+    for key, value in fields.items():
+        setattr(table, key, value)
+    table.save()
+    mapping_template.correspondance_table = table
+    return table
+
+
+def preview(mapping_template):
+    """
+    Aperçu d'une table pour la liste (avec select_related('correspondance_table')) ;
+    calculé au premier accès pour les fichiers importés avant l'aperçu ou l'empreinte.
+    """
+    try:
+        table = mapping_template.correspondance_table
+    except CorrespondanceTable.DoesNotExist:
+        table = None
+    if not is_current(table, mapping_template):
+        table = store(mapping_template)
+    return table.mapping
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0015_simulation_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('path', models.CharField(max_length=500)),
+                ('size', models.BigIntegerField(default=0)),
+                ('file_count', models.PositiveIntegerField(default=0)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0016_extracted_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0017_campaign_timings'),
+        ('users', '0003_seqcollection_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('archive', 'Archive de campagne'), ('result', 'Résultat de campagne'), ('collection', 'Collection'), ('team', "Collection d'équipe")], max_length=16)),
+                ('member_path', models.CharField(max_length=500)),
+                ('name', models.CharField(db_index=True, max_length=255)),
+                ('organism', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('length', models.IntegerField(blank=True, null=True)),
+                ('feature_labels', models.TextField(blank=True)),
+                ('sequence_hash', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('sequence', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('campaign', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archive_members', to='gestionTemplate.campaign')),
+                ('collection', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archive_members', to='gestionTemplate.plasmidcollection')),
+                ('team_collection', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archive_members', to='users.seqcollection')),
+            ],
+            options={
+                'ordering': ['member_path'],
+                'indexes': [models.Index(fields=['campaign', 'source'], name='gestionTemp_campaig_a46017_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0018_archive_member'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plasmide',
+            name='sequence_index_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='SequenceKmer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kmer', models.BigIntegerField()),
+                ('plasmide', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kmers', to='gestionTemplate.plasmide')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kmer', 'plasmide'], name='gestionTemp_kmer_679090_idx')],
+            },
+        ),
+    ]
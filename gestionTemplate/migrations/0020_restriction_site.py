@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def reset_sequence_index(apps, schema_editor):
+    # Les plasmides déjà indexés n'ont pas encore de sites : build_sequence_index refera les deux
+    apps.get_model('gestionTemplate', 'SequenceKmer').objects.all().delete()
+    apps.get_model('gestionTemplate', 'Plasmide').objects.update(sequence_index_hash='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0019_sequence_kmer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestrictionSite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enzyme', models.CharField(choices=[('BsaI', 'BsaI'), ('BsmBI', 'BsmBI'), ('BbsI', 'BbsI'), ('SapI', 'SapI')], max_length=10)),
+                ('position', models.IntegerField()),
+                ('strand', models.SmallIntegerField()),
+                ('overhang', models.CharField(blank=True, max_length=8)),
+                ('plasmide', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='restriction_sites', to='gestionTemplate.plasmide')),
+            ],
+            options={
+                'ordering': ['plasmide', 'enzyme', 'position'],
+                'indexes': [models.Index(fields=['enzyme', 'plasmide'], name='gestionTemp_enzyme_9db251_idx')],
+            },
+        ),
+        migrations.RunPython(reset_sequence_index, migrations.RunPython.noop),
+    ]
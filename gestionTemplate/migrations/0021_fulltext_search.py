@@ -0,0 +1,65 @@
+import re
+
+from django.db import migrations
+
+# Copie figée de gestionTemplate.fulltext au moment de la migration : la
+# migration ne dépend pas du code de l'application.
+TABLE = 'gestiontemplate_search'
+COLUMNS = ('name', 'description', 'organism', 'keywords', 'definition', 'features')
+KINDS = ('plasmide', 'template', 'mapping')
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    + ", ".join(COLUMNS)
+    + ", tokenize='trigram')"
+)
+INSERT_SQL = (
+    f"INSERT OR REPLACE INTO {TABLE}(rowid, {', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join(['%s'] * (len(COLUMNS) + 1))})"
+)
+
+_QUALIFIER = re.compile(r'/(?:label|gene|product|note)="?([^"\n]+)')
+
+
+def feature_text(features):
+    raw = features.get('raw', '') if isinstance(features, dict) else ''
+    values = []
+    for value in _QUALIFIER.findall(str(raw)):
+        value = value.strip()
+        if value and value not in values:
+            values.append(value)
+    return ' '.join(values)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    for kind, model_name in (('plasmide', 'Plasmide'), ('template', 'CampaignTemplate'), ('mapping', 'MappingTemplate')):
+        model = apps.get_model('gestionTemplate', model_name)
+        rows = []
+        for obj in model.objects.all().iterator():
+            if kind == 'plasmide':
+                document = (obj.name, obj.description, obj.organism, obj.keywords, obj.genbank_definition,
+                            feature_text(obj.features))
+            else:
+                document = (obj.name, obj.description, '', '', '', '')
+            rows.append((obj.pk * len(KINDS) + KINDS.index(kind), *document))
+        if rows:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(INSERT_SQL, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0020_restriction_site'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
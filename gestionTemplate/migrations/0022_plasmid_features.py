@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0021_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plasmide',
+            name='feature_summary',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Features'),
+        ),
+        migrations.CreateModel(
+            name='PlasmidFeature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(blank=True, max_length=50)),
+                ('start', models.IntegerField(blank=True, null=True)),
+                ('end', models.IntegerField(blank=True, null=True)),
+                ('strand', models.SmallIntegerField(default=1)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('qualifiers', models.JSONField(default=dict)),
+                ('plasmide', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feature_set', to='gestionTemplate.plasmide')),
+            ],
+            options={
+                'ordering': ['plasmide', 'start', 'pk'],
+                'indexes': [models.Index(fields=['plasmide', 'start'], name='gestionTemp_plasmid_52b479_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0022_plasmid_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plasmide',
+            name='feature_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
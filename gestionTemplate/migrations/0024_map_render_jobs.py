@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0023_plasmide_feature_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='kind',
+            field=models.CharField(choices=[('simulation', 'Simulation'), ('maps', 'Cartes de plasmides')], default='simulation', max_length=32),
+        ),
+    ]
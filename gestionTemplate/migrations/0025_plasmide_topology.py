@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0024_map_render_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plasmide',
+            name='topology',
+            field=models.CharField(default='circular', max_length=10, verbose_name='Topologie'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0025_plasmide_topology'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='result_manifest',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
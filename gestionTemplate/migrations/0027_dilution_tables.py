@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0026_campaign_result_manifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DilutionTable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dilution_type', models.CharField(max_length=16)),
+                ('member_path', models.CharField(max_length=500)),
+                ('columns', models.JSONField(default=list)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dilution_tables', to='gestionTemplate.campaign')),
+            ],
+            options={
+                'ordering': ['pk'],
+                'unique_together': {('campaign', 'dilution_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DilutionRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('plasmid_id', models.CharField(blank=True, max_length=255)),
+                ('values', models.JSONField(default=dict)),
+                ('table', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='gestionTemplate.dilutiontable')),
+            ],
+            options={
+                'ordering': ['table', 'position'],
+                'indexes': [models.Index(fields=['table', 'position'], name='gestionTemp_table_i_23a369_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0027_dilution_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemplatePreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, unique=True)),
+                ('columns', models.JSONField(default=list)),
+                ('rows', models.JSONField(default=list)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('enzyme', models.CharField(blank=True, max_length=50)),
+                ('project_name', models.CharField(blank=True, max_length=200)),
+                ('output_separator', models.CharField(blank=True, max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='campaigntemplate',
+            name='file_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+    ]
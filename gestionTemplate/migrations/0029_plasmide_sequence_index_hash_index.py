@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0028_template_previews'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plasmide',
+            name='sequence_index_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+    ]
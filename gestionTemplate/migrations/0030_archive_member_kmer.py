@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0029_plasmide_sequence_index_hash_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivemember',
+            name='sequence_indexed',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ArchiveMemberKmer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kmer', models.BigIntegerField()),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kmers', to='gestionTemplate.archivemember')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kmer', 'member'], name='gestionTemp_kmer_fe9b74_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0030_archive_member_kmer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivemember',
+            name='map_data',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='archivemember',
+            name='map_key',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestionTemplate', '0031_archive_member_map'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mappingtemplate',
+            name='file_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -3,6 +3,7 @@ import re
 from django.db import models
 from django.conf import settings
 from django.db.models import Q
+from django.utils import timezone
 
 class CampaignTemplate(models.Model):
     class EnzymeChoices(models.TextChoices):
@@ -27,6 +28,8 @@ class CampaignTemplate(models.Model):
     isPublic = models.BooleanField(default=False)
     # Fichier template associé (optionnel) — sera utilisé pour les templates publiés
     template_file = models.FileField(upload_to='simulations/templates/', null=True, blank=True)
+    # Empreinte SHA-256 du fichier : clé de son aperçu (TemplatePreview)
+    file_hash = models.CharField(max_length=64, blank=True, editable=False, db_index=True)
 
     def __str__(self):
         return self.name
@@ -44,6 +47,25 @@ class CampaignTemplate(models.Model):
         return filename
     
 
+class TemplatePreview(models.Model):
+    """
+    Aperçu d'un fichier de template (voir template_previews.py), calculé à l'upload
+    et partagé par les templates au même contenu (copies, publications).
+    """
+    file_hash = models.CharField(max_length=64, unique=True)
+    columns = models.JSONField(default=list)
+    rows = models.JSONField(default=list)
+    row_count = models.PositiveIntegerField(default=0)
+    # Métadonnées de l'en-tête du fichier
+    enzyme = models.CharField(max_length=50, blank=True)
+    project_name = models.CharField(max_length=200, blank=True)
+    output_separator = models.CharField(max_length=10, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.file_hash[:12]} ({self.row_count} lignes)"
+
+
 class ColumnTemplate(models.Model):
     template = models.ForeignKey(CampaignTemplate, on_delete=models.CASCADE, related_name='columns')
     part_names = models.CharField(max_length=100)
@@ -85,6 +107,8 @@ class MappingTemplate(models.Model):
     description = models.TextField("Description", blank=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mapping_templates')
     mapping_file = models.FileField(upload_to='user_mapping_templates/', help_text="Fichier CSV/Excel original de correspondance")
+    # Empreinte SHA-256 du fichier (clé de l'aperçu, voir mapping_tables.py)
+    file_hash = models.CharField(max_length=64, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_public = models.BooleanField("Public ?", default=False)
@@ -92,7 +116,16 @@ class MappingTemplate(models.Model):
     def __str__(self):
         return f"{self.name} ({self.user.username})"
 
+class PlasmideQuerySet(models.QuerySet):
+    def listing(self):
+        """Projection légère pour les listes : ni la séquence ni les features brutes."""
+        return self.defer(*Plasmide.HEAVY_FIELDS)
+
+
 class Plasmide(models.Model):
+    # Colonnes volumineuses, chargées seulement à la demande (voir PlasmideQuerySet.listing)
+    HEAVY_FIELDS = ('sequence', 'features')
+
     name = models.CharField("Nom du plasmide", max_length=100)
     description = models.TextField("Description", blank=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
@@ -110,9 +143,19 @@ class Plasmide(models.Model):
     reference_journal = models.TextField("Journal / Citation", blank=True)
 
     length = models.IntegerField("Longueur (bp)", null=True, blank=True)
+    topology = models.CharField("Topologie", max_length=10, default="circular")
     sequence = models.TextField("Séquence (nt)", blank=True)
     features = models.JSONField("Features (brut)", null=True, blank=True)
+    # Libellés des premières features, affichés dans les listes (voir features.py)
+    feature_summary = models.CharField("Features", max_length=255, blank=True)
+    # Empreinte des features normalisées, utilisée comme clé du cache des cartes
+    feature_hash = models.CharField(max_length=64, blank=True, editable=False)
     gc_content = models.FloatField("GC (%)", null=True, blank=True)
+    # Empreinte de la séquence au moment de son indexation k-mer (vide : pas encore indexée).
+    # Indexée : les recherches retrouvent les plasmides non indexés sans parcourir la table
+    sequence_index_hash = models.CharField(max_length=64, blank=True, editable=False, db_index=True)
+
+    objects = PlasmideQuerySet.as_manager()
 
     class Meta:
         unique_together = ('name', 'dossier')  # empêche doublons dans le même dossier
@@ -121,78 +164,24 @@ class Plasmide(models.Model):
         return self.name
 
     @classmethod
-    def create_from_genbank(cls, filepath, dossier_nom=None):
+    def create_from_genbank(cls, source, dossier_nom=None, name=None):
         """
         Parse un fichier GenBank et crée ou récupère un Plasmide.
+        source : chemin ou objet fichier (upload, membre d'archive zip...).
         Retourne l'objet Plasmide.
         """
-        import os
-        name = os.path.splitext(os.path.basename(filepath))[0]
+        from .genbank import parse_genbank, source_name
+        name = name or source_name(source)
 
         # Vérifier si le plasmide existe déjà
-        existing = cls.objects.filter(name=name, dossier=dossier_nom).first()
-        if existing:
-            return existing
-
-        # Lecture du fichier GenBank
-        with open(filepath, 'r', encoding='utf-8') as fh:
-            lines = [l.rstrip('\n') for l in fh]
-
-        fields = {}
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            if line.startswith('LOCUS'):
-                m_len = re.search(r'(\d+)\s+bp', line)
-                if m_len:
-                    fields['length'] = int(m_len.group(1))
-                m_mol = re.search(r'\d+\s+bp\s+([^\s]+)', line)
-                if m_mol:
-                    fields['mol_type'] = m_mol.group(1)
-            elif line.startswith('DEFINITION'):
-                val = line[len('DEFINITION'):].strip()
-                j = i + 1
-                while j < len(lines) and lines[j].startswith(' '):
-                    cont = lines[j].strip()
-                    if re.match(r'^[A-Z]+', cont) and cont.split()[0] in ('ACCESSION','VERSION','KEYWORDS','SOURCE','REFERENCE','FEATURES','ORIGIN','LOCUS','DEFINITION'):
-                        break
-                    val += ' ' + cont
-                    j += 1
-                fields['definition'] = val
-                i = j - 1
-            elif line.startswith('ACCESSION'):
-                fields['accession'] = line[len('ACCESSION'):].strip()
-            elif line.startswith('VERSION'):
-                fields['version'] = line[len('VERSION'):].strip()
-            elif line.startswith('KEYWORDS'):
-                kw = line[len('KEYWORDS'):].strip()
-                fields['keywords'] = kw.rstrip('.')
-            elif line.lstrip().startswith('ORGANISM'):
-                fields['organism'] = line.strip().split(None,1)[1] if len(line.strip().split(None,1))>1 else ''
-            elif line.startswith('FEATURES'):
-                feat_lines = []
-                j = i + 1
-                while j < len(lines) and not lines[j].startswith('ORIGIN'):
-                    feat_lines.append(lines[j])
-                    j += 1
-                fields['features_raw'] = '\n'.join(feat_lines).strip()
-                i = j - 1
-            elif line.startswith('ORIGIN'):
-                seq_parts = []
-                j = i + 1
-                while j < len(lines) and not lines[j].startswith('//'):
-                    seq_line = re.sub(r'[^acgtACGT]', '', lines[j])
-                    if seq_line:
-                        seq_parts.append(seq_line)
-                    j += 1
-                seq = ''.join(seq_parts).upper()
-                fields['sequence'] = seq
-                fields['length'] = len(seq) if seq else fields.get('length')
-                if seq:
-                    gc = (seq.count('G') + seq.count('C')) / len(seq) * 100
-                    fields['gc_content'] = round(gc, 2)
-                i = j
-            i += 1
+        if name:
+            existing = cls.objects.filter(name=name, dossier=dossier_nom).first()
+            if existing:
+                return existing
+
+        # Lecture du fichier GenBank en une seule passe
+        fields = parse_genbank(source)
+        name = name or fields.get('name', '')
 
         # Création du plasmide
         plasmide = cls.objects.create(
@@ -206,6 +195,7 @@ class Plasmide(models.Model):
             mol_type=fields.get('mol_type',''),
             keywords=fields.get('keywords',''),
             length=fields.get('length'),
+            topology=fields.get('topology','circular'),
             sequence=fields.get('sequence',''),
             features={'raw': fields.get('features_raw','')},
             gc_content=fields.get('gc_content')
@@ -258,11 +248,232 @@ class Campaign(models.Model):
     # résultat / statut
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
     result_file = models.FileField(upload_to='simulations/results/', null=True, blank=True)
+    # Membres de result_file (catégorie, plasmide, taille, CRC, position), voir result_manifest.py
+    result_manifest = models.JSONField(default=list, blank=True, editable=False)
     error_message = models.TextField(null=True, blank=True)
+    # Empreinte des entrées normalisées (voir caching.simulation_cache_key)
+    cache_key = models.CharField(max_length=64, blank=True, db_index=True)
+    # Durée (secondes) de chaque étape de la simulation (voir timing.py)
+    timings = models.JSONField(blank=True, default=dict)
 
     def __str__(self):
         return f"{self.name} ({self.pk})"
 
+
+class BackgroundJob(models.Model):
+    """File d'attente des traitements longs, exécutés par la commande run_workers."""
+    KIND_SIMULATION = 'simulation'
+    KIND_MAPS = 'maps'
+    KIND_CHOICES = [
+        (KIND_SIMULATION, 'Simulation'),
+        (KIND_MAPS, 'Cartes de plasmides'),
+    ]
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES, default=KIND_SIMULATION)
+    status = models.CharField(max_length=16, choices=Campaign.STATUS_CHOICES, default=Campaign.STATUS_PENDING)
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    # Utilisateur anonyme : le job est rattaché à sa session
+    session_key = models.CharField(max_length=40, blank=True)
+
+    # Paramètres du traitement (chemins absolus, options...)
+    payload = models.JSONField(blank=True, default=dict)
+    result_path = models.CharField(max_length=500, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker_pid = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'kind', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.kind}, {self.status})"
+
+class SimulationCacheEntry(models.Model):
+    """Archive de résultats réutilisable pour des entrées de simulation identiques."""
+    key = models.CharField(max_length=64, unique=True)
+    result_file = models.FileField(upload_to='simulations/cache/')
+    size = models.BigIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.key[:12]} ({self.hits} hits)"
+
+
+class CacheStat(models.Model):
+    """Compteurs de succès / échecs d'un cache (partagés entre les workers)."""
+    name = models.CharField(max_length=50, unique=True)
+    hits = models.PositiveBigIntegerField(default=0)
+    misses = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} : {self.hits} hits / {self.misses} misses"
+
+class ExtractedArchive(models.Model):
+    """Archive de plasmides déjà extraite sur disque, identifiée par l'empreinte de son contenu."""
+    digest = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=500)
+    size = models.BigIntegerField(default=0)
+    file_count = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.file_count} fichiers)"
+
+class SequenceKmer(models.Model):
+    """
+    Index inversé des séquences : k-mers (codés sur 2 bits par base) relevés
+    toutes les seqindex.STEP positions de la séquence circulaire d'un plasmide.
+    """
+    plasmide = models.ForeignKey(Plasmide, on_delete=models.CASCADE, related_name='kmers')
+    kmer = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kmer', 'plasmide']),
+        ]
+
+
+class PlasmidFeature(models.Model):
+    """Feature GenBank d'un plasmide, normalisée à l'import (voir features.py)."""
+    plasmide = models.ForeignKey(Plasmide, on_delete=models.CASCADE, related_name='feature_set')
+    type = models.CharField(max_length=50, blank=True)
+    # Coordonnées 0-based, fin exclue (vides pour les anciennes features sans localisation)
+    start = models.IntegerField(null=True, blank=True)
+    end = models.IntegerField(null=True, blank=True)
+    strand = models.SmallIntegerField(default=1)
+    label = models.CharField(max_length=255, blank=True)
+    qualifiers = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['plasmide', 'start', 'pk']
+        indexes = [
+            models.Index(fields=['plasmide', 'start']),
+        ]
+
+    def __str__(self):
+        return f"{self.type} {self.label}".strip()
+
+
+class RestrictionSite(models.Model):
+    """Site de restriction d'une enzyme Golden Gate dans un plasmide (voir sites.py)."""
+    plasmide = models.ForeignKey(Plasmide, on_delete=models.CASCADE, related_name='restriction_sites')
+    enzyme = models.CharField(max_length=10, choices=CampaignTemplate.EnzymeChoices.choices)
+    # Début du site de reconnaissance sur le brin direct (0-based)
+    position = models.IntegerField()
+    strand = models.SmallIntegerField()
+    overhang = models.CharField(max_length=8, blank=True)
+
+    class Meta:
+        ordering = ['plasmide', 'enzyme', 'position']
+        indexes = [
+            models.Index(fields=['enzyme', 'plasmide']),
+        ]
+
+    def __str__(self):
+        return f"{self.enzyme} {self.position} ({'+' if self.strand > 0 else '-'})"
+
+
+class ArchiveMember(models.Model):
+    """
+    Catalogue des plasmides contenus dans les archives (campagnes, résultats,
+    collections personnelles et d'équipe), rempli une fois à l'upload ou à la
+    production du résultat : la recherche privée n'ouvre plus les zip.
+    """
+    SOURCE_ARCHIVE = 'archive'
+    SOURCE_RESULT = 'result'
+    SOURCE_COLLECTION = 'collection'
+    SOURCE_TEAM = 'team'
+    SOURCE_CHOICES = [
+        (SOURCE_ARCHIVE, 'Archive de campagne'),
+        (SOURCE_RESULT, 'Résultat de campagne'),
+        (SOURCE_COLLECTION, 'Collection'),
+        (SOURCE_TEAM, "Collection d'équipe"),
+    ]
+
+    source = models.CharField(max_length=16, choices=SOURCE_CHOICES)
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, null=True, blank=True, related_name='archive_members')
+    collection = models.ForeignKey(PlasmidCollection, on_delete=models.CASCADE, null=True, blank=True, related_name='archive_members')
+    team_collection = models.ForeignKey('users.Seqcollection', on_delete=models.CASCADE, null=True, blank=True, related_name='archive_members')
+
+    member_path = models.CharField(max_length=500)
+    name = models.CharField(max_length=255, db_index=True)
+    organism = models.CharField(max_length=255, blank=True, db_index=True)
+    length = models.IntegerField(null=True, blank=True)
+    # Libellés des features (gene, label), un par ligne
+    feature_labels = models.TextField(blank=True)
+    sequence_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    sequence = models.TextField(blank=True)
+    # K-mers de la séquence dans ArchiveMemberKmer (faux : membre catalogué avant l'index)
+    sequence_indexed = models.BooleanField(default=False, editable=False, db_index=True)
+    # Carte du membre, calculées au catalogage (voir map_cache.record_key / record_data)
+    map_key = models.CharField(max_length=64, blank=True, editable=False)
+    map_data = models.JSONField(default=dict, blank=True, editable=False)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['member_path']
+        indexes = [
+            models.Index(fields=['campaign', 'source']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_source_display()})"
+
+
+class ArchiveMemberKmer(models.Model):
+    """Index k-mer des séquences du catalogue des archives (même codage que SequenceKmer)."""
+    member = models.ForeignKey(ArchiveMember, on_delete=models.CASCADE, related_name='kmers')
+    kmer = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kmer', 'member']),
+        ]
+
+
+class DilutionTable(models.Model):
+    """
+    Fichier de dilution (dilution-<stratégie>.json) du résultat d'une campagne,
+    chargé une seule fois à la fin de la simulation (voir dilution_tables.py).
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='dilution_tables')
+    # '10x', 'direct' ou 'other' (voir result_manifest.dilution_type)
+    dilution_type = models.CharField(max_length=16)
+    member_path = models.CharField(max_length=500)
+    # Colonnes dans l'ordre d'affichage et d'export
+    columns = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ['pk']
+        unique_together = ('campaign', 'dilution_type')
+
+    def __str__(self):
+        return f"{self.campaign} - {self.dilution_type}"
+
+
+class DilutionRow(models.Model):
+    table = models.ForeignKey(DilutionTable, on_delete=models.CASCADE, related_name='rows')
+    position = models.PositiveIntegerField()
+    plasmid_id = models.CharField(max_length=255, blank=True)
+    values = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['table', 'position']
+        indexes = [
+            models.Index(fields=['table', 'position']),
+        ]
+
 from django.db import models
 
 class PublicationRequest(models.Model):
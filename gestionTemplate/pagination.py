@@ -0,0 +1,138 @@
+"""
+Pagination par curseur (keyset) des listes et résultats de recherche.
+
+Au lieu d'un OFFSET, la page suivante est demandée à partir des valeurs de tri
+du dernier élément affiché (paramètre GET ``after`` par défaut) : chaque page
+coûte une requête indexée de taille fixe, quelle que soit sa position et la
+taille de la banque. Les résultats classés par l'index plein texte
+(fulltext.Ranked) sont paginés sur leur liste ordonnée d'identifiants.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+
+from .fulltext import Ranked
+
+
+def page_size(request):
+    """Taille de page : paramètre page_size (borné) ou SEARCH_PAGE_SIZE."""
+    default = getattr(settings, 'SEARCH_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'SEARCH_MAX_PAGE_SIZE', 200)
+    try:
+        size = int(request.GET.get('page_size', default))
+    except ValueError:
+        size = default
+    return max(1, min(size, maximum))
+
+
+def _encode(values):
+    data = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _field(model, name):
+    """Champ désigné par un nom de tri, en suivant les relations (ex. equipe__name)."""
+    field = None
+    for part in name.lstrip('-').split('__'):
+        field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        model = field.related_model
+    return field
+
+
+def _value(obj, name):
+    """Valeur de tri d'un objet, en suivant les relations (ex. equipe__name)."""
+    for part in name.lstrip('-').split('__'):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _decode(cursor, model, ordering):
+    """Valeurs de tri d'un curseur, converties par les champs du modèle ; None si invalide."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [_field(model, name).to_python(value) for name, value in zip(ordering, values)]
+    except Exception:
+        return None
+
+
+def _after(ordering, values):
+    """Condition « strictement après » pour un tri sur plusieurs champs."""
+    condition, equal = Q(), Q()
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        condition |= equal & Q(**{f"{field}__{lookup}": value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, request, param, after=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        # Valeurs de tri du dernier élément de la page précédente (None en première page)
+        self.after = after
+        self.param = param
+        self._request = request
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self._request.GET.get(self.param)
+
+    @property
+    def next_url(self):
+        if self.next_cursor is None:
+            return ''
+        query = self._request.GET.copy()
+        query[self.param] = self.next_cursor
+        return f"{self._request.path}?{query.urlencode()}"
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def paginate(request, source, ordering=('pk',), param='after', size=None):
+    """
+    Page courante de source (queryset ou fulltext.Ranked).
+    ordering : champs de tri du queryset, le dernier doit être unique (pk).
+    """
+    size = size or page_size(request)
+    cursor = request.GET.get(param, '')
+
+    if isinstance(source, Ranked):
+        start = 0
+        if cursor:
+            values = _decode(cursor, source.model, ('pk',))
+            if values and values[0] in source.ids:
+                start = source.ids.index(values[0]) + 1
+        page_ids = source.ids[start:start + size]
+        items = source.fetch(page_ids)
+        has_next = start + size < len(source.ids)
+        next_cursor = _encode([page_ids[-1]]) if has_next and page_ids else None
+        return KeysetPage(items, next_cursor, request, param)
+
+    queryset = source.order_by(*ordering)
+    values = _decode(cursor, queryset.model, ordering) if cursor else None
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+    items = list(queryset[:size + 1])
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        last = items[-1]
+        next_cursor = _encode([_value(last, name) for name in ordering])
+    return KeysetPage(items, next_cursor, request, param, after=values)
@@ -1,98 +1,124 @@
-from Bio import SeqIO
-from dna_features_viewer import GraphicFeature, GraphicRecord, CircularGraphicRecord
-import matplotlib.pyplot as plt
-import os
-from django.conf import settings
-
-# Couleurs par type de feature
-FEATURE_COLORS = {
-    "CDS": "#66c2a5",
-    "gene": "#fc8d62",
-    "promoter": "#8da0cb",
-    "terminator": "#e78ac3",
-    "rep_origin": "#a6d854",
-    "misc_feature": "#ffd92f",
-    "misc_binding": "#e5c494",
-    "default": "#b3b3b3",
-}
-
-
-def seqfeature_to_graphic(f):
-    """Convertit un feature Biopython en GraphicFeature avec couleur et label."""
-    if f.type == "source":
-        return None
-
-    if "gene" in f.qualifiers:
-        label = f.qualifiers["gene"][0]
-    elif "label" in f.qualifiers:
-        label = f.qualifiers["label"][0]
-    else:
-        label = f.type
-
-    return GraphicFeature(
-        start=int(f.location.start),
-        end=int(f.location.end),
-        strand=f.location.strand,
-        color=FEATURE_COLORS.get(f.type, FEATURE_COLORS["default"]),
-        label=label,
-    )
-
-
-def generate_plasmid_maps(chemin, output_subdir="temp_uploads/plasmid_maps"):
-    """
-    Génère les cartes linéaire et circulaire d’un plasmide GenBank.
-    Renvoie les chemins relatifs utilisables dans les templates Django.
-    """
-
-    # Dossier absolu basé sur MEDIA_ROOT défini dans settings.py
-    output_dir = os.path.join(settings.MEDIA_ROOT, output_subdir)
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Lecture du fichier GenBank
-    record = SeqIO.read(chemin, "genbank")
-
-    # Nom de base pour les fichiers PNG
-    nom_fichier = os.path.basename(chemin)
-    nom_sans_ext = os.path.splitext(nom_fichier)[0]
-    nom_plasmide = nom_sans_ext
-    if nom_plasmide.startswith("p"):
-        nom_plasmide = nom_plasmide[1:]
-
-    # Conversion des features
-    features = [
-        seqfeature_to_graphic(f)
-        for f in record.features
-        if seqfeature_to_graphic(f) is not None
-    ]
-
-    # --- Carte linéaire ---
-    linear_record = GraphicRecord(sequence_length=len(record.seq), features=features)
-    ax1, _ = linear_record.plot(figure_width=12)
-    ax1.set_title(f"Carte linéaire du plasmide {nom_plasmide}", fontsize=14)
-    linear_path = os.path.join(output_dir, f"{nom_plasmide}_lineaire.png")
-    plt.tight_layout()
-    ax1.figure.savefig(linear_path, dpi=300)
-    plt.close(ax1.figure)
-
-    # --- Carte circulaire ---
-    circular_record = CircularGraphicRecord(
-        sequence_length=len(record.seq),
-        features=features,
-        annotation_labels_radius=1.35,
-    )
-    fig, ax = plt.subplots(figsize=(8, 8))
-    circular_record.initialize_ax(ax)
-    for feature in features:
-        circular_record.plot_feature(ax, feature, level=0)
-    circular_record.add_labels(ax, features)
-    ax.set_title(f"Carte circulaire du plasmide {nom_plasmide}", fontsize=14)
-    circular_path = os.path.join(output_dir, f"{nom_plasmide}_circulaire.png")
-    plt.tight_layout()
-    ax.figure.savefig(circular_path, dpi=300)
-    plt.close(ax.figure)
-
-    # --- Chemins relatifs utilisables par Django ---
-    relative_linear = os.path.join(settings.MEDIA_URL.lstrip("/"), output_subdir, f"{nom_plasmide}_lineaire.png")
-    relative_circular = os.path.join(settings.MEDIA_URL.lstrip("/"), output_subdir, f"{nom_plasmide}_circulaire.png")
-
-    return f"/{relative_linear}", f"/{relative_circular}"
+import matplotlib
+# Rendu hors écran uniquement : les cartes sont dessinées par les workers (voir map_render.py)
+matplotlib.use("Agg")
+from dna_features_viewer import GraphicFeature, GraphicRecord, CircularGraphicRecord
+import matplotlib.pyplot as plt
+
+from .features import feature_label
+
+# Couleurs par type de feature
+FEATURE_COLORS = {
+    "CDS": "#66c2a5",
+    "gene": "#fc8d62",
+    "promoter": "#8da0cb",
+    "terminator": "#e78ac3",
+    "rep_origin": "#a6d854",
+    "misc_feature": "#ffd92f",
+    "misc_binding": "#e5c494",
+    "default": "#b3b3b3",
+}
+
+
+def is_drawn(feature):
+    """Les features source et celles sans localisation ne figurent pas sur les cartes."""
+    return feature["type"] != "source" and feature.get("start") is not None
+
+
+def map_label(feature):
+    """
+    Libellé d'une feature sur les cartes (PNG, SVG et navigateur) : celui de
+    PlasmidFeature.label (features.feature_label), le type à défaut.
+    """
+    qualifiers = feature.get("qualifiers")
+    if qualifiers is None:
+        # Lignes PlasmidFeature lues sans leurs qualificatifs (voir views.plasmid_map_data)
+        return feature.get("label") or feature["type"]
+    return feature_label(qualifiers) or feature["type"]
+
+
+def feature_color(feature_type):
+    return FEATURE_COLORS.get(feature_type, FEATURE_COLORS["default"])
+
+
+def feature_to_graphic(feature):
+    """
+    Convertit une feature structurée (dictionnaire type / start / end / strand /
+    qualifiers, comme PlasmidFeature ou genbank.parse_genbank) en GraphicFeature.
+    """
+    if not is_drawn(feature):
+        return None
+
+    return GraphicFeature(
+        start=feature["start"],
+        end=feature["end"],
+        strand=feature.get("strand"),
+        color=feature_color(feature["type"]),
+        label=map_label(feature),
+    )
+
+
+def map_data(nom_plasmide, length, topology, features):
+    """
+    Données d'une carte pour le rendu dans le navigateur (static/js/plasmid_map.js) :
+    mêmes features, libellés et couleurs que les cartes dessinées ici.
+    """
+    return {
+        "name": nom_plasmide,
+        "length": length,
+        "topology": topology,
+        "features": [
+            {
+                "start": feature["start"],
+                "end": feature["end"],
+                "strand": feature.get("strand"),
+                "type": feature["type"],
+                "label": map_label(feature),
+                "color": feature_color(feature["type"]),
+            }
+            for feature in features if is_drawn(feature)
+        ],
+    }
+
+
+def _save(figure, outputs):
+    """Enregistre une figure déjà mise en page dans chaque (chemin, format, dpi) de outputs."""
+    try:
+        for path, fmt, dpi in outputs:
+            figure.savefig(path, dpi=dpi or "figure", format=fmt)
+    finally:
+        plt.close(figure)
+
+
+def render_plasmid_maps(length, features, nom_plasmide, outputs):
+    """
+    Dessine les cartes linéaire et circulaire d'un plasmide de longueur length,
+    à partir de ses features structurées : aucun fichier GenBank n'est relu.
+    outputs : {'lineaire': [(chemin, format, dpi), ...], 'circulaire': [...]} ;
+    chaque carte est mise en page une seule fois puis enregistrée dans toutes
+    les tailles demandées (vignette, écran, SVG).
+    Le cache des cartes (map_cache.py) décide quand les rendre.
+    """
+    # Conversion des features (une seule conversion par feature)
+    features = [graphic for graphic in map(feature_to_graphic, features) if graphic is not None]
+
+    # --- Carte linéaire ---
+    linear_record = GraphicRecord(sequence_length=length, features=features)
+    ax1, _ = linear_record.plot(figure_width=12)
+    ax1.set_title(f"Carte linéaire du plasmide {nom_plasmide}", fontsize=14)
+    plt.tight_layout()
+    _save(ax1.figure, outputs.get("lineaire", []))
+
+    # --- Carte circulaire ---
+    circular_record = CircularGraphicRecord(
+        sequence_length=length,
+        features=features,
+        annotation_labels_radius=1.35,
+    )
+    fig, ax = plt.subplots(figsize=(8, 8))
+    circular_record.initialize_ax(ax)
+    for feature in features:
+        circular_record.plot_feature(ax, feature, level=0)
+    circular_record.add_labels(ax, features)
+    ax.set_title(f"Carte circulaire du plasmide {nom_plasmide}", fontsize=14)
+    plt.tight_layout()
+    _save(ax.figure, outputs.get("circulaire", []))
@@ -0,0 +1,104 @@
+"""
+Pré-résolution des plasmides nécessaires à une simulation.
+
+À partir du template rempli et du fichier de correspondance (pID;Name[;Type]),
+on détermine les fichiers GenBank réellement utilisés par les assemblages :
+seuls ceux-ci sont placés dans le bac à sable et passés à compute_all, et les
+identifiants introuvables sont signalés avant tout calcul coûteux.
+Les règles d'interprétation reprennent celles de insillyclo.simulator.
+"""
+import csv
+import os
+
+import insillyclo.cli_utils
+import insillyclo.models
+import insillyclo.observer
+import insillyclo.parser
+
+
+class MissingPlasmidsError(Exception):
+    """Des parties du template ne correspondent à aucun fichier GenBank disponible."""
+
+    def __init__(self, missing):
+        self.missing = list(missing)
+        super().__init__("Plasmides introuvables dans l'archive : " + ", ".join(self.missing))
+
+
+def read_mapping(mapping_path):
+    """
+    Lit un fichier de correspondance et retourne {(nom, type): [fichiers .gb]}.
+    Le type vaut None pour un fichier sans colonne Type.
+    """
+    mapping = {}
+    with open(mapping_path, 'r') as stream:
+        delimiter = insillyclo.cli_utils.get_csv_delimiter(stream)
+        reader = csv.reader(stream, delimiter=delimiter)
+        header = next(reader, [])
+        if header[:3] == ['pID', 'Name', 'Type']:
+            typed = True
+        elif header[:2] == ['pID', 'Name']:
+            typed = False
+        else:
+            raise ValueError(f"En-tête du fichier de correspondance invalide : {header}")
+
+        for row in reader:
+            if len(row) < (3 if typed else 2) or not row[0].strip():
+                continue
+            part_n_type = (row[1].strip(), row[2].strip() if typed else None)
+            filename = row[0].strip()
+            if not filename.endswith('.gb'):
+                filename += '.gb'
+            mapping.setdefault(part_n_type, []).append(filename)
+    return mapping
+
+
+def list_genbank_files(directory):
+    """Retourne {nom de fichier: [chemins relatifs]} pour les .gb d'un dossier."""
+    available = {}
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.endswith('.gb'):
+                rel_path = os.path.relpath(os.path.join(root, file), directory)
+                available.setdefault(file, []).append(rel_path)
+    return available
+
+
+def resolve_required_plasmids(template_path, mapping_path, available):
+    """
+    Retourne (fichiers requis, identifiants manquants).
+
+    available : noms des fichiers .gb disponibles (ex. {'pYTK001.gb', ...}).
+    Une partie est manquante si aucune de ses interprétations possibles
+    (par nom, par type, ou identifiant direct) ne mène à des fichiers présents.
+    """
+    observer = insillyclo.observer.InSillyCloCliObserver(debug=False, fail_on_error=True)
+    assembly, plasmids = insillyclo.parser.parse_assembly_and_plasmid_from_template(
+        template_path,
+        input_part_factory=insillyclo.models.InputPartDataClassFactory(),
+        assembly_factory=insillyclo.models.AssemblyDataClassFactory(),
+        plasmid_factory=insillyclo.models.PlasmidDataClassFactory(),
+        observer=observer,
+    )
+    mapping = read_mapping(mapping_path)
+    direct = insillyclo.models.get_direct_identifier()
+
+    def candidates(name, part_type):
+        files = list(mapping.get((name, part_type), []))
+        if part_type == direct:
+            files.append(f"{name}.gb")
+        return [f for f in files if f in available]
+
+    required = set()
+    missing = set()
+    for plasmid in plasmids:
+        for ip_instance, ip in plasmid.parts:
+            resolved = False
+            for interpretation in ip.get_possible_interpretation(ip_instance):
+                found = [candidates(name, part_type) for name, part_type in interpretation]
+                for files in found:
+                    required.update(files)
+                if all(found):
+                    resolved = True
+            if not resolved:
+                missing.add(ip_instance)
+    return required, sorted(missing)
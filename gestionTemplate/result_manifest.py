@@ -0,0 +1,166 @@
+"""
+Manifeste des archives de résultats (Campaign.result_manifest).
+
+Construit une seule fois, à la fin de la simulation : chaque membre du zip y
+figure avec sa catégorie (digestion, pcr, dilution, genbank, other), le
+plasmide concerné, sa taille, son CRC et la position de ses données dans le
+fichier. Les pages de résultats répondent depuis la base et ne lisent que les
+octets du membre demandé, sans ouvrir le zip ni parcourir sa liste de fichiers.
+Les membres servis tels quels (images) sont extraits une seule fois dans
+MEDIA_ROOT/result_members/<campagne>/ puis envoyés depuis ce cache (voir file_serving).
+"""
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+
+from django.conf import settings
+
+DIGESTION = 'digestion'
+PCR = 'pcr'
+DILUTION = 'dilution'
+GENBANK = 'genbank'
+OTHER = 'other'
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+CACHE_SUBDIR = 'result_members'
+
+# En-tête local d'un membre (signature, ..., longueur du nom, longueur du champ extra)
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+
+
+def classify(path):
+    """
+    Catégorie et plasmide d'un membre, d'après les noms produits par insillyclo :
+    <plasmide>.gb, <plasmide>-digestion.png, digestion.png, dilution-<stratégie>.json...
+    """
+    name = os.path.basename(path)
+    lower = name.lower()
+    stem = os.path.splitext(name)[0]
+    if lower.endswith('.gb'):
+        return GENBANK, stem
+    if lower.endswith(IMAGE_EXTENSIONS):
+        for category in (DIGESTION, PCR):
+            if category in lower:
+                # digestion.png : gel global ; <plasmide>-digestion.png : gel d'un plasmide
+                return category, stem[:stem.lower().rfind(category)].rstrip('-_ ')
+    if lower.endswith('.json') and DILUTION in lower:
+        return DILUTION, ''
+    return OTHER, ''
+
+
+def dilution_type(path):
+    """Type d'un fichier de dilution : '10x', 'direct' ou 'other'."""
+    lower = os.path.basename(path).lower()
+    if '10x' in lower:
+        return '10x'
+    if 'direct' in lower:
+        return 'direct'
+    return 'other'
+
+
+def _data_offset(fh, info):
+    fh.seek(info.header_offset)
+    header = fh.read(_LOCAL_HEADER.size)
+    if len(header) != _LOCAL_HEADER.size or header[:4] != _LOCAL_SIGNATURE:
+        raise zipfile.BadZipFile(f"En-tête local invalide : {info.filename}")
+    fields = _LOCAL_HEADER.unpack(header)
+    return info.header_offset + _LOCAL_HEADER.size + fields[-2] + fields[-1]
+
+
+def build(archive_path):
+    """Liste des membres de l'archive (dossiers exclus), dans l'ordre du zip."""
+    entries = []
+    with open(archive_path, 'rb') as fh, zipfile.ZipFile(fh) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            category, plasmid = classify(info.filename)
+            entries.append({
+                'path': info.filename,
+                'category': category,
+                'plasmid': plasmid,
+                'size': info.file_size,
+                'compressed_size': info.compress_size,
+                'compression': info.compress_type,
+                'crc': info.CRC,
+                'offset': _data_offset(fh, info),
+            })
+    return entries
+
+
+def store(campaign):
+    """Construit et enregistre le manifeste du résultat de la campagne."""
+    clear_cache(campaign)
+    campaign.result_manifest = build(campaign.result_file.path) if campaign.result_file else []
+    campaign.save(update_fields=['result_manifest'])
+    return campaign.result_manifest
+
+
+def manifest(campaign):
+    """Manifeste de la campagne ; construit au premier accès pour les campagnes plus anciennes."""
+    if not campaign.result_manifest and campaign.result_file:
+        return store(campaign)
+    return campaign.result_manifest
+
+
+def find(campaign, path):
+    """Membre par chemin interne, ou à défaut par nom de fichier (sans casse) ; None s'il est absent."""
+    entries = manifest(campaign)
+    for entry in entries:
+        if entry['path'] == path:
+            return entry
+    name = os.path.basename(path).lower()
+    return next((entry for entry in entries if os.path.basename(entry['path']).lower() == name), None)
+
+
+def read(campaign, entry):
+    """Contenu d'un membre, lu directement à sa position dans le fichier (CRC vérifié)."""
+    if entry['compression'] not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        with zipfile.ZipFile(campaign.result_file.path) as zf:
+            return zf.read(entry['path'])
+    with open(campaign.result_file.path, 'rb') as fh:
+        fh.seek(entry['offset'])
+        raw = fh.read(entry['compressed_size'])
+    try:
+        data = raw if entry['compression'] == zipfile.ZIP_STORED else zlib.decompress(raw, -15)
+    except zlib.error as e:
+        raise zipfile.BadZipFile(f"{entry['path']} : {e}")
+    if zlib.crc32(data) != entry['crc']:
+        raise zipfile.BadZipFile(f"CRC invalide : {entry['path']}")
+    return data
+
+
+def etag(entry):
+    """ETag fort d'un membre : son CRC et sa taille."""
+    return f'"{entry["crc"]:08x}-{entry["size"]}"'
+
+
+def cache_dir(campaign):
+    return os.path.join(settings.MEDIA_ROOT, CACHE_SUBDIR, str(campaign.pk))
+
+
+def clear_cache(campaign):
+    shutil.rmtree(cache_dir(campaign), ignore_errors=True)
+
+
+def extracted_path(campaign, entry):
+    """Chemin du membre extrait dans le cache servi, extrait au premier appel."""
+    directory = os.path.join(cache_dir(campaign), f"{entry['crc']:08x}-{entry['size']}")
+    path = os.path.join(directory, os.path.basename(entry['path']))
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    # Écriture dans un fichier temporaire puis renommage : pas de fichier partiel servi
+    fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(read(campaign, entry))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
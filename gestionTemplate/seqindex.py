@@ -0,0 +1,176 @@
+"""
+Index k-mer des séquences de plasmides (modèle SequenceKmer).
+
+Pour chaque plasmide, on enregistre les k-mers commençant à toutes les STEP
+positions de la séquence lue comme circulaire. Toute occurrence d'une requête
+d'au moins K + STEP - 1 bases contient forcément un k-mer indexé à l'un des
+décalages 0..STEP-1 : on récupère les plasmides candidats par ces k-mers (brin
+direct et complément inverse), puis on vérifie la correspondance sur leur seule
+séquence. Le coût d'une recherche dépend du nombre de candidats, pas de la
+taille de la banque. Le catalogue des archives (ArchiveMember) a le même index
+(ArchiveMemberKmer), utilisé par la recherche privée.
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import sites
+from .models import ArchiveMember, ArchiveMemberKmer, Plasmide, RestrictionSite, SequenceKmer
+
+K = 14
+STEP = 4
+MIN_INDEXED_QUERY = K + STEP - 1
+KMER_BATCH_SIZE = 5000
+
+_COMPLEMENT = str.maketrans('ACGTRYKMBDHVN', 'TGCAYRMKVHDBN')
+_CODES = str.maketrans('ACGT', '0123')
+
+
+def reverse_complement(sequence):
+    return sequence.translate(_COMPLEMENT)[::-1]
+
+
+def _encode(kmer):
+    """Code entier d'un k-mer ACGT, None s'il contient une autre base."""
+    digits = kmer.translate(_CODES)
+    return int(digits, 4) if digits.isdigit() else None
+
+
+def sequence_kmers(sequence):
+    """K-mers indexés d'une séquence circulaire (ensemble de codes)."""
+    seq = (sequence or '').upper()
+    if len(seq) < K:
+        return set()
+    circular = seq + seq[:K - 1]
+    kmers = set()
+    for pos in range(0, len(seq), STEP):
+        code = _encode(circular[pos:pos + K])
+        if code is not None:
+            kmers.add(code)
+    return kmers
+
+
+def _sequence_hash(sequence):
+    return hashlib.sha256((sequence or '').upper().encode('ascii', 'ignore')).hexdigest()
+
+
+def index_plasmides(plasmides):
+    """
+    (Ré)indexe les plasmides dont la séquence a changé depuis leur dernière
+    indexation : k-mers et sites de restriction. Les requêtes sont faites par
+    lots, quel que soit le nombre de plasmides.
+    """
+    changed = []
+    for p in plasmides:
+        digest = _sequence_hash(p.sequence)
+        if digest != p.sequence_index_hash:
+            changed.append((p, digest))
+    if not changed:
+        return 0
+
+    # Sans savepoint : appelée à l'intérieur de la transaction d'import
+    with transaction.atomic(savepoint=False):
+        stale = [p.pk for p, digest in changed if p.sequence_index_hash]
+        if stale:
+            SequenceKmer.objects.filter(plasmide_id__in=stale).delete()
+            RestrictionSite.objects.filter(plasmide_id__in=stale).delete()
+        rows = [
+            SequenceKmer(plasmide_id=p.pk, kmer=code)
+            for p, digest in changed
+            for code in sequence_kmers(p.sequence)
+        ]
+        SequenceKmer.objects.bulk_create(rows, batch_size=KMER_BATCH_SIZE)
+        RestrictionSite.objects.bulk_create(
+            [site for p, digest in changed for site in sites.site_rows(p)], batch_size=KMER_BATCH_SIZE
+        )
+        for p, digest in changed:
+            p.sequence_index_hash = digest
+        Plasmide.objects.bulk_update([p for p, digest in changed], ['sequence_index_hash'])
+    return len(changed)
+
+
+def index_members(members):
+    """
+    Indexe les k-mers des membres du catalogue pas encore indexés (tout juste
+    insérés par catalog.index_records, ou antérieurs à l'index).
+    """
+    members = [m for m in members if m.pk and not m.sequence_indexed]
+    if not members:
+        return 0
+    ids = [m.pk for m in members]
+    with transaction.atomic(savepoint=False):
+        for i in range(0, len(ids), KMER_BATCH_SIZE):
+            ArchiveMemberKmer.objects.filter(member_id__in=ids[i:i + KMER_BATCH_SIZE]).delete()
+        ArchiveMemberKmer.objects.bulk_create(
+            (ArchiveMemberKmer(member_id=m.pk, kmer=code) for m in members for code in sequence_kmers(m.sequence)),
+            batch_size=KMER_BATCH_SIZE,
+        )
+        for i in range(0, len(ids), KMER_BATCH_SIZE):
+            ArchiveMember.objects.filter(pk__in=ids[i:i + KMER_BATCH_SIZE]).update(sequence_indexed=True)
+    for m in members:
+        m.sequence_indexed = True
+    return len(members)
+
+
+# Table de k-mers et condition « pas encore indexé » de chaque modèle recherché
+_INDEXES = {
+    Plasmide: (SequenceKmer, 'plasmide', Q(sequence_index_hash='')),
+    ArchiveMember: (ArchiveMemberKmer, 'member', Q(sequence_indexed=False)),
+}
+
+
+def _normalize(query):
+    return ''.join(query.split()).upper()
+
+
+def _scan_filter(query):
+    """Filtre SQL équivalent pour les requêtes trop courtes pour l'index (ou non ACGT)."""
+    condition = Q()
+    for strand in {query, reverse_complement(query)}:
+        condition |= Q(sequence__icontains=strand)
+        # Occurrence à cheval sur l'origine de la séquence circulaire
+        for cut in range(1, len(strand)):
+            condition |= Q(sequence__iendswith=strand[:cut], sequence__istartswith=strand[cut:])
+    return condition
+
+
+def _matches(sequence, strands):
+    seq = (sequence or '').upper()
+    if not seq:
+        return False
+    longest = max(len(s) for s in strands)
+    circular = seq + seq[:longest - 1]
+    return any(s in circular for s in strands)
+
+
+def matching_ids(query, queryset=None):
+    """
+    Identifiants des objets de queryset (Plasmide ou ArchiveMember ; toute la
+    banque de plasmides par défaut) contenant la séquence requête, sur l'un ou
+    l'autre brin, y compris à travers l'origine.
+    """
+    queryset = Plasmide.objects.all() if queryset is None else queryset
+    query = _normalize(query)
+    if not query:
+        return set()
+    if len(query) < MIN_INDEXED_QUERY or not set(query) <= set('ACGT'):
+        return set(queryset.filter(_scan_filter(query)).values_list('pk', flat=True))
+
+    kmer_model, owner, unindexed_filter = _INDEXES[queryset.model]
+    strands = {query, reverse_complement(query)}
+    codes = {_encode(s[offset:offset + K]) for s in strands for offset in range(STEP)}
+    candidates = set(
+        kmer_model.objects.filter(kmer__in=codes, **{f"{owner}__in": queryset.values('pk')})
+        .values_list(f"{owner}_id", flat=True).distinct()
+    )
+
+    ids = set()
+    if candidates:
+        rows = queryset.filter(pk__in=candidates).values_list('pk', 'sequence')
+        ids.update(pk for pk, sequence in rows if _matches(sequence, strands))
+    # Objets pas encore indexés (avant build_sequence_index) : vérification directe,
+    # trouvés par un index (séquence lue pour eux seuls)
+    unindexed = queryset.filter(unindexed_filter).exclude(sequence='').values_list('pk', 'sequence')
+    ids.update(pk for pk, sequence in unindexed.iterator() if _matches(sequence, strands))
+    return ids
@@ -0,0 +1,83 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import features, fulltext, mapping_tables, result_manifest, seqindex, template_previews
+from .models import Campaign, CampaignTemplate, MappingTemplate, Plasmide
+
+# Champs de Plasmide repris dans l'index plein texte
+_FULLTEXT_FIELDS = {'name', 'description', 'organism', 'keywords', 'genbank_definition', 'features'}
+
+
+@receiver(post_save, sender=Plasmide)
+def index_plasmide_sequence(sender, instance, update_fields=None, **kwargs):
+    """Tient l'index k-mer à jour à chaque enregistrement d'un plasmide (bulk_create : voir ingest)."""
+    if update_fields is not None and 'sequence' not in update_fields:
+        return
+    if 'sequence' in instance.get_deferred_fields():
+        return
+    seqindex.index_plasmides([instance])
+
+
+@receiver(post_save, sender=Plasmide)
+def index_plasmide_features(sender, instance, update_fields=None, **kwargs):
+    """
+    Normalise les features (PlasmidFeature, feature_summary) quand elles
+    changent : un enregistrement qui ne modifie pas les features (même
+    empreinte que Plasmide.feature_hash) ne réécrit pas les PlasmidFeature.
+    """
+    if update_fields is not None and 'features' not in update_fields:
+        return
+    if 'features' in instance.get_deferred_fields():
+        return
+    created = kwargs.get('created', False)
+    features.index_plasmides([instance], created=created, changed_only=not created)
+
+
+@receiver(post_save, sender=Plasmide)
+def index_plasmide_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not _FULLTEXT_FIELDS & set(update_fields):
+        return
+    fulltext.index_objects('plasmide', [instance])
+
+
+@receiver(post_save, sender=CampaignTemplate)
+def index_template_text(sender, instance, **kwargs):
+    fulltext.index_objects('template', [instance])
+
+
+@receiver(post_save, sender=CampaignTemplate)
+def store_template_preview(sender, instance, update_fields=None, **kwargs):
+    """Calcule l'aperçu du fichier de template à l'upload (une fois par contenu)."""
+    if update_fields is not None and 'template_file' not in update_fields:
+        return
+    template_previews.store(instance)
+
+
+@receiver(post_save, sender=MappingTemplate)
+def index_mapping_text(sender, instance, **kwargs):
+    fulltext.index_objects('mapping', [instance])
+
+
+@receiver(post_save, sender=MappingTemplate)
+def store_mapping_preview(sender, instance, update_fields=None, **kwargs):
+    """Lit le fichier de correspondance à l'upload (et quand il change) pour l'aperçu des listes."""
+    mapping_tables.store(instance, rehash=update_fields is None or 'mapping_file' in update_fields)
+
+
+@receiver(post_delete, sender=Plasmide)
+@receiver(post_delete, sender=CampaignTemplate)
+@receiver(post_delete, sender=MappingTemplate)
+def remove_from_fulltext(sender, instance, **kwargs):
+    kind = {Plasmide: 'plasmide', CampaignTemplate: 'template', MappingTemplate: 'mapping'}[sender]
+    fulltext.remove_objects(kind, [instance.pk])
+
+
+@receiver(post_delete, sender=CampaignTemplate)
+def remove_template_preview(sender, instance, **kwargs):
+    template_previews.prune([instance.file_hash])
+
+
+@receiver(post_delete, sender=Campaign)
+def remove_result_members(sender, instance, **kwargs):
+    """Supprime les membres du résultat extraits pour être servis (voir result_manifest)."""
+    result_manifest.clear_cache(instance)
@@ -0,0 +1,252 @@
+"""
+Pipeline de simulation exécuté par les workers (voir jobs.py).
+
+La vue ``simulate`` prépare le bac à sable et enregistre les paramètres dans
+le payload du job ; tout le travail coûteux (extraction, parsing GenBank,
+compute_all, création de l'archive de résultats) se fait ici.
+"""
+import os
+import pathlib
+import shutil
+import zipfile
+
+from django.core.files import File
+
+from .caching import archive_sha256, simulation_cache_key, get_cached_result, store_result, copy_cached_result
+from . import archive_store, catalog, dilution_tables, ingest, map_render, result_manifest, sites
+from .genbank import parse_genbank_members
+from .resolution import MissingPlasmidsError, list_genbank_files, resolve_required_plasmids
+from .timing import StageTimer, TimingObserver
+from .models import ArchiveMember, Plasmide
+
+import insillyclo.data_source
+import insillyclo.simulator
+
+
+# Fonction utilitaire création zipfile
+def make_zipfile(source_dir, output_filename):
+    with zipfile.ZipFile(output_filename, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for root, dirs, files in os.walk(source_dir):
+            for file in files:
+                zipf.write(os.path.join(root, file),
+                           os.path.relpath(os.path.join(root, file),
+                           os.path.join(source_dir, '..')))
+
+
+def register_uploaded_plasmids(campaign, archive_path):
+    """
+    Crée les Plasmide en BDD à partir des .gb de l'archive, les lie à la campagne
+    et catalogue le contenu de l'archive (une seule lecture des fichiers).
+    Le dossier d'un plasmide est son sous-dossier dans l'archive, ou le nom de
+    l'utilisateur pour les fichiers à la racine.
+    """
+    owner = campaign.user.username if campaign.user else "private"
+    records, errors = ingest.parse_archive(
+        archive_path,
+        dossier_nom=lambda member: os.path.dirname(member) or owner,
+    )
+    for member, error in errors:
+        print(f"Erreur import plasmide {member}: {error}")
+    plasmides, created = ingest.ingest_records(records, user=campaign.user, campaign=campaign)
+    catalog.index_records(records, errors, ArchiveMember.SOURCE_ARCHIVE, name_from_locus=True, campaign=campaign)
+    return plasmides
+
+
+def check_domestication(campaign, enzyme, required=None):
+    """
+    Signale (dans campaign.options['domestication']) les plasmides de la campagne
+    ou de sa collection dont le nombre de sites de l'enzyme n'est pas celui attendu.
+    required : noms de fichiers .gb utilisés par les assemblages (tous si None).
+    """
+    plasmides = Plasmide.objects.filter(campaign=campaign)
+    if campaign.plasmid_collection_id:
+        plasmides = plasmides | Plasmide.objects.filter(collections=campaign.plasmid_collection_id)
+    if required is not None:
+        plasmides = plasmides.filter(name__in=[os.path.splitext(name)[0] for name in required])
+    issues = sites.domestication_issues(plasmides.distinct(), enzyme)
+    campaign.options = {**campaign.options, 'domestication': [message for name, count, message in issues]}
+    campaign.save(update_fields=['options'])
+    return issues
+
+
+def submission_warnings(plasmides, enzyme):
+    """
+    Avertissements de domestication affichés à la soumission pour une collection
+    en base (sites précalculés, aucune lecture de fichier). Les archives
+    uploadées sont contrôlées par le worker (voir check_uploaded_domestication).
+    """
+    return [message for name, count, message in sites.domestication_issues(plasmides.distinct(), enzyme)]
+
+
+def check_uploaded_domestication(job, campaign, enzyme, extracted_dir, available, required=None):
+    """
+    Même signalement pour les plasmides d'une archive uploadée qui ne sont pas
+    en base : sites de l'enzyme dans les séquences des fichiers extraits.
+    available : {nom de fichier .gb: [chemins relatifs à extracted_dir]} ;
+    required : noms utilisés (tous si None).
+    Les messages vont dans campaign.options['domestication'], ou dans le payload
+    du job pour une simulation anonyme.
+    """
+    names = sorted(available if required is None else required)
+    members = []
+    for name in names:
+        with open(os.path.join(extracted_dir, available[name][0]), 'rb') as fh:
+            members.append((name, fh.read()))
+    issues = sites.sequence_issues(
+        {os.path.splitext(name)[0]: record['sequence'] for name, record, error in parse_genbank_members(members)
+         if record},
+        enzyme,
+    )
+    messages = [message for name, count, message in issues]
+    if campaign is not None:
+        campaign.options = {**campaign.options, 'domestication': messages}
+        campaign.save(update_fields=['options'])
+    else:
+        job.payload = {**job.payload, 'domestication': messages}
+        job.save(update_fields=['payload'])
+    return issues
+
+
+def run_simulation_job(job):
+    """
+    Exécute une simulation à partir du payload préparé par la vue :
+    sandbox, plasmids_archive, template_path, mapping_path, primers_path,
+    concentration_path, enzyme, default_concentration, primer_pairs, register_plasmids.
+    La durée de chaque étape est enregistrée dans Campaign.timings.
+    """
+    payload = job.payload
+    campaign = job.campaign
+
+    # 'upload' est mesuré par la vue ; 'queue_wait' est le temps passé en file
+    timer = StageTimer(payload.get('timings'))
+    if job.started_at and job.created_at:
+        timer.add('queue_wait', (job.started_at - job.created_at).total_seconds())
+
+    try:
+        _run_simulation(job, payload, campaign, timer)
+    finally:
+        if campaign is not None:
+            campaign.timings = timer.timings
+            campaign.save(update_fields=['timings'])
+
+
+def _run_simulation(job, payload, campaign, timer):
+    sandbox_dir = pathlib.Path(payload['sandbox'])
+    plasmids_dir = sandbox_dir / 'plasmids'
+    output_dir = sandbox_dir / 'output'
+    plasmids_dir.mkdir(parents=True, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    final_zip_name = f"resultats_{'user' if campaign is not None else 'anonymes'}_{sandbox_dir.name}.zip"
+    final_zip_path = sandbox_dir / final_zip_name
+
+    # === 0 CACHE : mêmes entrées -> même résultat ===
+    with timer.stage('cache_lookup'):
+        archive_digest = archive_sha256(payload['plasmids_archive'])
+        cache_key = simulation_cache_key(payload, digests={'plasmids_archive': archive_digest})
+        if campaign is not None:
+            campaign.cache_key = cache_key
+            campaign.save(update_fields=['cache_key'])
+        cached = get_cached_result(cache_key)
+
+    # === 1 ENREGISTREMENT DES PLASMIDES UPLOADÉS (parsing parallèle, insertion groupée) ===
+    if campaign is not None and payload.get('register_plasmids'):
+        with timer.stage('register_plasmids'):
+            register_uploaded_plasmids(campaign, payload['plasmids_archive'])
+
+    if cached is not None:
+        with timer.stage('cache_copy'):
+            copy_cached_result(cached, final_zip_path)
+    else:
+        # === 1b EXTRACTION : une seule fois dans le stock partagé (lecture seule) ===
+        with timer.stage('extraction'):
+            extracted_dir = archive_store.extract(payload['plasmids_archive'], digest=archive_digest)
+
+        # === 1c PRÉ-RÉSOLUTION : seuls les plasmides utilisés vont au simulateur ===
+        with timer.stage('resolution'):
+            available = list_genbank_files(extracted_dir)
+            only = None
+            try:
+                required, missing = resolve_required_plasmids(
+                    payload['template_path'], payload['mapping_path'], available
+                )
+            except Exception as e:
+                # Template ou correspondance illisible : compute_all donnera l'erreur détaillée
+                print(f"Pré-résolution impossible, toutes les archives sont utilisées : {e}")
+            else:
+                if missing:
+                    raise MissingPlasmidsError(missing)
+                only = {os.path.normpath(path) for name in required for path in available[name]}
+
+        # === 1d DOMESTICATION : sites de l'enzyme dans les plasmides requis (avertissements) ===
+        if payload.get('enzyme'):
+            with timer.stage('domestication'):
+                if campaign is not None and (payload.get('register_plasmids') or campaign.plasmid_collection_id):
+                    check_domestication(campaign, payload['enzyme'], required if only is not None else None)
+                else:
+                    check_uploaded_domestication(job, campaign, payload['enzyme'], extracted_dir, available,
+                                                 required if only is not None else None)
+
+        with timer.stage('staging'):
+            archive_store.stage(extracted_dir, plasmids_dir, only=only)
+
+        # === 2 PARAMÈTRES ===
+        enzyme = payload.get('enzyme')
+        primer_pairs = payload.get('primer_pairs')
+        primers_path = payload.get('primers_path')
+        concentration_path = payload.get('concentration_path')
+
+        # === 3 LANCEMENT DE LA SIMULATION ===
+        observer = TimingObserver(timer, debug=False, fail_on_error=True)
+
+        with timer.stage('compute_all'), observer.timing_steps():
+            insillyclo.simulator.compute_all(
+                observer=observer,
+                settings=None,
+                input_template_filled=pathlib.Path(payload['template_path']),
+                input_parts_files=[pathlib.Path(payload['mapping_path'])],
+                gb_plasmids=plasmids_dir.glob('**/*.gb'),  # Cherche récursivement les .gb
+                output_dir=output_dir,
+                data_source=insillyclo.data_source.DataSourceHardCodedImplementation(),
+                primers_file=pathlib.Path(primers_path) if primers_path else None,
+                concentration_file=pathlib.Path(concentration_path) if concentration_path else None,
+                primer_id_pairs=[tuple(p) for p in primer_pairs] if primer_pairs else None,
+                enzyme_names=[enzyme] if enzyme else None,
+                default_mass_concentration=payload.get('default_concentration') or 200.0,
+            )
+
+        # === 4 PACKAGING ===
+        if not os.listdir(output_dir):
+            raise Exception("La simulation n'a produit aucun fichier.")
+
+        with timer.stage('make_zipfile'):
+            make_zipfile(str(output_dir), str(final_zip_path))
+        with timer.stage('cache_store'):
+            store_result(cache_key, final_zip_path)
+
+    # === 5 SAUVEGARDE RÉSULTAT ===
+    if campaign is not None:
+        # Sauvegarde du résultat final en BDD puis nettoyage du dossier temporaire
+        with timer.stage('result_save'):
+            with open(final_zip_path, 'rb') as f:
+                campaign.result_file.save(final_zip_name, File(f), save=False)
+            campaign.save(update_fields=['result_file'])
+        job.result_path = campaign.result_file.path
+        with timer.stage('manifest'):
+            result_manifest.store(campaign)
+        with timer.stage('dilutions'):
+            dilution_tables.load(campaign)
+        with timer.stage('catalog'):
+            catalog.index_archive(campaign.result_file.path, ArchiveMember.SOURCE_RESULT,
+                                  name_from_locus=True, campaign=campaign)
+        # Cartes des plasmides de la campagne, dessinées par les workers
+        map_render.enqueue_archive(campaign, 'result_file')
+        if campaign.plasmid_archive:
+            map_render.enqueue_archive(campaign, 'plasmid_archive')
+        try:
+            shutil.rmtree(sandbox_dir)
+        except OSError as e:
+            print(f"Erreur nettoyage : {e}")
+    else:
+        # Anonyme : le fichier reste dans temp_uploads (supprimé par cleanup_temp)
+        job.result_path = str(final_zip_path)
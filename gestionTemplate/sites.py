@@ -0,0 +1,139 @@
+"""
+Sites de restriction des enzymes Golden Gate (type IIS) dans les séquences de plasmides.
+
+La séquence est convertie en tableau numpy et chaque site (brin direct et
+complément inverse) est recherché en comparant des vues décalées du tableau,
+sans boucle Python par position. Les sites sont enregistrés avec leur brin et
+la séquence de l'overhang (lue 5'->3' sur le brin du site) lors de
+l'indexation des plasmides (voir seqindex.index_plasmides).
+"""
+import numpy as np
+from django.db.models import Count, Q
+
+from .models import CampaignTemplate, Plasmide, RestrictionSite
+
+# site de reconnaissance, coupure brin du site, coupure brin complémentaire (après le site)
+ENZYMES = {
+    CampaignTemplate.EnzymeChoices.BSAI: ('GGTCTC', 1, 5),
+    CampaignTemplate.EnzymeChoices.BSMBI: ('CGTCTC', 1, 5),
+    CampaignTemplate.EnzymeChoices.BBSI: ('GAAGAC', 2, 6),
+    CampaignTemplate.EnzymeChoices.SAPI: ('GCTCTTC', 1, 4),
+}
+
+# Un fragment domestiqué porte exactement deux sites : ceux qui l'encadrent
+FLANKING_SITES = 2
+
+_COMPLEMENT = str.maketrans('ACGT', 'TGCA')
+
+
+def _reverse_complement(sequence):
+    return sequence.translate(_COMPLEMENT)[::-1]
+
+
+def _find(array, site):
+    """Positions (0-based) de site dans array (octets ASCII), vectorisé."""
+    n = len(array) - len(site) + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    pattern = np.frombuffer(site.encode('ascii'), dtype=np.uint8)
+    mask = array[:n] == pattern[0]
+    for i in range(1, len(pattern)):
+        mask &= array[i:n + i] == pattern[i]
+    return np.flatnonzero(mask)
+
+
+def scan(sequence, circular=True, enzymes=None):
+    """
+    Retourne la liste des (enzyme, position, brin, overhang) de la séquence.
+    position : début du site de reconnaissance sur le brin direct.
+    """
+    seq = (sequence or '').upper()
+    if not seq:
+        return []
+    found = []
+    for enzyme, (site, cut, cut_complement) in ENZYMES.items():
+        if enzymes is not None and enzyme not in enzymes:
+            continue
+        length = len(site)
+        # Séquence étendue de part et d'autre pour les sites et overhangs à cheval sur l'origine
+        pad = length + cut_complement if circular else 0
+        padded = seq[-pad:] + seq + seq[:pad] if circular and len(seq) > pad else seq
+        offset = pad if padded is not seq else 0
+        array = np.frombuffer(padded.encode('ascii', 'replace'), dtype=np.uint8)
+
+        for strand, pattern in ((1, site), (-1, _reverse_complement(site))):
+            if strand == -1 and pattern == site:
+                continue  # site palindromique (aucun pour ces enzymes)
+            for pos in _find(array, pattern).tolist():
+                start = pos - offset
+                if not 0 <= start < len(seq):
+                    continue
+                if strand == 1:
+                    overhang = padded[pos + length + cut:pos + length + cut_complement]
+                else:
+                    overhang = _reverse_complement(padded[max(pos - cut_complement, 0):max(pos - cut, 0)])
+                found.append((enzyme, start, strand, overhang))
+    found.sort(key=lambda site: (site[0], site[1]))
+    return found
+
+
+def site_rows(plasmide):
+    """Instances RestrictionSite (non sauvegardées) d'un plasmide."""
+    return [
+        RestrictionSite(plasmide_id=plasmide.pk, enzyme=enzyme, position=position, strand=strand, overhang=overhang)
+        for enzyme, position, strand, overhang in scan(plasmide.sequence)
+    ]
+
+
+def _site_count(enzyme):
+    return Count('restriction_sites', filter=Q(restriction_sites__enzyme=enzyme))
+
+
+def filter_by_sites(queryset, enzyme, count=None, no_internal=False):
+    """
+    Filtre un queryset de Plasmide : exactement `count` sites de l'enzyme,
+    et/ou aucun site interne (au plus les deux sites qui encadrent le fragment).
+    """
+    if count is None and not no_internal:
+        return queryset
+    queryset = queryset.annotate(site_count=_site_count(enzyme))
+    if count is not None:
+        queryset = queryset.filter(site_count=count)
+    if no_internal:
+        queryset = queryset.filter(site_count__lte=FLANKING_SITES)
+    return queryset
+
+
+def _issue(name, count, enzyme):
+    if count > FLANKING_SITES:
+        return name, count, f"{name} : {count - FLANKING_SITES} site(s) {enzyme} interne(s)"
+    if count < FLANKING_SITES:
+        return name, count, f"{name} : {count} site(s) {enzyme}, {FLANKING_SITES} attendus"
+    return None
+
+
+def domestication_issues(plasmides, enzyme):
+    """
+    Plasmides mal domestiqués pour l'enzyme : nombre de sites différent des
+    deux sites attendus. Retourne [(nom, nombre de sites, message)].
+    """
+    if enzyme not in ENZYMES:
+        return []
+    issues = []
+    for name, count in plasmides.annotate(site_count=_site_count(enzyme)).values_list('name', 'site_count'):
+        issue = _issue(name, count, enzyme)
+        if issue:
+            issues.append(issue)
+    return issues
+
+
+def sequence_issues(sequences, enzyme):
+    """Même contrôle pour des séquences qui ne sont pas en base : {nom: séquence}."""
+    if enzyme not in ENZYMES:
+        return []
+    issues = []
+    for name, sequence in sequences.items():
+        issue = _issue(name, len(scan(sequence, enzymes={enzyme})), enzyme)
+        if issue:
+            issues.append(issue)
+    return issues
@@ -0,0 +1,122 @@
+"""
+Aperçu des fichiers de template (modèle TemplatePreview).
+
+Le fichier d'un CampaignTemplate est lu une seule fois, à l'upload (signal
+post_save) : métadonnées de l'en-tête (enzyme, nom du projet, séparateur de
+sortie), colonnes, premières lignes et nombre de lignes du tableau des
+plasmides. L'aperçu est enregistré sous l'empreinte SHA-256 du fichier,
+conservée dans CampaignTemplate.file_hash : les copies d'un template partagent
+le même aperçu et les pages de recherche n'ouvrent aucun fichier Excel.
+"""
+import pandas as pd
+from django.conf import settings
+
+from .mapping_tables import file_hash, json_value
+from .models import CampaignTemplate, TemplatePreview
+
+# Nombre de lignes conservées pour l'aperçu (TEMPLATE_PREVIEW_ROWS)
+DEFAULT_PREVIEW_ROWS = 20
+# Première cellule de la ligne d'en-tête du tableau des plasmides
+TABLE_HEADER = "Output plasmid id"
+
+
+def preview_rows():
+    return getattr(settings, 'TEMPLATE_PREVIEW_ROWS', DEFAULT_PREVIEW_ROWS)
+
+
+def read_sheet(file):
+    """Feuille brute (sans ligne d'en-tête) d'un template Excel ou CSV (séparé par des ';')."""
+    name = getattr(file, 'name', file)
+    if str(name).lower().endswith('.csv'):
+        return pd.read_csv(file, sep=';', header=None)
+    return pd.read_excel(file, header=None)
+
+
+def split_sheet(df_raw):
+    """
+    Métadonnées (enzyme, nom du projet, séparateur : colonne B des lignes 2 à 4)
+    et tableau des plasmides (à partir de la ligne « Output plasmid id », ou de la
+    première ligne à défaut) d'une feuille de template.
+    """
+    def meta(row):
+        if df_raw.shape[0] > row and df_raw.shape[1] > 1:
+            return df_raw.iloc[row, 1]
+        return None
+
+    metadata = {'enzyme': meta(1), 'project_name': meta(2), 'output_separator': meta(3)}
+
+    start_row = 0
+    for i, row in df_raw.iterrows():
+        if TABLE_HEADER in str(row[0]):
+            start_row = i
+            break
+
+    df_plasmids = df_raw.iloc[start_row:].copy()
+    if df_plasmids.empty:
+        return metadata, df_plasmids
+    df_plasmids.columns = df_plasmids.iloc[0]
+    df_plasmids = df_plasmids[1:]
+    df_plasmids = df_plasmids.dropna(subset=[df_plasmids.columns[0]])
+    return metadata, df_plasmids
+
+
+def parse(file):
+    """Champs d'un TemplatePreview ; aperçu vide si le fichier est illisible."""
+    try:
+        metadata, table = split_sheet(read_sheet(file))
+    except Exception:
+        return {}
+    fields = {key: str(json_value(value)) for key, value in metadata.items()}
+    fields['enzyme'] = fields['enzyme'][:50]
+    fields['project_name'] = fields['project_name'][:200]
+    fields['output_separator'] = fields['output_separator'][:10]
+    fields['columns'] = [json_value(c) for c in table.columns]
+    fields['rows'] = [[json_value(v) for v in row] for row in table.head(preview_rows()).itertuples(index=False)]
+    fields['row_count'] = len(table)
+    return fields
+
+
+def prune(hashes):
+    """Supprime les aperçus qui ne sont plus utilisés par aucun template."""
+    hashes = [h for h in hashes if h]
+    if hashes:
+        used = CampaignTemplate.objects.filter(file_hash__in=hashes).values('file_hash')
+        TemplatePreview.objects.filter(file_hash__in=hashes).exclude(file_hash__in=used).delete()
+
+
+def store(template):
+    """
+    Met à jour l'empreinte du fichier du template et calcule son aperçu s'il
+    n'existe pas encore pour ce contenu. Renvoie le TemplatePreview (None sans fichier).
+    """
+    digest = file_hash(template.template_file) if template.template_file else ''
+    previous = template.file_hash
+    if digest != previous:
+        # update() : ni nouveau post_save ni réindexation plein texte
+        CampaignTemplate.objects.filter(pk=template.pk).update(file_hash=digest)
+        template.file_hash = digest
+        prune([previous])
+    if not digest:
+        return None
+    preview = TemplatePreview.objects.filter(file_hash=digest).first()
+    if preview is None:
+        fields = parse(template.template_file.path)
+        preview, _ = TemplatePreview.objects.get_or_create(file_hash=digest, defaults=fields)
+    return preview
+
+
+def previews(templates):
+    """
+    Aperçus des templates d'une page, {pk du template: TemplatePreview}, en une
+    requête ; calculés au premier affichage pour les templates plus anciens.
+    """
+    found = TemplatePreview.objects.in_bulk(
+        {t.file_hash for t in templates if t.file_hash}, field_name='file_hash'
+    )
+    result = {}
+    for template in templates:
+        preview = found.get(template.file_hash)
+        if preview is None and template.template_file:
+            preview = store(template)
+        result[template.pk] = preview
+    return result
@@ -1,17 +1,39 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 import tempfile
 import shutil
 from pathlib import Path
-from gestionTemplate.models import Plasmide, CampaignTemplate
+from gestionTemplate.models import Plasmide, CampaignTemplate, Campaign, BackgroundJob, SimulationCacheEntry, CacheStat, ExtractedArchive, ArchiveMember, SequenceKmer, DilutionRow, MappingTemplate, CorrespondanceTable, TemplatePreview
+from gestionTemplate import jobs, caching, archive_store, timing, ingest, catalog, map_cache, result_manifest, dilution_tables
+from gestionTemplate.genbank import parse_genbank
+from gestionTemplate.plasmid_mapping import FEATURE_COLORS
 
 import io
+import json
 import zipfile
 import os
 from django.test import Client
 from django.urls import reverse
+from django.db import connection
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from unittest.mock import patch
+from datetime import timedelta
+from django.utils import timezone
+
+# Fichiers écrits par les simulations (uploads, stock d'archives, cache) : hors du MEDIA_ROOT réel
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix='gestionTemplate-tests-')
+temp_media = override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, ARCHIVE_STORE_DIR=os.path.join(TEST_MEDIA_ROOT, 'archives'))
+
+
+def plasmids_zip(members, date_time=(2024, 1, 1, 0, 0, 0)):
+    """Archive zip en mémoire, aux dates de membres fixées."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, content in members.items():
+            zf.writestr(zipfile.ZipInfo(name, date_time=date_time), content)
+    return buffer.getvalue()
+
 
 class PlasmideGenbankTest(TestCase):
     def test_create_from_genbank_file(self):
@@ -39,12 +61,92 @@ class PlasmideGenbankTest(TestCase):
                 self.assertTrue(plasmid.gb_file.exists(), f"Le plasmide {plasmid.name} n'a pas de fichier .gb associé dans la template {template.name}")
 
 
+class GenbankStreamTest(TestCase):
+    gb_path = Path(__file__).resolve().parent.parent / 'data_web' / 'pYTK' / 'pYTK001.gb'
+
+    def test_parse_matches_biopython(self):
+        from Bio import SeqIO
+        record = parse_genbank(self.gb_path)
+        expected = SeqIO.read(self.gb_path, 'genbank')
+
+        self.assertEqual(record['sequence'], str(expected.seq).upper())
+        self.assertEqual(record['length'], len(expected.seq))
+        self.assertEqual(record['topology'], 'circular')
+        self.assertEqual(
+            [(f['type'], f['start'], f['end'], f['strand']) for f in record['features']],
+            [(f.type, int(f.location.start), int(f.location.end), f.location.strand) for f in expected.features],
+        )
+
+    def test_create_from_zip_member(self):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            zf.write(self.gb_path, 'kit/pYTK001.gb')
+
+        with zipfile.ZipFile(zip_buffer) as zf, zf.open('kit/pYTK001.gb') as handle:
+            p = Plasmide.create_from_genbank(handle, dossier_nom='kit')
+
+        self.assertEqual(p.name, 'pYTK001')
+        self.assertEqual(p.length, 2676)
+        self.assertEqual(p.gc_content, 47.65)
+        self.assertTrue(p.features['raw'].startswith('misc_feature'))
+
+
+class BulkIngestTest(TestCase):
+    def test_ingest_archive_in_constant_queries(self):
+        from django.contrib.auth import get_user_model
+        from gestionTemplate.models import PlasmidCollection
+        user = get_user_model().objects.create_user(username='bob', email='bob@example.com', password='testpass')
+        collection = PlasmidCollection.objects.create(user=user, name='kit', plasmid_archive='kit.zip')
+        Plasmide.objects.create(name='pYTK001', dossier='kit')
+
+        zip_buffer = io.BytesIO()
+        gb_dir = Path(__file__).resolve().parent.parent / 'data_web' / 'pYTK'
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            for name in ('pYTK001.gb', 'pYTK002.gb', 'pYTK003.gb', 'pYTK004.gb'):
+                zf.write(gb_dir / name, name)
+
+        records, errors = ingest.parse_archive(zip_buffer, 'kit')
+        # Recherche des existants, insertion, mise à jour du propriétaire, liens M2M (+ savepoint),
+        # puis index : 3 lots de k-mers, les sites de restriction, la mise à jour des empreintes,
+        # les features structurées, l'index plein texte et le job de rendu des cartes
+        with self.assertNumQueries(14):
+            plasmides, created = ingest.ingest_records(records, user=user, collection=collection)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(plasmides), 4)
+        self.assertEqual(len(created), 3)
+        self.assertEqual(Plasmide.objects.filter(dossier='kit').count(), 4)
+        self.assertEqual(collection.plasmides.count(), 4)
+        self.assertEqual(Plasmide.objects.filter(user=user).count(), 4)
+
+    def test_parallel_parsing_matches_serial(self):
+        zip_buffer = io.BytesIO()
+        gb_dir = Path(__file__).resolve().parent.parent / 'data_web' / 'pYTK'
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            for gb_file in sorted(gb_dir.glob('*.gb'))[:12]:
+                zf.write(gb_file, f"kit/{gb_file.name}")
+            zf.writestr('kit/broken.gb', b'pas un fichier GenBank')
+
+        with self.settings(GENBANK_PARSE_WORKERS=1):
+            serial, serial_errors = ingest.parse_archive(zip_buffer, 'kit')
+        with self.settings(GENBANK_PARSE_WORKERS=2, GENBANK_PARALLEL_MIN_MEMBERS=4):
+            parallel, parallel_errors = ingest.parse_archive(zip_buffer, lambda member: member.split('/')[0])
+
+        self.assertEqual(len(serial), 12)
+        self.assertEqual(parallel, serial)
+        self.assertEqual([m for m, e in parallel_errors], ['kit/broken.gb'])
+
+
 # Test 2: Vérifier que la simulation fonctionne correctement
+@temp_media
 class SimulationSimpleTest(TestCase):
     def setUp(self):
         self.client = Client()
         self.url = reverse('templates:simulate')
 
+    def tearDown(self):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
     # On "patch" la fonction compute_all pour ne pas lancer le vrai calcul scientifique
     @patch('insillyclo.simulator.compute_all')
     def test_simulation_simple_success(self, mock_compute):
@@ -97,18 +199,30 @@ class SimulationSimpleTest(TestCase):
             'primer_pairs': ''
         }
 
-        response = self.client.post(self.url, data, format='multipart')
+        response = self.client.post(self.url, data, format='multipart', HTTP_ACCEPT='application/json')
 
 
         # --- 4 VÉRIFICATIONS (ASSERTIONS) ---
 
-        # Vérifier que la requête a réussi (200 OK)
-        self.assertEqual(response.status_code, 200)
+        # La requête rend la main immédiatement avec l'identifiant du job
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job_id']
+        mock_compute.assert_not_called()
+
+        status = self.client.get(reverse('templates:simulation_job_status', args=[job_id])).json()
+        self.assertEqual(status['status'], 'pending')
+
+        # Exécution du job comme le ferait un worker
+        jobs.run_pending()
 
         # Vérifier que le simulateur a bien été appelé une fois
         mock_compute.assert_called_once()
 
+        status = self.client.get(reverse('templates:simulation_job_status', args=[job_id])).json()
+        self.assertEqual(status['status'], 'done')
+
         # Vérifier que la réponse est bien un téléchargement de fichier ZIP
+        response = self.client.get(status['download_url'])
         self.assertTrue(response.has_header('Content-Disposition'))
         self.assertIn('attachment; filename="resultats_anonymes_', response['Content-Disposition'])
         self.assertTrue(response['Content-Disposition'].endswith('.zip"'))
@@ -123,6 +237,848 @@ class SimulationSimpleTest(TestCase):
         self.assertIsNone(call_kwargs['enzyme_names'])       # Doit être None car vide
         self.assertEqual(call_kwargs['default_mass_concentration'], 200.0) # Valeur par défaut
 
+    def test_job_status_hidden_from_other_sessions(self):
+        job = BackgroundJob.objects.create(session_key='autre-session', payload={})
+        response = self.client.get(reverse('templates:simulation_job_status', args=[job.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+@temp_media
+class SimulationCacheTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('templates:simulate')
+
+    def tearDown(self):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def _post_simulation(self, date_time=(2024, 1, 1, 0, 0, 0)):
+        data = {
+            'template_file': SimpleUploadedFile("template.xlsx", b"Fake Excel Content"),
+            'plasmids_zip': SimpleUploadedFile(
+                "plasmids.zip", plasmids_zip({'plasmid_1.gb': 'LOCUS       plasmid_1...'}, date_time)
+            ),
+            'mapping_file': SimpleUploadedFile("mapping.csv", b"pID;Name\np001;PromoterX"),
+            'enzyme': 'BsaI',
+        }
+        return self.client.post(self.url, data, HTTP_ACCEPT='application/json')
+
+    @patch('insillyclo.simulator.compute_all')
+    def test_identical_simulation_reuses_result(self, mock_compute):
+        def side_effect_compute(*args, **kwargs):
+            with open(os.path.join(kwargs['output_dir'], 'resultat_fake.gb'), 'w') as f:
+                f.write('Simulation reussie')
+        mock_compute.side_effect = side_effect_compute
+
+        first = self._post_simulation().json()['job_id']
+        jobs.run_pending()
+        # Mêmes plasmides re-zippés plus tard : même clé
+        second = self._post_simulation(date_time=(2025, 6, 1, 12, 30, 0)).json()['job_id']
+        jobs.run_pending()
+
+        # Le second job est servi depuis le cache
+        mock_compute.assert_called_once()
+        self.assertEqual(BackgroundJob.objects.get(id=second).status, 'done')
+        self.assertEqual(SimulationCacheEntry.objects.count(), 1)
+        stat = CacheStat.objects.get(name='simulation')
+        self.assertEqual((stat.hits, stat.misses), (1, 1))
+
+        with zipfile.ZipFile(BackgroundJob.objects.get(id=first).result_path) as z1, \
+                zipfile.ZipFile(BackgroundJob.objects.get(id=second).result_path) as z2:
+            self.assertEqual(z1.namelist(), z2.namelist())
+
+    def test_evict_keeps_total_size_under_limit(self):
+        for i in range(3):
+            entry = SimulationCacheEntry.objects.create(key=f"k{i}", size=100)
+            SimulationCacheEntry.objects.filter(pk=entry.pk).update(
+                last_used_at=timezone.now() - timedelta(minutes=10 - i)
+            )
+        deleted = caching.evict(max_age=timedelta(days=1), max_bytes=150)
+        self.assertEqual(deleted, 2)
+        self.assertEqual(list(SimulationCacheEntry.objects.values_list('key', flat=True)), ['k2'])
+
+
+@temp_media
+class ArchiveStoreTest(TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.archive = os.path.join(self.work_dir, 'plasmids.zip')
+        with zipfile.ZipFile(self.archive, 'w') as zf:
+            zf.writestr('pYTK001.gb', 'LOCUS       pYTK001')
+            zf.writestr('kit/pYTK002.gb', 'LOCUS       pYTK002')
+
+    def tearDown(self):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def test_archive_extracted_once_and_staged(self):
+        run1 = os.path.join(self.work_dir, 'run1')
+        run2 = os.path.join(self.work_dir, 'run2')
+        archive_store.extract_to(self.archive, run1)
+        with patch('zipfile.ZipFile.extractall') as mock_extract:
+            archive_store.extract_to(self.archive, run2)
+            mock_extract.assert_not_called()
+
+        entry = ExtractedArchive.objects.get()
+        self.assertEqual((entry.file_count, entry.hits), (2, 1))
+        with open(os.path.join(run2, 'kit', 'pYTK002.gb')) as f:
+            self.assertEqual(f.read(), 'LOCUS       pYTK002')
+
+    def test_evict_least_recently_used(self):
+        old_path = archive_store.extract(self.archive)
+        other = os.path.join(self.work_dir, 'other.zip')
+        with zipfile.ZipFile(other, 'w') as zf:
+            zf.writestr('pOther.gb', 'LOCUS       pOther')
+        digest = caching.archive_sha256(other)
+        archive_store.extract(other)
+        deleted = archive_store.evict(max_bytes=0, keep=digest)
+
+        self.assertEqual(deleted, 1)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(list(ExtractedArchive.objects.values_list('digest', flat=True)), [digest])
+
+
+@temp_media
+class SimulationResolutionTest(TestCase):
+    data_dir = Path(__file__).resolve().parent.parent / 'data_web' / 'Simple_assembly'
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('templates:simulate')
+
+    def tearDown(self):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def _post_simulation(self, gb_names, replaced=None):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            for name in gb_names:
+                if replaced and name in replaced:
+                    zf.writestr(name, replaced[name])
+                else:
+                    zf.write(self.data_dir / 'gb_Venus' / name, name)
+        data = {
+            'template_file': SimpleUploadedFile("template.xlsx", (self.data_dir / 'Campaign_Venus.xlsx').read_bytes()),
+            'plasmids_zip': SimpleUploadedFile("plasmids.zip", zip_buffer.getvalue()),
+            'mapping_file': SimpleUploadedFile("mapping.csv", (self.data_dir / 'iP_mapping_Simple.csv').read_bytes()),
+            'enzyme': 'BsaI',
+        }
+        response = self.client.post(self.url, data, HTTP_ACCEPT='application/json')
+        if response.status_code != 202:
+            return response
+        jobs.run_pending()
+        return BackgroundJob.objects.get(id=response.json()['job_id'])
+
+    @patch('insillyclo.simulator.compute_all')
+    def test_only_required_plasmids_are_staged(self, mock_compute):
+        def side_effect_compute(*args, **kwargs):
+            self.staged = sorted(p.name for p in kwargs['gb_plasmids'])
+            with open(os.path.join(kwargs['output_dir'], 'resultat_fake.gb'), 'w') as f:
+                f.write('Simulation reussie')
+        mock_compute.side_effect = side_effect_compute
+
+        job = self._post_simulation(os.listdir(self.data_dir / 'gb_Venus'))
+
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(self.staged, ['pMYT039.gb', 'pYTK009.gb', 'pYTK014.gb', 'pYTK018.gb',
+                                       'pYTK027.gb', 'pYTK033.gb', 'pYTK053.gb'])
+
+    @patch('insillyclo.simulator.compute_all')
+    def test_missing_plasmids_reported_before_simulation(self, mock_compute):
+        job = self._post_simulation(['pYTK009.gb', 'pYTK014.gb'])
+
+        mock_compute.assert_not_called()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('AmpRS1', job.error_message)
+
+    @patch('insillyclo.simulator.compute_all')
+    def test_badly_domesticated_plasmid_flagged_not_rejected(self, mock_compute):
+        import re
+        text = (self.data_dir / 'gb_Venus' / 'pYTK009.gb').read_text()
+        # Site BsaI supplémentaire au début de la séquence
+        text = re.sub(r'(ORIGIN\s+1 \w{10} )\w{10}', r'\1ggtctcaaaa', text, count=1)
+        job = self._post_simulation(os.listdir(self.data_dir / 'gb_Venus'), replaced={'pYTK009.gb': text})
+
+        # La simulation est mise en file et exécutée ; le worker signale le plasmide
+        self.assertIsInstance(job, BackgroundJob)
+        mock_compute.assert_called_once()
+        status = self.client.get(reverse('templates:simulation_job_status', args=[job.id])).json()
+        self.assertEqual(status['warnings'], ['pYTK009 : 1 site(s) BsaI interne(s)'])
+
+
+class SimulationTimingTest(TestCase):
+    def test_observer_times_simulator_steps(self):
+        import insillyclo.models
+        import insillyclo.parser
+        original = insillyclo.parser.parse_assembly_and_plasmid_from_template
+        timer = timing.StageTimer({'upload': 0.5})
+        observer = timing.TimingObserver(timer, debug=False, fail_on_error=True)
+
+        with observer.timing_steps():
+            insillyclo.parser.parse_assembly_and_plasmid_from_template(
+                Path(__file__).resolve().parent.parent / 'data_web' / 'Simple_assembly' / 'Campaign_Venus.xlsx',
+                input_part_factory=insillyclo.models.InputPartDataClassFactory(),
+                assembly_factory=insillyclo.models.AssemblyDataClassFactory(),
+                plasmid_factory=insillyclo.models.PlasmidDataClassFactory(),
+                observer=observer,
+            )
+
+        self.assertIs(insillyclo.parser.parse_assembly_and_plasmid_from_template, original)
+        self.assertIn('simulator.parse_template', timer.timings)
+        self.assertEqual(timer.timings['upload'], 0.5)
+
+    def test_admin_summary_percentiles(self):
+        from django.contrib.auth import get_user_model
+        admin_user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass'
+        )
+        for i in range(1, 21):
+            Campaign.objects.create(name=f"c{i}", timings={'compute_all': float(i)})
+
+        self.assertEqual(timing.summarize(Campaign.objects.values_list('timings', flat=True)),
+                         [('compute_all', 20, 10.0, 19.0)])
+
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:gestionTemplate_campaign_changelist'))
+        self.assertContains(response, 'id="timing-summary"')
+
+
+class PlasmidFeatureTest(TestCase):
+    def test_features_normalized_at_ingest(self):
+        from gestionTemplate.models import PlasmidFeature
+        gb_dir = Path(__file__).resolve().parent.parent / 'data_web' / 'pYTK'
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            zf.write(gb_dir / 'pYTK002.gb', 'pYTK002.gb')
+        records, errors = ingest.parse_archive(zip_buffer, 'kit')
+        plasmides, created = ingest.ingest_records(records)
+
+        plasmide = created[0]
+        self.assertEqual(plasmide.feature_summary, "ConS, ConS scar, ColE1, CamR, CamR Promoter")
+        self.assertEqual(Plasmide.objects.get(pk=plasmide.pk).feature_summary, plasmide.feature_summary)
+        rows = PlasmidFeature.objects.filter(plasmide=plasmide)
+        self.assertEqual(rows.count(), len(records[0]['features']))
+        cons = rows.get(label='ConS')
+        self.assertIsNotNone(cons.start)
+        self.assertIn('label', cons.qualifiers)
+
+        # Les lignes de la banque affichent le résumé, sans parser les features
+        from django.template.loader import render_to_string
+        response = self.client.get(reverse('templates:plasmid_search'), {'privacy': 'public', 'name': 'pytk002'})
+        html = render_to_string('gestionTemplates/partials/plasmid_rows.html',
+                                {'public_plasmids': response.context['public_plasmids']})
+        self.assertIn("ConS, ConS scar, ColE1", html)
+
+    def test_legacy_qualifier_list_is_normalized_on_save(self):
+        from gestionTemplate.models import PlasmidFeature
+        plasmide = Plasmide.objects.create(name='pLegacy', dossier='public',
+                                           features={'raw': [{'label': ['GFP']}, {'gene': ['bla']}]})
+        self.assertEqual(plasmide.feature_summary, 'GFP, bla')
+        self.assertEqual(list(PlasmidFeature.objects.filter(plasmide=plasmide).values_list('label', flat=True)),
+                         ['GFP', 'bla'])
+
+        plasmide.features = {'raw': 'CDS             1..10\n                     /label=mCherry'}
+        plasmide.save()
+        self.assertEqual(Plasmide.objects.get(pk=plasmide.pk).feature_summary, 'mCherry')
+        self.assertEqual(PlasmidFeature.objects.get(plasmide=plasmide).end, 10)
+
+        # Enregistrement sans changement des features : les lignes ne sont pas recréées
+        row_pk = PlasmidFeature.objects.get(plasmide=plasmide).pk
+        plasmide.description = 'Reporter'
+        plasmide.save()
+        self.assertEqual(PlasmidFeature.objects.get(plasmide=plasmide).pk, row_pk)
+
+    def test_map_labels_match_between_png_and_json(self):
+        from gestionTemplate import features
+        from gestionTemplate.plasmid_mapping import map_data
+        plasmide = Plasmide.objects.create(name='pAmp', features={
+            'raw': 'CDS             1..10\n                     /gene="bla"\n                     /label=AmpR'})
+        rows = plasmide.feature_set.all()
+        # Rendu des fichiers (qualificatifs complets) et JSON du navigateur (PlasmidFeature.label)
+        png = map_data('Amp', 10, 'circular', features.as_dicts(rows))
+        browser = map_data('Amp', 10, 'circular', rows.values('type', 'start', 'end', 'strand', 'label'))
+        self.assertEqual([f['label'] for f in png['features']], ['AmpR'])
+        self.assertEqual(png, browser)
+
+
+class ListingProjectionTest(TestCase):
+    def setUp(self):
+        self.sequence = 'ACGT' * 5000
+        for i in range(10):
+            Plasmide.objects.create(name=f"pBig{i:02d}", organism='Escherichia coli', length=len(self.sequence),
+                                    sequence=self.sequence, features={'raw': 'misc_feature    1..10\n' * 500})
+
+    def _fetched_bytes(self, queries):
+        """Volume des colonnes renvoyées par les SELECT capturés (ré-exécutés)."""
+        total = 0
+        with connection.cursor() as cursor:
+            for query in queries:
+                if query['sql'].startswith('SELECT') and 'gestiontemplate_plasmide' in query['sql'].lower():
+                    cursor.execute(query['sql'])
+                    total += sum(len(str(value)) for row in cursor.fetchall() for value in row if value is not None)
+        return total
+
+    def test_listings_do_not_fetch_sequences(self):
+        from django.contrib.auth import get_user_model
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('templates:plasmid_search'), {'privacy': 'public'})
+        self.assertEqual(len(response.context['public_plasmids']), 10)
+        # Une séquence seule pèse 20 000 octets : la liste entière doit rester bien en dessous
+        self.assertLess(self._fetched_bytes(ctx.captured_queries), 2000)
+
+        admin = get_user_model().objects.create_superuser(username='admin', email='a@example.com', password='pass')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin:gestionTemplate_plasmide_changelist'))
+        self.assertContains(response, 'pBig09')
+        self.assertLess(self._fetched_bytes(ctx.captured_queries), 4000)
+
+    def test_sequence_window(self):
+        plasmide = Plasmide.objects.get(name='pBig00')
+        url = reverse('templates:plasmid_sequence', args=[plasmide.pk])
+        data = self.client.get(url, {'start': 2, 'end': 10}).json()
+        self.assertEqual(data['sequence'], self.sequence[2:10])
+        self.assertEqual((data['start'], data['end'], data['length']), (2, 10, 20000))
+
+        with self.settings(SEQUENCE_WINDOW_MAX=100):
+            data = self.client.get(url, {'start': 19950}).json()
+        self.assertEqual(data['sequence'], self.sequence[19950:])
+        self.assertEqual(data['end'], 20000)
+        self.assertEqual(self.client.get(url, {'start': 'a'}).status_code, 400)
+
+
+def fake_render_maps(length, features, name, outputs):
+    """Remplace le rendu matplotlib : une « carte » de 100 octets par fichier."""
+    for path, fmt, dpi in [output for kind_outputs in outputs.values() for output in kind_outputs]:
+        with open(path, 'wb') as fh:
+            fh.write(fmt.encode().ljust(100, b' '))
+
+
+@patch('gestionTemplate.map_cache.render_plasmid_maps', side_effect=fake_render_maps)
+class MapCacheTest(TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_dir, ignore_errors=True)
+        self.gb_path = Path(__file__).resolve().parent.parent / 'data_web' / 'pYTK' / 'pYTK002.gb'
+
+    def test_maps_rendered_once_and_served_with_long_cache(self, render):
+        with self.settings(MEDIA_ROOT=self.media_dir):
+            maps = map_cache.plasmid_maps(str(self.gb_path))
+            # Même contenu lu depuis une archive : aucun nouveau rendu
+            self.assertEqual(map_cache.plasmid_maps(self.gb_path.read_bytes(), name='pYTK002'), maps)
+            self.assertEqual(render.call_count, 1)
+            circular_url = maps.circular
+
+            response = self.client.get(circular_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/png')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('max-age=31536000', response['Cache-Control'])
+            self.assertEqual(self.client.get(circular_url.replace('circulaire', 'autre')).status_code, 404)
+
+            # Vignette, PNG écran et SVG viennent d'une seule mise en page
+            outputs = render.call_args.args[3]
+            self.assertEqual([(fmt, dpi) for path, fmt, dpi in outputs['circulaire']],
+                             [('png', 30), ('png', 100), ('svg', None)])
+            response = self.client.get(maps.lineaire['svg'])
+            self.assertEqual(response['Content-Type'], 'image/svg+xml')
+            self.assertIn('immutable', response['Cache-Control'])
+
+    def test_evicts_least_recently_used_maps(self, render):
+        with self.settings(MEDIA_ROOT=self.media_dir):
+            old_key = map_cache.plasmid_maps(str(self.gb_path)).key
+            new_maps = map_cache.plasmid_maps(self.gb_path.read_bytes(), name='pAutre')
+            new_key, new_url = new_maps.key, new_maps.linear
+            for kind in map_cache.KINDS:
+                for size in map_cache.SIZES:
+                    os.utime(map_cache.map_path(new_key, kind, size), (0, 0))
+
+            # Servir une carte la marque comme récente
+            self.client.get(new_url)
+            for kind in map_cache.KINDS:
+                for size in map_cache.SIZES:
+                    os.utime(map_cache.map_path(old_key, kind, size), (0, 0))
+            self.assertEqual(map_cache.evict(max_bytes=900), 1)
+            self.assertFalse(os.path.exists(map_cache.map_path(old_key, 'lineaire')))
+            self.assertTrue(os.path.exists(map_cache.map_path(new_key, 'circulaire')))
+
+    def test_eviction_runs_every_n_renders(self, render):
+        with self.settings(MEDIA_ROOT=self.media_dir, PLASMID_MAP_EVICT_EVERY=2), \
+                patch('gestionTemplate.map_cache.evict') as evict, patch.object(map_cache, '_renders_since_evict', 0):
+            for name in ('pA', 'pB', 'pC'):
+                map_cache.plasmid_maps(self.gb_path.read_bytes(), name=name)
+            self.assertEqual(render.call_count, 3)
+            self.assertEqual(evict.call_count, 1)
+
+    def test_plasmid_detail_draws_from_database_features(self, render):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            zf.write(self.gb_path, 'pYTK002.gb')
+        records, errors = ingest.parse_archive(zip_buffer, 'kit')
+        plasmides, created = ingest.ingest_records(records)
+        url = reverse('templates:plasmid_detail', args=[created[0].pk])
+
+        # Aucun fichier GenBank n'est relu : tout vient de Plasmide / PlasmidFeature
+        with self.settings(MEDIA_ROOT=self.media_dir), patch('gestionTemplate.map_cache.parse_genbank') as parse:
+            # La requête ne dessine rien : fichiers à télécharger confiés aux workers
+            response = self.client.get(url)
+            self.assertContains(response, 'Export SVG en préparation')
+            maps = response.context['maps']
+            render.assert_not_called()
+
+            jobs.run_pending(kinds=[BackgroundJob.KIND_MAPS])
+            response = self.client.get(url)
+            self.assertNotContains(response, 'Export SVG en préparation')
+            self.assertContains(response, maps.lineaire['svg'])
+        parse.assert_not_called()
+        self.assertEqual(render.call_count, 1)
+        length, features = render.call_args.args[:2]
+        self.assertEqual(length, 1856)
+        self.assertEqual(len(features), len(records[0]['features']))
+        cons = next(f for f in features if f['qualifiers'].get('label') == ['ConS'])
+
+        from gestionTemplate.plasmid_mapping import feature_to_graphic
+        graphic = feature_to_graphic(cons)
+        self.assertEqual((graphic.start, graphic.end, graphic.label), (cons['start'], cons['end'], 'ConS'))
+        self.assertIsNone(feature_to_graphic({'type': 'source', 'start': 0, 'end': 10}))
+
+    def test_map_data_endpoint_for_client_side_rendering(self, render):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            zf.write(self.gb_path, 'pYTK002.gb')
+        records, errors = ingest.parse_archive(zip_buffer, 'kit')
+        plasmides, created = ingest.ingest_records(records)
+        url = reverse('templates:plasmid_map_data', args=[created[0].pk])
+
+        # Le plasmide, puis ses features sur l'index (plasmide, start)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        data = response.json()
+        self.assertEqual((data['name'], data['length'], data['topology']), ('YTK002', 1856, 'circular'))
+        drawn = [f for f in records[0]['features'] if f['type'] != 'source']
+        self.assertEqual(len(data['features']), len(drawn))
+        cons = next(f for f in data['features'] if f['label'] == 'ConS')
+        self.assertEqual(cons['color'], FEATURE_COLORS.get(cons['type'], FEATURE_COLORS['default']))
+        self.assertEqual(
+            [(f['start'], f['end']) for f in data['features']],
+            sorted((f['start'], f['end']) for f in drawn),
+        )
+
+        # Données inchangées : 304 sans lire les features
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        render.assert_not_called()
+
+
+class SequenceIndexTest(TestCase):
+    def setUp(self):
+        import random
+        rng = random.Random(42)
+        self.seqs = {name: ''.join(rng.choice('ACGT') for _ in range(3000)) for name in ('pA', 'pB', 'pC')}
+        self.ids = {name: Plasmide.objects.create(name=name, sequence=seq).pk for name, seq in self.seqs.items()}
+
+    def test_forward_reverse_and_origin_spanning_hits(self):
+        from gestionTemplate import seqindex
+        self.assertTrue(SequenceKmer.objects.filter(plasmide_id=self.ids['pA']).exists())
+
+        forward = self.seqs['pA'][1000:1025]
+        reverse = seqindex.reverse_complement(self.seqs['pB'][2000:2030])
+        origin = self.seqs['pC'][-12:] + self.seqs['pC'][:12]
+        # k-mers, candidats, plasmides non indexés
+        with self.assertNumQueries(3):
+            self.assertEqual(seqindex.matching_ids(forward), {self.ids['pA']})
+        self.assertEqual(seqindex.matching_ids(reverse), {self.ids['pB']})
+        self.assertEqual(seqindex.matching_ids(origin.lower()), {self.ids['pC']})
+        # Requête courte : filtre SQL, origine comprise
+        self.assertEqual(seqindex.matching_ids(self.seqs['pC'][-5:] + self.seqs['pC'][:5]), {self.ids['pC']})
+
+    def test_reindex_on_sequence_change(self):
+        from gestionTemplate import seqindex
+        p = Plasmide.objects.get(pk=self.ids['pA'])
+        old = self.seqs['pA'][100:130]
+        p.sequence = self.seqs['pB']
+        p.save()
+        self.assertEqual(seqindex.matching_ids(old), set())
+        self.assertEqual(seqindex.matching_ids(self.seqs['pB'][500:530]), {self.ids['pA'], self.ids['pB']})
+
+
+class RestrictionSiteTest(TestCase):
+    def test_sites_indexed_and_filtered(self):
+        from gestionTemplate import sites
+        gb = Path(__file__).resolve().parent.parent / 'data_web' / 'pYTK' / 'pYTK001.gb'
+        part = Plasmide.objects.create(name='pYTK001', sequence=parse_genbank(gb)['sequence'])
+        # Trois sites BsaI, dont un à cheval sur l'origine
+        filler = 'ATGC' * 50
+        multi = Plasmide.objects.create(
+            name='multi', sequence='CTC' + filler + 'GGTCTCAACGT' + filler + 'GAGACC' + filler + 'GGT'
+        )
+
+        bsmbi = list(part.restriction_sites.filter(enzyme='BsmBI').values_list('position', 'strand', 'overhang'))
+        self.assertEqual(bsmbi, [(5, -1, 'CCGA'), (1023, 1, 'GACC')])
+        self.assertEqual(multi.restriction_sites.filter(enzyme='BsaI').count(), 3)
+
+        everything = Plasmide.objects.all()
+        self.assertEqual(list(sites.filter_by_sites(everything, 'BsmBI', count=2)), [part])
+        self.assertEqual(list(sites.filter_by_sites(everything, 'BsaI', no_internal=True)), [part])
+        self.assertEqual(
+            sorted((name, count) for name, count, message in sites.domestication_issues(everything, 'BsaI')),
+            [('multi', 3), ('pYTK001', 0)],
+        )
+
+
+class FulltextSearchTest(TestCase):
+    def test_ranked_substring_search_kept_in_sync(self):
+        from gestionTemplate import fulltext
+        exact = Plasmide.objects.create(name='pVenus', organism='Escherichia coli')
+        described = Plasmide.objects.create(name='pYTK047', description='Venus reporter part')
+        Plasmide.objects.create(name='pYTK001', organism='Escherichia coli')
+
+        ids = fulltext.search('plasmide', {None: 'venus'})
+        self.assertEqual(ids, [exact.pk, described.pk])
+        self.assertEqual(
+            [p.name for p in fulltext.ranked(Plasmide.objects.all(), 'plasmide', {'name': 'TK0', 'organism': 'coli'})],
+            ['pYTK001'],
+        )
+
+        described.description = ''
+        described.save()
+        exact.delete()
+        self.assertEqual(fulltext.search('plasmide', {None: 'venus'}), [])
+        # Terme trop court pour les trigrammes : filtre icontains
+        self.assertEqual(fulltext.search('plasmide', {'name': 'pY'}), None)
+        self.assertEqual(len(fulltext.ranked(Plasmide.objects.all(), 'plasmide', {'name': 'pY'})), 2)
+
+    def test_public_template_search_uses_index(self):
+        CampaignTemplate.objects.create(name='Assemblage Venus', isPublic=True)
+        CampaignTemplate.objects.create(name='Venus privé', isPublic=False)
+        response = self.client.get(reverse('templates:search_public_templates'), {'q': 'venu'}, HTTP_HX_REQUEST='true')
+        self.assertEqual([t.name for t in response.context['templates']], ['Assemblage Venus'])
+
+    def test_search_filtered_before_ranking(self):
+        from gestionTemplate import fulltext
+        for i in range(3):
+            Plasmide.objects.create(name=f'pVenus{i}')
+        mine = Plasmide.objects.create(name='pYTK047', description='Venus reporter part', organism='Venus')
+        # Le plasmide filtré est classé après les autres : il reste trouvé malgré la limite
+        self.assertEqual(fulltext.search('plasmide', {None: 'venus'}, Plasmide.objects.filter(name='pYTK047'), limit=1), [mine.pk])
+        self.assertEqual(list(fulltext.ranked(Plasmide.objects.filter(organism='Venus'), 'plasmide', {'name': 'ytk'})), [mine])
+
+
+class KeysetPaginationTest(TestCase):
+    def test_public_bank_pages_follow_cursor(self):
+        for i in range(5):
+            Plasmide.objects.create(name=f"pYTK00{i}", organism='Escherichia coli')
+        url = reverse('templates:plasmid_search')
+
+        seen = []
+        response = self.client.get(url, {'privacy': 'public', 'page_size': 2})
+        page = response.context['public_plasmids']
+        seen += [p.name for p in page]
+        while page.has_next:
+            response = self.client.get(page.next_url, HTTP_HX_REQUEST='true')
+            # Page suivante : seules les lignes sont rendues
+            self.assertTemplateUsed(response, 'gestionTemplates/partials/plasmid_rows.html')
+            self.assertTemplateNotUsed(response, 'gestionTemplates/plasmid_search.html')
+            page = response.context['public_plasmids']
+            self.assertLessEqual(len(page), 2)
+            seen += [p.name for p in page]
+        self.assertEqual(seen, [f"pYTK00{i}" for i in range(5)])
+
+        # Résultats classés de l'index plein texte : même parcours par curseur
+        response = self.client.get(url, {'privacy': 'public', 'page_size': 3, 'organism': 'coli'})
+        page = response.context['public_plasmids']
+        self.assertEqual(len(page), 3)
+        response = self.client.get(page.next_url, HTTP_HX_REQUEST='true')
+        self.assertEqual(len(response.context['public_plasmids']), 2)
+        self.assertFalse(response.context['public_plasmids'].has_next)
+
+    def test_private_tabs_are_paginated(self):
+        from django.contrib.auth import get_user_model
+        from users.models import Equipe, MembreEquipe, Seqcollection
+        user = get_user_model().objects.create_user(username='bob', email='bob@example.com', password='testpass')
+        for i in range(3):
+            Campaign.objects.create(name=f'camp{i}', user=user)
+        # Équipe B créée avant A : l'ordre alphabétique diffère de l'ordre des identifiants
+        teams = [Equipe.objects.create(name=name, leader=user) for name in ('B', 'A')]
+        for team in teams:
+            MembreEquipe.objects.create(user=user, equipe=team)
+            for i in range(2):
+                Seqcollection.objects.create(name=f'{team.name}{i}', equipe=team, fichier='equipes/docs/x.zip')
+        self.client.force_login(user)
+        url = reverse('templates:plasmid_search')
+
+        response = self.client.get(url, {'privacy': 'private', 'filter': 'mine', 'page_size': 2})
+        self.assertEqual([c['campaign'].name for c in response.context['campaigns_with_plasmids']], ['camp2', 'camp1'])
+        self.assertNotIn('public_plasmids', response.context)
+        response = self.client.get(response.context['campaigns_page'].next_url, HTTP_HX_REQUEST='true')
+        self.assertTemplateUsed(response, 'gestionTemplates/partials/campaign_plasmids.html')
+        self.assertEqual([c['campaign'].name for c in response.context['campaigns_with_plasmids']], ['camp0'])
+
+        seen = []
+        response = self.client.get(url, {'privacy': 'private', 'filter': 'team_collections', 'page_size': 3})
+        seen += [c['collection'].name for c in response.context['team_collections']]
+        self.assertContains(response, 'Équipe : B', count=1)
+        response = self.client.get(response.context['team_collections_page'].next_url, HTTP_HX_REQUEST='true')
+        seen += [c['collection'].name for c in response.context['team_collections']]
+        self.assertEqual(seen, ['A1', 'A0', 'B1', 'B0'])
+        # Le groupe de B se poursuit : pas de second en-tête d'équipe
+        self.assertNotContains(response, 'Équipe : B')
+
+
+class ArchiveCatalogTest(TestCase):
+    def test_private_search_reads_catalog_not_zip(self):
+        from django.contrib.auth import get_user_model
+        user = get_user_model().objects.create_user(username='bob', email='bob@example.com', password='testpass')
+        campaign = Campaign.objects.create(name='camp', user=user)
+        Plasmide.objects.create(name='pYTK002', dossier='public')
+
+        zip_buffer = io.BytesIO()
+        gb_dir = Path(__file__).resolve().parent.parent / 'data_web' / 'pYTK'
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            for name in ('pYTK001.gb', 'pYTK002.gb'):
+                zf.write(gb_dir / name, name)
+            zf.writestr('broken.gb', b'not a genbank file')
+        catalog.index_archive(zip_buffer, ArchiveMember.SOURCE_RESULT, name_from_locus=True, campaign=campaign)
+        self.assertEqual(ArchiveMember.objects.filter(campaign=campaign).count(), 3)
+
+        # La campagne n'a aucun fichier sur disque : tout vient du catalogue
+        self.client.force_login(user)
+        response = self.client.get(reverse('templates:plasmid_search'),
+                                   {'privacy': 'private', 'filter': 'mine', 'site': 'camr'})
+        results = response.context['campaigns_with_plasmids'][0]['plasmids_results']
+        by_name = {m.name: m for m in results}
+        self.assertIn('pYTK001', by_name)
+        self.assertFalse(by_name['pYTK001'].is_public)
+        self.assertTrue(any(m.error for m in results))
+
+        response = self.client.get(reverse('templates:plasmid_search'),
+                                   {'privacy': 'private', 'filter': 'mine', 'name': 'pytk002'})
+        results = response.context['campaigns_with_plasmids'][0]['plasmids_results']
+        self.assertEqual([m.name for m in results if not m.error], ['pYTK002'])
+        self.assertTrue(next(m for m in results if m.name == 'pYTK002').is_public)
+
+        # Recherche par séquence : index k-mer du catalogue
+        member = ArchiveMember.objects.get(campaign=campaign, name='pYTK001')
+        self.assertTrue(member.sequence_indexed and member.kmers.exists())
+        fragment = member.sequence[1000:1030]
+        response = self.client.get(reverse('templates:plasmid_search'),
+                                   {'privacy': 'private', 'filter': 'mine', 'sequence': fragment})
+        results = response.context['campaigns_with_plasmids'][0]['plasmids_results']
+        self.assertEqual([m.name for m in results if not m.error], ['pYTK001'])
+
+
+class ResultManifestTest(TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_dir, ignore_errors=True)
+        self.gb_path = Path(__file__).resolve().parent.parent / 'data_web' / 'pYTK' / 'pYTK002.gb'
+        self.dilution = [{'plasmid_id': 'p1', 'h2o_volume': 2.5}]
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.write(self.gb_path, 'output/pYTK002.gb')
+            zf.writestr('output/digestion.png', b'\x89PNG global')
+            zf.writestr(zipfile.ZipInfo('output/pYTK002-digestion.png'), b'\x89PNG plasmide')  # non compressé
+            zf.writestr('output/dilution-10x.json', json.dumps(self.dilution))
+            zf.writestr('output/plasmids.xml', '<sbol/>')
+        self.archive = zip_buffer.getvalue()
+
+    def test_result_views_answer_from_manifest(self):
+        with self.settings(MEDIA_ROOT=self.media_dir):
+            campaign = Campaign.objects.create(name='camp', enzyme='BsaI')
+            campaign.result_file.save('resultats.zip', ContentFile(self.archive), save=True)
+            result_manifest.store(campaign)
+            catalog.index_archive(campaign.result_file.path, ArchiveMember.SOURCE_RESULT,
+                                  name_from_locus=True, campaign=campaign)
+            entries = {e['path']: e for e in Campaign.objects.get(pk=campaign.pk).result_manifest}
+            self.assertEqual(
+                {(e['category'], e['plasmid']) for e in entries.values()},
+                {('genbank', 'pYTK002'), ('digestion', ''), ('digestion', 'pYTK002'), ('dilution', ''), ('other', '')},
+            )
+            self.assertEqual(entries['output/pYTK002-digestion.png']['compression'], zipfile.ZIP_STORED)
+
+            # Les vues ne parcourent plus le zip : seuls les octets du membre sont lus
+            with patch('gestionTemplate.views.zipfile.ZipFile', side_effect=AssertionError("zip ouvert")):
+                response = self.client.get(reverse('templates:campaign_digestion', args=[campaign.pk]))
+                self.assertEqual([i['filename'] for i in response.context['images']],
+                                 ['digestion.png', 'pYTK002-digestion.png'])
+                self.assertEqual(response.context['dilutions']['10x']['data'], self.dilution)
+
+                response = self.client.get(reverse('templates:campaign_digestion_image', args=[campaign.pk]),
+                                           {'file': 'pytk002-digestion.png'})
+                self.assertEqual(b''.join(response.streaming_content), b'\x89PNG plasmide')
+
+                response = self.client.get(reverse('templates:campaign_dilution_download', args=[campaign.pk]),
+                                           {'type': '10x'})
+                self.assertIn(b'plasmid_id,h2o_volume', b''.join(response.streaming_content))
+
+                # Clé et données de carte lues dans le catalogue : aucun membre relu ni parsé
+                with patch('gestionTemplate.result_manifest.read', side_effect=AssertionError("membre lu")), \
+                        patch('gestionTemplate.map_cache.parse_genbank', side_effect=AssertionError("parsé")):
+                    response = self.client.get(reverse('templates:user_view_plasmid', args=[campaign.pk]))
+                [(name, maps, data)] = response.context['plasmid_maps']
+                self.assertEqual((name, data['name']), ('pYTK002', 'YTK002'))
+                self.assertEqual(maps.key, map_cache.plasmid_maps(str(self.gb_path), render=False).key)
+                self.assertIn('plasmids.xml', response.context['files'])
+
+
+    def test_result_images_served_with_etag_and_range(self):
+        with self.settings(MEDIA_ROOT=self.media_dir):
+            campaign = Campaign.objects.create(name='camp')
+            campaign.result_file.save('resultats.zip', ContentFile(self.archive), save=True)
+            result_manifest.store(campaign)
+            url = reverse('templates:campaign_digestion_image', args=[campaign.pk])
+            params = {'file': 'output/digestion.png'}
+
+            response = self.client.get(url, params)
+            etag = response['ETag']
+            self.assertEqual(etag, result_manifest.etag(result_manifest.find(campaign, 'digestion.png')))
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+            self.assertIn('private', response['Cache-Control'])
+            self.assertEqual(b''.join(response.streaming_content), b'\x89PNG global')
+
+            # Image déjà en cache dans le navigateur : 304 sans corps
+            self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+            response = self.client.get(url, params, HTTP_RANGE='bytes=1-3')
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response['Content-Range'], 'bytes 1-3/11')
+            self.assertEqual(b''.join(response.streaming_content), b'PNG')
+            self.assertEqual(self.client.get(url, params, HTTP_RANGE='bytes=50-').status_code, 416)
+            # If-Range d'une autre version : fichier entier
+            self.assertEqual(self.client.get(url, params, HTTP_RANGE='bytes=1-3', HTTP_IF_RANGE='"autre"').status_code, 200)
+
+            with self.settings(FILE_SERVING_OFFLOAD='x-accel-redirect', FILE_SERVING_ACCEL_PREFIX='/protected/'):
+                response = self.client.get(url, params)
+            self.assertTrue(response['X-Accel-Redirect'].startswith(f'/protected/result_members/{campaign.pk}/'))
+            self.assertEqual(response.content, b'')
+
+            campaign.delete()
+            self.assertFalse(os.path.exists(result_manifest.cache_dir(campaign)))
+
+
+class DilutionTableTest(TestCase):
+    def test_dilutions_loaded_once_and_exported_as_stream(self):
+        media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_dir, ignore_errors=True)
+        rows = [{'plasmid_id': f'p{i}', 'h2o_volume': i / 2, 'well': f'A{i}'} for i in range(384)]
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('output/dilution-direct.json', json.dumps(rows))
+            zf.writestr('output/dilution-10x.json', 'pas du json')
+
+        with self.settings(MEDIA_ROOT=media_dir):
+            campaign = Campaign.objects.create(name='camp', enzyme='BsaI')
+            campaign.result_file.save('resultats.zip', ContentFile(zip_buffer.getvalue()), save=True)
+            result_manifest.store(campaign)
+            tables = dilution_tables.load(campaign)
+            self.assertEqual([t.dilution_type for t in tables], ['direct'])
+            self.assertEqual(tables[0].columns, ['plasmid_id', 'h2o_volume', 'well'])
+            self.assertEqual(DilutionRow.objects.filter(table=tables[0]).count(), 384)
+
+            # Plus aucune lecture du zip : la page et les exports lisent la base
+            url = reverse('templates:campaign_dilution_download', args=[campaign.pk])
+            with patch('gestionTemplate.result_manifest.read', side_effect=AssertionError("zip lu")):
+                response = self.client.get(reverse('templates:campaign_digestion', args=[campaign.pk]))
+                self.assertEqual(len(response.context['dilutions']['direct']['data']), 384)
+
+                response = self.client.get(url, {'type': 'direct'})
+                self.assertTrue(response.streaming)
+                lines = b''.join(response.streaming_content).decode().splitlines()
+                self.assertEqual(lines[0], 'plasmid_id,h2o_volume,well')
+                self.assertEqual(lines[3], 'p2,1.0,A2')
+                self.assertEqual(len(lines), 385)
+
+                response = self.client.get(url, {'type': 'direct', 'format': 'xlsx'})
+                from openpyxl import load_workbook
+                sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+                self.assertEqual(sheet.max_row, 385)
+                self.assertEqual([c.value for c in sheet[2]], ['p0', 0, 'A0'])
+                self.assertEqual(self.client.get(url, {'type': '10x'}).status_code, 404)
+
+            # Campagne sans résultat : 404 sans chercher de table
+            empty = Campaign.objects.create(name='vide')
+            with patch('gestionTemplate.dilution_tables.tables', side_effect=AssertionError("tables lues")):
+                response = self.client.get(reverse('templates:campaign_dilution_download', args=[empty.pk]),
+                                           {'type': 'direct'})
+            self.assertEqual(response.status_code, 404)
+
+
+class MappingPreviewTest(TestCase):
+    def test_mapping_parsed_once_at_upload(self):
+        from django.contrib.auth import get_user_model
+        media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_dir, ignore_errors=True)
+        user = get_user_model().objects.create_user(username='dora', email='dora@example.com', password='testpass')
+        content = 'pID;Name\n' + ''.join(f'p{i};plasmide {i}\n' for i in range(50))
+
+        with self.settings(MEDIA_ROOT=media_dir, MAPPING_PREVIEW_ROWS=5):
+            mt = MappingTemplate.objects.create(name='Table A', user=user, is_public=True,
+                                                mapping_file=ContentFile(content.encode(), name='table.csv'))
+            mapping = CorrespondanceTable.objects.get(mapping_template=mt).mapping
+            self.assertEqual(mapping['columns'], ['pID', 'Name'])
+            self.assertEqual(mapping['preview'][4], ['p4', 'plasmide 4'])
+            self.assertEqual((len(mapping['preview']), mapping['row_count']), (5, 50))
+
+            # La liste n'ouvre aucun fichier
+            with patch('gestionTemplate.mapping_tables.read', side_effect=AssertionError("fichier relu")):
+                response = self.client.get(reverse('templates:ct_search'))
+                self.assertEqual(response.context['public_tables'].items[0]['row_count'], 50)
+                mt.description = 'modifiée'
+                mt.save()
+
+            # Nouveau fichier : l'aperçu est recalculé
+            mt.mapping_file.save('table.csv', ContentFile(b'pID;Name\nq1;autre\n'))
+            mapping = CorrespondanceTable.objects.get(mapping_template=mt).mapping
+            self.assertEqual((mapping['preview'], mapping['row_count']), ([['q1', 'autre']], 1))
+
+            # Fichier remplacé sous le même nom : l'empreinte du contenu change, l'aperçu aussi
+            with open(mt.mapping_file.path, 'wb') as fh:
+                fh.write(b'pID;Name\nr1;encore\nr2;autre\n')
+            mt.save()
+            mapping = CorrespondanceTable.objects.get(mapping_template=mt).mapping
+            self.assertEqual(mapping['row_count'], 2)
+            self.assertEqual(mapping['file_hash'], MappingTemplate.objects.get(pk=mt.pk).file_hash)
+
+
+class TemplatePreviewTest(TestCase):
+    def test_preview_computed_once_per_file_content(self):
+        from openpyxl import Workbook
+        media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_dir, ignore_errors=True)
+        wb = Workbook()
+        sheet = wb.active
+        for row in (['Assembly settings'], ['Restriction enzyme', 'BsaI'], ['Name', 'Projet Venus'],
+                    ['Output separator', '-'], [], ['Output plasmid id', 'OutputType', 'Promoter', 'CDS']):
+            sheet.append(row)
+        for i in range(30):
+            sheet.append([f'pOut{i}', '', f'pYTK0{i:02d}', 'pYTK047'])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+
+        with self.settings(MEDIA_ROOT=media_dir, TEMPLATE_PREVIEW_ROWS=10):
+            original = CampaignTemplate(name='Venus', isPublic=True)
+            original.template_file.save('venus.xlsx', ContentFile(buffer.getvalue()), save=True)
+            copy = CampaignTemplate.objects.create(name='Copie de Venus', isPublic=True, template_file=original.template_file.name)
+            self.assertEqual(TemplatePreview.objects.count(), 1)
+            preview = TemplatePreview.objects.get()
+            self.assertEqual(CampaignTemplate.objects.get(pk=copy.pk).file_hash, preview.file_hash)
+            self.assertEqual((preview.enzyme, preview.project_name, preview.output_separator), ('BsaI', 'Projet Venus', '-'))
+            self.assertEqual(preview.columns, ['Output plasmid id', 'OutputType', 'Promoter', 'CDS'])
+            self.assertEqual(preview.rows[9], ['pOut9', '', 'pYTK009', 'pYTK047'])
+            self.assertEqual((len(preview.rows), preview.row_count), (10, 30))
+
+            # La page de recherche n'ouvre aucun fichier
+            with patch('gestionTemplate.template_previews.read_sheet', side_effect=AssertionError("fichier lu")):
+                response = self.client.get(reverse('templates:template_search'))
+            self.assertEqual([t['row_count'] for t in response.context['public_templates'].items], [30, 30])
+
+            original.delete()
+            self.assertTrue(TemplatePreview.objects.exists())
+            copy.delete()
+            self.assertFalse(TemplatePreview.objects.exists())
+
 
 class PublishTemplateTest(TestCase):
     def setUp(self):
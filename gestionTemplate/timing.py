@@ -0,0 +1,100 @@
+"""
+Mesure de la durée de chaque étape d'une simulation.
+
+StageTimer accumule les durées par étape (secondes) ; elles sont enregistrées
+dans Campaign.timings et résumées dans l'admin (p50 / p95 par étape).
+TimingObserver chronomètre en plus les étapes internes de compute_all.
+"""
+import importlib
+import math
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import insillyclo.observer
+
+# Étapes internes de insillyclo chronométrées : (module, fonction, nom de l'étape)
+SIMULATOR_STEPS = [
+    ('insillyclo.parser', 'parse_assembly_and_plasmid_from_template', 'parse_template'),
+    ('insillyclo.simulator', 'fetch_gb_for_input_parts', 'fetch_gb'),
+    ('insillyclo.simulator', 'override_from_concentration_file_and_update', 'concentrations'),
+    ('insillyclo.simulator', 'instantiate_plasmid_to_assemble', 'instantiate'),
+    ('insillyclo.simulator', 'assemble_to_seq_record', 'assemble'),
+    ('insillyclo.gel', 'enzyme_digestion_to_gel', 'digestion_gel'),
+    ('insillyclo.gel', 'pcr_amplification_to_gel', 'pcr_gel'),
+    ('insillyclo.dilution', 'compute_all_dilutions', 'dilutions'),
+]
+
+
+class StageTimer:
+    """Accumule la durée des étapes nommées."""
+
+    def __init__(self, initial=None):
+        self.timings = dict(initial or {})
+
+    def add(self, name, seconds):
+        self.timings[name] = round(self.timings.get(name, 0) + seconds, 4)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+
+class TimingObserver(insillyclo.observer.InSillyCloCliObserver):
+    """
+    Observateur insillyclo qui chronomètre les étapes internes du simulateur.
+    L'observateur n'ayant que des notifications, les fonctions de SIMULATOR_STEPS
+    sont enveloppées le temps de l'appel (un worker = un processus).
+    """
+
+    def __init__(self, timer, prefix='simulator.', **kwargs):
+        super().__init__(**kwargs)
+        self.timer = timer
+        self.prefix = prefix
+
+    def _wrap(self, func, name):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            with self.timer.stage(self.prefix + name):
+                return func(*args, **kwargs)
+        return timed
+
+    @contextmanager
+    def timing_steps(self):
+        originals = []
+        try:
+            for module_name, attr, name in SIMULATOR_STEPS:
+                module = importlib.import_module(module_name)
+                original = getattr(module, attr)
+                setattr(module, attr, self._wrap(original, name))
+                originals.append((module, attr, original))
+            yield self
+        finally:
+            for module, attr, original in reversed(originals):
+                setattr(module, attr, original)
+
+
+def percentile(values, p):
+    """Percentile par rang le plus proche (values triées)."""
+    if not values:
+        return None
+    rank = max(0, math.ceil(p / 100 * len(values)) - 1)
+    return values[rank]
+
+
+def summarize(timings_list):
+    """Retourne [(étape, nombre, p50, p95)] à partir d'une liste de dictionnaires de durées."""
+    by_stage = {}
+    for timings in timings_list:
+        for stage, seconds in (timings or {}).items():
+            by_stage.setdefault(stage, []).append(seconds)
+
+    summary = []
+    for stage, values in sorted(by_stage.items()):
+        values.sort()
+        summary.append((stage, len(values), percentile(values, 50), percentile(values, 95)))
+    return summary
@@ -15,6 +15,8 @@ urlpatterns = [
     path('delete/<int:template_id>/',views.delete_template, name="delete_template"),
     path('delete_campaign/<int:campaign_id>/',views.delete_campaign, name="delete_campaign"),
     path('simulate/', views.simulate, name="simulate"),
+    path('simulate/jobs/<int:job_id>/', views.simulation_job_status, name='simulation_job_status'),
+    path('simulate/jobs/<int:job_id>/download/', views.simulation_job_download, name='simulation_job_download'),
     path('view/', views.view_plasmid, name="view_plasmid"),
     path('simulate/view_plasmid/<int:campaign_id>/', views.user_view_plasmid, name='user_view_plasmid'),
     path('simulate/<int:campaign_id>/digestion/', views.campaign_digestion, name='campaign_digestion'),
@@ -28,6 +30,9 @@ urlpatterns = [
     path('make_public_bulk/', views.make_public_bulk, name='make_public_bulk'),
     path('plasmid/download/', views.download_plasmid, name='download_plasmid'),
     path('plasmid/<int:plasmid_id>/', views.plasmid_detail, name='plasmid_detail'),
+    path('plasmid/<int:plasmid_id>/sequence/', views.plasmid_sequence, name='plasmid_sequence'),
+    path('plasmid/<int:plasmid_id>/map.json', views.plasmid_map_data, name='plasmid_map_data'),
+    path('plasmid/maps/<str:key>/<str:name>', views.plasmid_map, name='plasmid_map'),
     path('download/my_collection/<int:collection_id>/', views.download_my_collection, name='download_my_collection'),
     path('collection/<int:collection_id>/plasmid/<str:plasmid_name>/download/', views.download_single_plasmid, name='download_single_plasmid'),
     path('download_correspondance_table/<int:table_id>/', views.download_ct, name='download_ct'),
@@ -1,5 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import FileResponse, HttpResponse, Http404
+from django.http import FileResponse, HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
 from urllib.parse import quote, unquote
 from django.conf import settings
@@ -9,12 +9,14 @@ from django.forms import inlineformset_factory
 from django.db import transaction
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.db.models import Q, Exists, OuterRef, Prefetch
+from django.db.models.functions import Length, Substr
 
 
-from .models import CampaignTemplate, Campaign, ColumnTemplate, PlasmidCollection, MappingTemplate, Plasmide, PublicationRequest, CorrespondanceTable
+from .models import CampaignTemplate, Campaign, ColumnTemplate, PlasmidCollection, MappingTemplate, Plasmide, PublicationRequest, CorrespondanceTable, BackgroundJob, ArchiveMember
 from .forms import CampaignTemplateForm, AnonymousSimulationForm, ColumnForm, UploadFileForm
-from .plasmid_mapping import generate_plasmid_maps
+from . import jobs, file_serving, ingest, catalog, seqindex, sites, fulltext, pagination, features, dilution_tables, map_cache, map_render, mapping_tables, plasmid_mapping, result_manifest, simulation, template_previews
 from users.models import Seqcollection
 
 from Bio import SeqIO
@@ -22,6 +24,7 @@ from io import TextIOWrapper
 import pandas as pd
 import uuid
 import os
+import time
 import pathlib
 import zipfile
 import tarfile
@@ -86,7 +89,12 @@ def dashboard(request):
             Q(isPublic=True) | Q(id__in=anonymous_template_ids)
         ).order_by('-created_at')
         previous_sim = None
-    
+
+    # Listes paginées par curseur ; les pages suivantes sont chargées par HTMX
+    liste_templates = pagination.paginate(request, liste_templates, ordering=('-created_at', '-pk'), param='templates_after')
+    if previous_sim is not None:
+        previous_sim = pagination.paginate(request, previous_sim, ordering=('-created_at', '-pk'), param='sims_after')
+
     context = {
         'liste_templates': liste_templates,
         'previous_sim': previous_sim,
@@ -94,6 +102,12 @@ def dashboard(request):
         'anonymous_template_ids': anonymous_template_ids,
     }
 
+    if request.headers.get('HX-Request'):
+        if not liste_templates.is_first:
+            return render(request, 'gestionTemplates/partials/dashboard_template_rows.html', context)
+        if previous_sim is not None and not previous_sim.is_first:
+            return render(request, 'gestionTemplates/partials/campaign_items.html', context)
+
     return render(request, 'gestionTemplates/dashboard.html', context)
 
 
@@ -139,24 +153,12 @@ def create_template(request):
 
 # Upload
 def process_template(file, user=None, is_public=False):
-    df_raw = pd.read_excel(file, header=None)
+    metadata, df_plasmids = template_previews.split_sheet(pd.read_excel(file, header=None))
 
     # Extraction des métadonnées
-    enzyme = df_raw.iloc[1, 1]
-    project_name = df_raw.iloc[2, 1]
-    output_separator = df_raw.iloc[3, 1]
-
-    # Trouver la ligne de départ
-    start_row = 0
-    for i, row in df_raw.iterrows():
-        if "Output plasmid id" in str(row[0]):
-            start_row = i
-            break
-
-    df_plasmids = df_raw.iloc[start_row:].copy()
-    df_plasmids.columns = df_plasmids.iloc[0]
-    df_plasmids = df_plasmids[1:]
-    df_plasmids = df_plasmids.dropna(subset=[df_plasmids.columns[0]])
+    enzyme = metadata['enzyme']
+    project_name = metadata['project_name']
+    output_separator = metadata['output_separator']
 
     # Créer le CampaignTemplate
     campaign_template = CampaignTemplate.objects.create(
@@ -308,31 +310,13 @@ def submit(request):
                         plasmid_archive=plasmid_archive
                     )
                     
-                    # Parser et créer les Plasmide depuis l'archive ZIP
-                    import tempfile
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        temp_path = pathlib.Path(temp_dir)
-                        
-                        # Extraire l'archive
-                        with zipfile.ZipFile(plasmid_archive) as z:
-                            z.extractall(temp_path)
-                        
-                        # Trouver tous les fichiers .gb
-                        for gb_file in temp_path.glob('**/*.gb'):
-                            try:
-                                # Parser le fichier et créer le Plasmide
-                                plasmide = Plasmide.create_from_genbank(
-                                    str(gb_file),
-                                    dossier_nom=collection_name
-                                )
-                                # Lier le plasmide à la collection
-                                collection.plasmides.add(plasmide)
-                                # Lier l'utilisateur au plasmide
-                                if request.user.is_authenticated:
-                                    plasmide.user = request.user
-                                    plasmide.save()
-                            except Exception as e:
-                                print(f"Erreur parsing {gb_file.name}: {str(e)}")
+                    # Parser toute l'archive puis créer les Plasmide en une transaction
+                    records, errors = ingest.parse_archive(plasmid_archive, dossier_nom=collection_name)
+                    for member, error in errors:
+                        print(f"Erreur parsing {member}: {error}")
+                    ingest.ingest_records(records, user=request.user, collection=collection)
+                    # Catalogue du contenu de l'archive pour la recherche privée
+                    catalog.index_records(records, errors, ArchiveMember.SOURCE_COLLECTION, collection=collection)
                     
                     message = f"✅ Collection '{collection_name}' créée avec succès ! ({collection.plasmides.count()} plasmides détectés)"
                     # Rafraîchir la liste
@@ -430,20 +414,17 @@ def simulate(request):
     template_name = 'gestionTemplates/sim.html'
     
     if request.method == 'POST':
+        # Le corps multipart est lu à l'accès à request.FILES : le chrono inclut la réception
+        upload_started = time.perf_counter()
         form = AnonymousSimulationForm(request.POST, request.FILES)
         if form.is_valid():
+            campaign_instance = None
             try:
                 unique_id = str(uuid.uuid4())
                 BASE_MEDIA = pathlib.Path(settings.MEDIA_ROOT)
                 SANDBOX_DIR = BASE_MEDIA / 'temp_uploads' / unique_id
-                
-                PLASMIDS_DIR = SANDBOX_DIR / 'plasmids'
-                OUTPUT_DIR = SANDBOX_DIR / 'output'
-                PLASMIDS_DIR.mkdir(parents=True, exist_ok=True)
-                OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+                SANDBOX_DIR.mkdir(parents=True, exist_ok=True)
 
-                campaign_instance = None
-                
                 # =========================================================
                 # Vérifier les sources de fichiers (upload vs existants)
                 # =========================================================
@@ -480,6 +461,21 @@ def simulate(request):
                     mapping_source = 'upload'
                 else:
                     raise ValueError("Aucun fichier de correspondance fourni")
+
+                # === PRÉPARATION PARAMÈTRES COMMUNS ===
+                pairs_data = form.cleaned_data['primer_pairs']
+                final_primer_pairs = None
+                if pairs_data and pairs_data.strip():
+                    parts = [p.strip() for p in pairs_data.split(',')]
+                    if len(parts) >= 2:
+                        final_primer_pairs = [[parts[0], parts[1]]]
+
+                payload = {
+                    'sandbox': str(SANDBOX_DIR),
+                    'enzyme': form.cleaned_data['enzyme'] or None,
+                    'default_concentration': form.cleaned_data['default_concentration'] or 200.0,
+                    'primer_pairs': final_primer_pairs,
+                }
                 
                 # =========================================================
                 # CAS 1 : UTILISATEUR CONNECTÉ (Sauvegarde en BDD)
@@ -489,7 +485,7 @@ def simulate(request):
                     campaign_instance = Campaign(
                         user=request.user,
                         name=f"sim_{unique_id[:8]}", 
-                        status=Campaign.STATUS_RUNNING,
+                        status=Campaign.STATUS_PENDING,
                         
                         # Options simples
                         enzyme=form.cleaned_data.get('enzyme'),
@@ -519,7 +515,6 @@ def simulate(request):
                         campaign_instance.concentration_file = request.FILES['concentration_file']
                     
                     # Options JSON
-                    pairs_data = form.cleaned_data.get('primer_pairs')
                     options_dict = {}
                     if pairs_data:
                         options_dict['primer_pairs'] = pairs_data
@@ -571,64 +566,23 @@ def simulate(request):
                         # Ne pas interrompre la simulation si la publication échoue
                         print(f"Erreur publication template: {e}")
 
-                    # B. Gestion des plasmides
+                    # B. Gestion des plasmides : le parsing de l'archive uploadée est fait par le worker
                     if plasmids_source == 'upload':
-                        # Gestion MANUELLE de l'archive ZIP sur le disque
-                        uploaded_zip = request.FILES['plasmids_zip']
-                        zip_path_on_disk = SANDBOX_DIR / "temp_plasmids.zip"
-                        
-                        with open(zip_path_on_disk, 'wb+') as destination:
-                            for chunk in uploaded_zip.chunks():
-                                destination.write(chunk)
-
-                        # Extraction de l'archive
-                        with zipfile.ZipFile(zip_path_on_disk, 'r') as zip_ref:
-                            zip_ref.extractall(PLASMIDS_DIR)
-                        
-                        # Parsing et Création des objets Plasmide en BDD
-                        # On parcourt tous les dossiers extraits pour trouver les .gb
-                        for root, dirs, files in os.walk(PLASMIDS_DIR):
-                            
-                            rel_path = os.path.relpath(root, PLASMIDS_DIR)
-                            current_dossier = rel_path if rel_path != "." else None
-
-                            for file in files:
-                                if file.lower().endswith('.gb') or file.lower().endswith('.gbk'):
-                                    full_file_path = os.path.join(root, file)
-                                    try:
-                                        new_plasmid = Plasmide.create_from_genbank(
-                                            full_file_path, 
-                                            dossier_nom=current_dossier
-                                        )
-                                        
-                                        new_plasmid.user = request.user
-                                        new_plasmid.save()
-                                        
-                                        campaign_instance.plasmids.add(new_plasmid)
-                                        
-                                    except Exception as e:
-                                        print(f"Erreur import plasmide {file}: {e}")
+                        archive_path = campaign_instance.plasmid_archive.path
                     else:
                         # Utiliser la collection existante
-                        campaign_instance.plasmids.set(collection_obj.plasmides.all())
+                        campaign_instance.plasmids.set(collection_obj.plasmides.values_list('pk', flat=True))
+                        archive_path = collection_obj.plasmid_archive.path
 
                     # E. Définition des chemins pour le simulateur
-                    full_template_path = pathlib.Path(campaign_instance.template_file.path)
-                    full_mapping_path = pathlib.Path(campaign_instance.mapping_file.path)
-                    
-                    # Extraction de l'archive stockée
-                    if plasmids_source == 'upload':
-                        archive_path = pathlib.Path(campaign_instance.plasmid_archive.path)
-                    else:
-                        # Utiliser l'archive de la collection
-                        archive_path = pathlib.Path(collection_obj.plasmid_archive.path)
-                    
-                    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                        zip_ref.extractall(PLASMIDS_DIR)
-                        
-                    # Chemins optionnels
-                    final_primers_path = pathlib.Path(campaign_instance.primers_file.path) if campaign_instance.primers_file else None
-                    final_conc_path = pathlib.Path(campaign_instance.concentration_file.path) if campaign_instance.concentration_file else None
+                    payload.update({
+                        'template_path': campaign_instance.template_file.path,
+                        'mapping_path': campaign_instance.mapping_file.path,
+                        'plasmids_archive': archive_path,
+                        'register_plasmids': plasmids_source == 'upload',
+                        'primers_path': campaign_instance.primers_file.path if campaign_instance.primers_file else None,
+                        'concentration_path': campaign_instance.concentration_file.path if campaign_instance.concentration_file else None,
+                    })
 
                 # =========================================================
                 # CAS 2 : UTILISATEUR ANONYME (Fichiers temporaires uniquement)
@@ -644,9 +598,7 @@ def simulate(request):
                     full_mapping_path = SANDBOX_DIR / pathlib.Path(fs.save("mapping.csv", f_mapping))
                     
                     f_zip = request.FILES['plasmids_zip']
-                    path_zip = pathlib.Path(fs.save("plasmids.zip", f_zip))
-                    with zipfile.ZipFile(SANDBOX_DIR / path_zip, 'r') as zip_ref:
-                        zip_ref.extractall(PLASMIDS_DIR)
+                    path_zip = SANDBOX_DIR / pathlib.Path(fs.save("plasmids.zip", f_zip))
                     
                     final_primers_path = None
                     if form.cleaned_data['primers_file']:
@@ -658,69 +610,54 @@ def simulate(request):
                         f_conc = request.FILES['concentration_file']
                         final_conc_path = SANDBOX_DIR / pathlib.Path(fs.save("concentrations.csv", f_conc))
 
-                # === 3 PRÉPARATION PARAMÈTRES COMMUNS ===
-                enzyme_data = form.cleaned_data['enzyme']
-                final_enzyme_names = [enzyme_data] if enzyme_data else None
-                final_default_conc = form.cleaned_data['default_concentration'] or 200.0
-                
-                pairs_data = form.cleaned_data['primer_pairs']
-                final_primer_pairs = None
-                if pairs_data and pairs_data.strip():
-                    parts = [p.strip() for p in pairs_data.split(',')]
-                    if len(parts) >= 2:
-                        final_primer_pairs = [(parts[0], parts[1])]
-
-                # === 4 LANCEMENT DE LA SIMULATION ===
-                observer = insillyclo.observer.InSillyCloCliObserver(debug=False, fail_on_error=True)
-                
-                insillyclo.simulator.compute_all(
-                    observer=observer,
-                    settings=None,
-                    input_template_filled=full_template_path,
-                    input_parts_files=[full_mapping_path],
-                    gb_plasmids=PLASMIDS_DIR.glob('**/*.gb'), # Cherche récursivement les .gb
-                    output_dir=OUTPUT_DIR,
-                    data_source=insillyclo.data_source.DataSourceHardCodedImplementation(),
-                    primers_file=final_primers_path,
-                    concentration_file=final_conc_path,
-                    primer_id_pairs=final_primer_pairs,
-                    enzyme_names=final_enzyme_names,
-                    default_mass_concentration=final_default_conc,
+                    payload.update({
+                        'template_path': str(full_template_path),
+                        'mapping_path': str(full_mapping_path),
+                        'plasmids_archive': str(path_zip),
+                        'register_plasmids': False,
+                        'primers_path': str(final_primers_path) if final_primers_path else None,
+                        'concentration_path': str(final_conc_path) if final_conc_path else None,
+                    })
+
+                    # La session permet de retrouver le job sans compte
+                    if not request.session.session_key:
+                        request.session.save()
+
+                # === DOMESTICATION : simples avertissements, la simulation est lancée quand même ===
+                # (archive uploadée : contrôle fait par le worker, visible dans le suivi du job)
+                warnings = []
+                if plasmids_source == 'collection' and payload.get('enzyme'):
+                    warnings = simulation.submission_warnings(collection_obj.plasmides.all(), payload['enzyme'])
+
+                # === MISE EN FILE DE LA SIMULATION ===
+                payload['timings'] = {'upload': round(time.perf_counter() - upload_started, 4)}
+                job = jobs.enqueue(
+                    BackgroundJob.KIND_SIMULATION,
+                    payload,
+                    campaign=campaign_instance,
+                    user=request.user if request.user.is_authenticated else None,
+                    session_key=request.session.session_key if not request.user.is_authenticated else '',
                 )
 
-                # === 5 PACKAGING ET SAUVEGARDE RÉSULTAT ===
-                if not os.listdir(OUTPUT_DIR):
-                    raise Exception("La simulation n'a produit aucun fichier.")
-
-                final_zip_name = f"resultats_{'user' if request.user.is_authenticated else 'anonymes'}_{unique_id}.zip"
-                final_zip_path = SANDBOX_DIR / final_zip_name
-                make_zipfile(str(OUTPUT_DIR), str(final_zip_path))
-
-                # === RETOUR ===
-                if campaign_instance:
-                    # Sauvegarde du résultat final en BDD
-                    with open(final_zip_path, 'rb') as f:
-                        campaign_instance.result_file.save(final_zip_name, File(f))
-                        campaign_instance.status = Campaign.STATUS_DONE
-                        campaign_instance.save()
-                    
-                    # Nettoyage dossier temporaire
-                    try:
-                        shutil.rmtree(SANDBOX_DIR)
-                    except OSError as e:
-                        print(f"Erreur nettoyage : {e}")
-
-                    # Pour l'utilisateur connecté, on redirige souvent vers le dashboard ou on renvoie le fichier stocké
-                    response = FileResponse(campaign_instance.result_file.open('rb'), as_attachment=True, filename=final_zip_name)
-                    response["X-Suggested-Filename"] = final_zip_name
-                    return response
-                else:
-                    # Anonyme : On laisse le fichier temporaire pour le téléchargement
-                    return FileResponse(open(final_zip_path, 'rb'), as_attachment=True, filename=final_zip_name)
+                job_data = {
+                    'job_id': job.id,
+                    'status': job.status,
+                    'status_url': reverse('templates:simulation_job_status', args=[job.id]),
+                    'warnings': warnings,
+                }
+                if 'application/json' in request.headers.get('Accept', ''):
+                    return JsonResponse(job_data, status=202)
+
+                context = {'form': AnonymousSimulationForm(), 'job': job_data}
+                if request.user.is_authenticated:
+                    context['existing_templates'] = CampaignTemplate.objects.filter(user=request.user).order_by('-created_at')
+                    context['plasmid_collections'] = PlasmidCollection.objects.filter(user=request.user).order_by('-created_at')
+                    context['mapping_templates'] = MappingTemplate.objects.filter(user=request.user).order_by('-created_at')
+                return render(request, template_name, context)
 
             except Exception as e:
                 # Gestion d'erreur (Statut Failed en BDD)
-                if campaign_instance:
+                if campaign_instance and campaign_instance.pk:
                     campaign_instance.status = Campaign.STATUS_FAILED
                     campaign_instance.error_message = str(e)
                     campaign_instance.save()
@@ -744,14 +681,51 @@ def simulate(request):
 
     return render(request, template_name, context)
 
-# Fonction utilitaire création zipfile
-def make_zipfile(source_dir, output_filename):
-    with zipfile.ZipFile(output_filename, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                zipf.write(os.path.join(root, file),
-                           os.path.relpath(os.path.join(root, file),
-                           os.path.join(source_dir, '..')))
+
+def _get_job_for_request(request, job_id):
+    """Retourne le job s'il appartient à l'utilisateur (ou à la session anonyme)."""
+    job = get_object_or_404(BackgroundJob, id=job_id)
+    if request.user.is_authenticated:
+        if job.user_id != request.user.id and not request.user.isAdministrator:
+            raise Http404
+    elif not job.session_key or job.session_key != request.session.session_key:
+        raise Http404
+    return job
+
+
+def simulation_job_status(request, job_id):
+    """Endpoint de suivi (polling) d'une simulation mise en file."""
+    job = _get_job_for_request(request, job_id)
+    data = {
+        'job_id': job.id,
+        'status': job.status,
+        'campaign_id': job.campaign_id,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'error': job.error_message,
+        'warnings': (job.campaign.options if job.campaign else job.payload).get('domestication', []),
+    }
+    if job.status == Campaign.STATUS_DONE:
+        data['download_url'] = reverse('templates:simulation_job_download', args=[job.id])
+    return JsonResponse(data)
+
+
+def simulation_job_download(request, job_id):
+    """Téléchargement de l'archive de résultats d'un job terminé."""
+    job = _get_job_for_request(request, job_id)
+    if job.status != Campaign.STATUS_DONE:
+        raise Http404("La simulation n'est pas terminée.")
+
+    if job.campaign and job.campaign.result_file:
+        final_zip_name = os.path.basename(job.campaign.result_file.name)
+        response = FileResponse(job.campaign.result_file.open('rb'), as_attachment=True, filename=final_zip_name)
+        response["X-Suggested-Filename"] = final_zip_name
+        return response
+
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise Http404("Le fichier de résultats a expiré.")
+    return FileResponse(open(job.result_path, 'rb'), as_attachment=True, filename=os.path.basename(job.result_path))
 
 
 def delete_template(request, template_id):
@@ -803,24 +777,16 @@ def view_plasmid(request):
             messages.error(request, "Le fichier doit être au format .gb (GenBank).")
             return redirect('templates:view_plasmid')
 
-        # Sauvegarde temporaire
-        upload_subdir = "temp_uploads/genbank_files"
-        upload_dir = os.path.join(settings.MEDIA_ROOT, upload_subdir)
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, plasmid_file.name)
-        with open(file_path, 'wb+') as destination:
-            for chunk in plasmid_file.chunks():
-                destination.write(chunk)
-
         try:
-            # Création ou récupération du plasmide
-            plasmide = Plasmide.create_from_genbank(file_path, dossier_nom=dossier_nom)
+            # Création ou récupération du plasmide, lu directement depuis l'upload :
+            # les cartes sont ensuite dessinées depuis la base, sans fichier temporaire
+            plasmide = Plasmide.create_from_genbank(plasmid_file, dossier_nom=dossier_nom)
             if request.user.is_authenticated:
                 plasmide.user = request.user
                 plasmide.save()
 
-            # Génération des cartes
-            linear_map, circular_map = generate_plasmid_maps(file_path)
+            # Cartes dessinées en arrière-plan depuis les features en base
+            map_render.plasmide_maps(plasmide)
 
             # Message de succès
             msg = f"Fichier '{plasmid_file.name}' traité avec succès."
@@ -848,60 +814,113 @@ def view_plasmid(request):
 
 
 def plasmid_detail(request, plasmid_id):
-    plasmide = get_object_or_404(Plasmide, id=plasmid_id)
-    file_path = os.path.join(settings.MEDIA_ROOT, "temp_uploads/genbank_files", f"{plasmide.name}.gb")
-
-    # Génération des cartes
-    linear_url, circular_url = generate_plasmid_maps(file_path)
+    plasmide = get_object_or_404(Plasmide.objects.listing(), id=plasmid_id)
 
+    # Cartes dessinées dans le navigateur (plasmid_map_data) ; les fichiers à
+    # télécharger sont servis depuis le cache, ou dessinés par un worker s'ils manquent
     return render(request, 'gestionTemplates/plasmid_detail.html', {
         'plasmide': plasmide,
-        'linear_map': linear_url,
-        'circular_map': circular_url
+        'maps': map_render.plasmide_maps(plasmide),
+        'map_data_url': reverse('templates:plasmid_map_data', args=[plasmide.pk]),
+    })
+
+
+def plasmid_map(request, key, name):
+    """
+    Carte mise en cache (name : lineaire_thumb.png, circulaire_svg.svg...) ;
+    l'URL contient l'empreinte du contenu, elle ne change jamais.
+    """
+    parsed = map_cache.parse_filename(name)
+    if parsed is None or len(key) != 64 or not all(c in '0123456789abcdef' for c in key):
+        raise Http404("Carte inconnue.")
+    kind, size = parsed
+    path = map_cache.map_path(key, kind, size)
+    content_type = 'image/svg+xml' if size == 'svg' else 'image/png'
+    try:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    except FileNotFoundError:
+        raise Http404("Carte absente du cache.")
+    map_cache.touch(key)
+    patch_cache_control(response, public=True, max_age=365 * 24 * 3600, immutable=True)
+    return response
+
+
+def plasmid_map_data(request, plasmid_id):
+    """
+    Données de la carte d'un plasmide en JSON (longueur, topologie, features avec
+    position, brin, type, libellé et couleur), dessinée dans le navigateur par
+    static/js/plasmid_map.js. Les features sont lues en une requête sur l'index
+    (plasmide, start), sans leurs qualificatifs ; l'ETag (empreinte des features)
+    évite même cette requête quand le navigateur a déjà les données.
+    """
+    plasmide = get_object_or_404(Plasmide.objects.only('name', 'length', 'topology', 'feature_hash'), id=plasmid_id)
+    etag = f'"{map_cache.plasmide_key(plasmide)}-{plasmide.topology}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        rows = plasmide.feature_set.values('type', 'start', 'end', 'strand', 'label')
+        response = JsonResponse(plasmid_mapping.map_data(
+            map_cache.display_name(plasmide.name), plasmide.length or 0, plasmide.topology, rows,
+        ))
+    response['ETag'] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def plasmid_sequence(request, plasmid_id):
+    """
+    Fenêtre [start, end[ (0-based) de la séquence d'un plasmide, en JSON.
+    Seule la tranche demandée est lue en base (SUBSTR), dans la limite de SEQUENCE_WINDOW_MAX bases.
+    """
+    max_window = getattr(settings, 'SEQUENCE_WINDOW_MAX', 10000)
+    try:
+        start = max(int(request.GET.get('start', 0)), 0)
+        end = int(request.GET.get('end', start + max_window))
+    except ValueError:
+        return JsonResponse({'error': "start et end doivent être des entiers."}, status=400)
+    if end < start:
+        return JsonResponse({'error': "end doit être supérieur ou égal à start."}, status=400)
+    end = min(end, start + max_window)
+
+    row = (
+        Plasmide.objects.filter(id=plasmid_id)
+        .annotate(total=Length('sequence'), window=Substr('sequence', start + 1, end - start))
+        .values('name', 'total', 'window')
+        .first()
+    )
+    if row is None:
+        raise Http404("Plasmide introuvable.")
+    return JsonResponse({
+        'id': plasmid_id,
+        'name': row['name'],
+        'length': row['total'],
+        'start': start,
+        'end': min(end, row['total']),
+        'sequence': row['window'] or '',
     })
 
 
 def user_view_plasmid(request, campaign_id):
     campaign = get_object_or_404(Campaign, id=campaign_id)
     plasmid_name = request.GET.get('plasmid', None)
-    plasmid_maps = []  # liste des tuples (nom, linear_url, circular_url)
+    plasmid_maps = []  # liste des triplets (nom, map_cache.Maps, données de la carte)
     files_in_zip = []  # liste des fichiers dans le zip (hors .gb)
 
     if campaign.result_file:
-        zip_path = campaign.result_file.path
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # filtrer les .gb et enlever les dossiers
-                gb_files = [
-                    f for f in zip_ref.namelist()
-                    if f.lower().endswith('.gb')
-                ]
-                #Tous les fichiers dans le zip, sauf les .gb
-                #Enlever le /output/ du début
-                files_in_zip = [
-                    f for f in zip_ref.namelist()
-                    if not f.lower().endswith('.gb')
-                ]
-                for i in range(len(files_in_zip)):
-                    if files_in_zip[i].startswith('output/'):
-                        files_in_zip[i] = files_in_zip[i][7:]
-                if plasmid_name:
-                    # Filtrer pour ne garder que le plasmide demandé
-                    gb_files = [f for f in gb_files if os.path.basename(f).replace('.gb', '') == plasmid_name]
-
-                for f in gb_files:
-                    # extraire le fichier dans un dossier temporaire
-                    temp_dir = os.path.join("temp_uploads", "gb_temp")
-                    os.makedirs(temp_dir, exist_ok=True)
-                    extracted_path = zip_ref.extract(f, path=temp_dir)
-
-                    # générer les cartes
-                    linear_url, circular_url = generate_plasmid_maps(extracted_path)
-                    # récupérer juste le nom du plasmide pour l'affichage
-                    plasmid_name = os.path.basename(f).replace('.gb', '')
-                    plasmid_maps.append((plasmid_name, linear_url, circular_url))
-
-        except zipfile.BadZipFile:
+            # Membres listés dans le manifeste du résultat : le zip n'est pas parcouru
+            entries = result_manifest.manifest(campaign)
+            #Tous les fichiers dans le zip, sauf les .gb
+            #Enlever le /output/ du début
+            files_in_zip = [
+                entry['path'][7:] if entry['path'].startswith('output/') else entry['path']
+                for entry in entries if entry['category'] != result_manifest.GENBANK
+            ]
+            # cartes dessinées dans le navigateur ; clé et données de carte lues dans le
+            # catalogue (ArchiveMember), fichiers à télécharger dessinés en arrière-plan
+            plasmid_maps = map_render.archive_maps(campaign, 'result_file', ArchiveMember.SOURCE_RESULT,
+                                                   plasmid_name)
+
+        except (zipfile.BadZipFile, OSError):
             plasmid_maps = []
 
     return render(request, 'gestionTemplates/user_view_plasmid.html', {
@@ -938,66 +957,36 @@ def campaign_digestion(request, campaign_id):
         per_pcr = []
         other_images = []
 
-        with zipfile.ZipFile(campaign.result_file.path, 'r') as z:
-            for f in z.namelist():
-                name = os.path.basename(f)
-                lower = name.lower()
-
-                # Images categorization
-                if lower.endswith(('.png', '.jpg', '.jpeg', '.gif')):
-                    if 'digestion' in lower:
-                        # Global digestion.png preferred first
-                        if os.path.basename(f).lower() == 'digestion.png':
-                            global_dig.append((f, name))
-                        else:
-                            per_dig.append((f, name))
-                    elif 'pcr' in lower:
-                        if os.path.basename(f).lower() == 'pcr.png':
-                            global_pcr.append((f, name))
-                        else:
-                            per_pcr.append((f, name))
+        # Membres classés à la fin de la simulation (Campaign.result_manifest) : le zip n'est pas parcouru
+        for entry in result_manifest.manifest(campaign):
+            f = entry['path']
+            name = os.path.basename(f)
+            lower = name.lower()
+
+            # Images categorization
+            if lower.endswith(result_manifest.IMAGE_EXTENSIONS):
+                if entry['category'] == result_manifest.DIGESTION:
+                    # Global digestion.png preferred first
+                    if not entry['plasmid']:
+                        global_dig.append((f, name))
                     else:
-                        other_images.append((f, name))
-
-                # Dilution JSON files
-                if lower.endswith('.json') and 'dilution' in lower:
-                    # Determine type key
-                    if '10x' in lower:
-                        key = '10x'
-                        pretty = 'Dilution 10x'
-                    elif 'direct' in lower or 'direct' in name.lower():
-                        key = 'direct'
-                        pretty = 'Dilution Direct'
+                        per_dig.append((f, name))
+                elif entry['category'] == result_manifest.PCR:
+                    if not entry['plasmid']:
+                        global_pcr.append((f, name))
                     else:
-                        key = 'other'
-                        pretty = name
-
-                    try:
-                        raw = z.read(f)
-                        data = json.loads(raw.decode('utf-8'))
-                        # compute columns (ordered)
-                        cols = set()
-                        for r in data:
-                            cols.update(r.keys())
-                        # prefer an order: plasmid_id, h2o_volume, buffer, then others
-                        ordered = []
-                        for pref in ('plasmid_id', 'h2o_volume', 'buffer'):
-                            if pref in cols:
-                                ordered.append(pref)
-                                cols.remove(pref)
-                        ordered.extend(sorted(cols))
-
-                        download_url = reverse('templates:campaign_dilution_download', args=[campaign.id]) + f'?type={key}'
-
-                        dilutions[key] = {
-                            'label': pretty,
-                            'data': data,
-                            'columns': ordered,
-                            'download_url': download_url,
-                        }
-                    except Exception:
-                        # ignore malformed JSON for now
-                        continue
+                        per_pcr.append((f, name))
+                else:
+                    other_images.append((f, name))
+
+        # Tables de dilution chargées en base à la fin de la simulation
+        for table in dilution_tables.tables(campaign):
+            dilutions[table.dilution_type] = {
+                'label': dilution_tables.label(table),
+                'data': list(dilution_tables.iter_values(table)),
+                'columns': table.columns,
+                'download_url': reverse('templates:campaign_dilution_download', args=[campaign.id]) + f'?type={table.dilution_type}',
+            }
 
         # Build ordered images list: global digestion, global pcr, per-plasmid digestion, per-plasmid pcr, then others
         def mkitem(tup, kind_hint=None):
@@ -1024,14 +1013,10 @@ def campaign_digestion(request, campaign_id):
                 'error': "Aucune image ou dilution pertinente trouvée dans les résultats."
             })
 
-        # Prepare a JSON dump for client-side charts
-        dilutions_json = {k: v['data'] for k, v in dilutions.items()}
-
         return render(request, 'gestionTemplates/digestion.html', {
             'campaign': campaign,
             'images': images,
             'dilutions': dilutions,
-            'dilutions_json': json.dumps(dilutions_json),
         })
 
     except zipfile.BadZipFile:
@@ -1054,39 +1039,44 @@ def campaign_digestion_image(request, campaign_id):
 
     file_in_zip = unquote(file_param)
 
-    try:
-        with zipfile.ZipFile(campaign.result_file.path, 'r') as z:
-            namelist = z.namelist()
-
-            # Accepter soit le chemin interne, soit seulement le basename
-            if file_in_zip not in namelist:
-                matches = [f for f in namelist if os.path.basename(f).lower() == os.path.basename(file_in_zip).lower()]
-                if matches:
-                    file_in_zip = matches[0]
-                else:
-                    raise Http404
-
-            data = z.read(file_in_zip)
-            ext = os.path.splitext(file_in_zip)[1].lower()
-            if ext == '.png':
-                ctype = 'image/png'
-            elif ext in ('.jpg', '.jpeg'):
-                ctype = 'image/jpeg'
-            elif ext == '.gif':
-                ctype = 'image/gif'
-            else:
-                ctype = 'application/octet-stream'
+    # Accepter soit le chemin interne, soit seulement le basename
+    entry = result_manifest.find(campaign, file_in_zip)
+    if entry is None:
+        raise Http404
 
-            response = HttpResponse(data, content_type=ctype)
-            if request.GET.get('download') == '1':
-                response['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_in_zip)}"'
-            return response
-    except zipfile.BadZipFile:
+    try:
+        # Extrait une seule fois, puis envoyé depuis le disque (sendfile, Range, X-Accel-Redirect)
+        path = result_manifest.extracted_path(campaign, entry)
+        last_modified = os.path.getmtime(campaign.result_file.path)
+    except (zipfile.BadZipFile, OSError):
         raise Http404
 
+    file_in_zip = entry['path']
+    ext = os.path.splitext(file_in_zip)[1].lower()
+    if ext == '.png':
+        ctype = 'image/png'
+    elif ext in ('.jpg', '.jpeg'):
+        ctype = 'image/jpeg'
+    elif ext == '.gif':
+        ctype = 'image/gif'
+    else:
+        ctype = 'application/octet-stream'
+
+    # ETag fort dérivé du CRC du membre : le navigateur revalide sans retélécharger
+    return file_serving.serve_file(
+        request, path, ctype,
+        etag=result_manifest.etag(entry),
+        last_modified=last_modified,
+        filename=os.path.basename(file_in_zip),
+        as_attachment=request.GET.get('download') == '1',
+    )
+
 
 def campaign_dilution_download(request, campaign_id):
-    """Retourne un CSV généré à partir du fichier dilution (type=10x|direct|other) présent dans le zip de résultats."""
+    """
+    Exporte une table de dilution (type=10x|direct|other) en CSV, ou en XLSX avec format=xlsx.
+    Les lignes sont lues en base par paquets et envoyées au fil de l'eau.
+    """
     campaign = get_object_or_404(Campaign, id=campaign_id)
 
     if not campaign.result_file:
@@ -1097,49 +1087,38 @@ def campaign_dilution_download(request, campaign_id):
         raise Http404
 
     try:
-        with zipfile.ZipFile(campaign.result_file.path, 'r') as z:
-            matches = []
-            for f in z.namelist():
-                name = os.path.basename(f).lower()
-                if 'dilution' in name:
-                    if dtype == '10x' and '10x' in name:
-                        matches.append(f)
-                    elif dtype == 'direct' and 'direct' in name:
-                        matches.append(f)
-                    elif dtype == 'other' and '10x' not in name and 'direct' not in name:
-                        matches.append(f)
-
-            if not matches:
-                raise Http404
-
-            # Pick first match
-            target = matches[0]
-            raw = z.read(target)
-            data = json.loads(raw.decode('utf-8'))
-
-            # Build CSV
-            fieldnames = set()
-            for row in data:
-                fieldnames.update(row.keys())
-            # keep stable order
-            ordered = []
-            for pref in ('plasmid_id', 'h2o_volume', 'buffer'):
-                if pref in fieldnames:
-                    ordered.append(pref)
-                    fieldnames.remove(pref)
-            ordered.extend(sorted(fieldnames))
-
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=ordered)
-            writer.writeheader()
-            for row in data:
-                writer.writerow({k: row.get(k, '') for k in ordered})
-
-            resp = HttpResponse(output.getvalue(), content_type='text/csv')
-            resp['Content-Disposition'] = f'attachment; filename="{os.path.basename(target)}.csv"'
-            return resp
-    except zipfile.BadZipFile:
+        table = next((t for t in dilution_tables.tables(campaign) if t.dilution_type == dtype), None)
+    except (zipfile.BadZipFile, OSError):
         raise Http404
+    if table is None:
+        raise Http404
+
+    filename = os.path.basename(table.member_path)
+    if request.GET.get('format') == 'xlsx':
+        return FileResponse(
+            dilution_tables.xlsx_file(table), as_attachment=True, filename=f"{filename}.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    resp = StreamingHttpResponse(dilution_tables.iter_csv(table), content_type='text/csv')
+    resp['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return resp
+
+
+def _search_public_plasmids(request, query_name, query_organism, query_seq, query_site,
+                            site_enzyme, site_count, no_internal_site):
+    """Page (pagination par curseur) de la banque de plasmides filtrée."""
+    plasmides_qs = Plasmide.objects.listing()
+    if query_seq:
+        plasmides_qs = plasmides_qs.filter(pk__in=seqindex.matching_ids(query_seq, plasmides_qs))
+    if site_enzyme in sites.ENZYMES:
+        plasmides_qs = sites.filter_by_sites(plasmides_qs, site_enzyme, count=site_count, no_internal=no_internal_site)
+    # Nom, organisme et features : index plein texte, résultats classés par pertinence
+    plasmides_qs = fulltext.ranked(plasmides_qs, 'plasmide', {
+        'name': query_name, 'organism': query_organism, 'features': query_site,
+    })
+
+    # Les libellés affichés sont précalculés (Plasmide.feature_summary)
+    return pagination.paginate(request, plasmides_qs, ordering=('name', 'pk'))
 
 
 def plasmid_search(request):
@@ -1150,6 +1129,11 @@ def plasmid_search(request):
     query_seq = request.GET.get('sequence', '').upper().strip()
     query_site = request.GET.get('site', '').lower().strip()
     filter_type = request.GET.get('filter', 'public')  # 'public' ou 'mine'
+    # Filtres sur les sites de restriction précalculés (RestrictionSite)
+    site_enzyme = request.GET.get('site_enzyme', '')
+    site_count = request.GET.get('site_count', '').strip()
+    site_count = int(site_count) if site_count.isdigit() else None
+    no_internal_site = bool(request.GET.get('no_internal_site'))
 
     context = {}
 
@@ -1186,249 +1170,122 @@ def plasmid_search(request):
     # Cas 2 : recherche privée
     # -------------------------------
     elif privacy == "private" and request.user.is_authenticated:
-        campaigns = Campaign.objects.filter(user=request.user).order_by('-created_at')
-        campaigns_with_plasmids = []
-
-        # Précharger tous les noms publics pour optimisation
-        public_names = set(Plasmide.objects.filter(dossier="public").values_list('name', flat=True))
-
-        for camp in campaigns:
-            plasmids_in_archive = []
-            plasmids_in_results = []
-
-            # Fonction utilitaire pour filtrer par critères
-            def match_criteria(p):
-                if query_name and query_name not in p["name"].lower():
-                    return False
-                if query_organism and query_organism not in p["organism"].lower():
-                    return False
-                if query_seq and query_seq not in p.get("sequence", ""):
-                    return False
-                if query_site:
-                    if not any(query_site in s.lower() for s in p.get("sites", [])):
-                        return False
-                return True
-
-            # Fonction pour extraire plasmides depuis un zip
-            def extract_plasmids_from_zip(zip_path):
-                results = []
-                try:
-                    with zipfile.ZipFile(zip_path, 'r') as zf:
-                        for f in zf.namelist():
-                            if f.lower().endswith(('.gb', '.gbk')):
-                                try:
-                                    with zf.open(f) as gb_file:
-                                        text_stream = TextIOWrapper(gb_file, encoding='utf-8')
-                                        for record in SeqIO.parse(text_stream, "genbank"):
-                                            p = {
-                                                "name": record.name,
-                                                "organism": record.annotations.get("organism", ""),
-                                                "length": len(record.seq),
-                                                "sequence": str(record.seq),
-                                                "sites": [feat.qualifiers.get("gene",[None])[0] for feat in record.features if "gene" in feat.qualifiers]
-                                            }
-                                            if match_criteria(p):
-                                                p["is_public"] = p["name"] in public_names
-                                                results.append(p)
-                                except Exception as e:
-                                    results.append({"name": f"{f} (Erreur parsing: {e})"})
-                except Exception as e:
-                    results.append({"name": f"Erreur lecture archive : {e}"})
-                return results
-
-            if camp.plasmid_archive:
-                plasmids_in_archive = extract_plasmids_from_zip(camp.plasmid_archive.path)
-            if camp.result_file:
-                plasmids_in_results = extract_plasmids_from_zip(camp.result_file.path)
-
-            campaigns_with_plasmids.append({
-                'campaign': camp,
-                'plasmids_archive': plasmids_in_archive,
-                'plasmids_results': plasmids_in_results
-            })
-
-        context['campaigns_with_plasmids'] = campaigns_with_plasmids
-
         # -------------------------------
         # Banque publique pour l'onglet privé
         # -------------------------------
-        public_plasmids_qs = Plasmide.objects.all()
-        if query_name:
-            public_plasmids_qs = public_plasmids_qs.filter(name__icontains=query_name)
-        if query_organism:
-            public_plasmids_qs = public_plasmids_qs.filter(organism__icontains=query_organism)
-        if query_seq:
-            public_plasmids_qs = public_plasmids_qs.filter(sequence__icontains=query_seq)
-        if query_site:
-            public_plasmids_qs = public_plasmids_qs.filter(features__icontains=query_site)
-
-        # Transformer features en labels affichables
-        public_plasmids = []
-        for p in public_plasmids_qs:
-            display_features = []
-            raw_features = getattr(p, 'features', None)
-
-            # Cas dict ou liste ou autre
-            lines = []
-            if isinstance(raw_features, dict) and 'raw' in raw_features:
-                lines = str(raw_features['raw']).splitlines()
-            elif isinstance(raw_features, list):
-                for f in raw_features:
-                    if isinstance(f, dict) and 'raw' in f:
-                        lines.extend(str(f['raw']).splitlines())
-                    elif isinstance(f, str):
-                        lines.extend(f.splitlines())
-            # else on ignore None ou autre type
-
-            for line in lines:
-                line = line.strip()
-                if line.startswith('/label='):
-                    display_features.append(line.replace('/label=', '').strip())
-                elif line.startswith('/allele='):
-                    display_features.append(line.replace('/allele=', '').strip())
-
-            p.display_features = ", ".join(display_features[:5])
-            public_plasmids.append(p)
-
-        context['public_plasmids'] = public_plasmids
         context['filter_type'] = filter_type
+        if filter_type == 'public':
+            context['public_plasmids'] = _search_public_plasmids(request, query_name, query_organism, query_seq,
+                                                                 query_site, site_enzyme, site_count, no_internal_site)
+            if request.headers.get('HX-Request') and not context['public_plasmids'].is_first:
+                return render(request, 'gestionTemplates/partials/plasmid_rows.html', context)
+
+        # Le contenu des archives est lu dans le catalogue (ArchiveMember), sans rouvrir les zips
+        is_public = Exists(Plasmide.objects.filter(dossier="public", name=OuterRef('name')))
+        members_qs = ArchiveMember.objects.defer('sequence', 'map_data').annotate(is_public=is_public)
+        # Seul l'onglet affiché est calculé, par pages (curseur) ; les pages suivantes sont chargées par HTMX
+        is_next_page = request.headers.get('HX-Request')
+
+        if filter_type == 'mine':
+            criteria = Q()
+            if query_name:
+                criteria &= Q(name__icontains=query_name)
+            if query_organism:
+                criteria &= Q(organism__icontains=query_organism)
+            if query_seq:
+                # Index k-mer du catalogue, limité aux archives de l'utilisateur
+                own_members = ArchiveMember.objects.filter(
+                    Q(campaign__user=request.user) | Q(collection__user=request.user)
+                    | Q(team_collection__equipe__in=request.user.equipes_membres.all())
+                )
+                criteria &= Q(pk__in=seqindex.matching_ids(query_seq, own_members))
+            if query_site:
+                criteria &= Q(feature_labels__icontains=query_site)
+            # Les fichiers illisibles restent affichés avec leur erreur
+            campaign_members = members_qs.filter(criteria | ~Q(error=''))
+
+            campaigns = Campaign.objects.filter(user=request.user).prefetch_related(
+                Prefetch('archive_members', queryset=campaign_members, to_attr='catalog_members')
+            )
+            page = pagination.paginate(request, campaigns, ordering=('-created_at', '-pk'), param='campaigns_after')
+            context['campaigns_page'] = page
+            context['campaigns_with_plasmids'] = [
+                {
+                    'campaign': camp,
+                    'plasmids_archive': [m for m in camp.catalog_members if m.source == ArchiveMember.SOURCE_ARCHIVE],
+                    'plasmids_results': [m for m in camp.catalog_members if m.source == ArchiveMember.SOURCE_RESULT],
+                }
+                for camp in page
+            ]
+            if is_next_page and not page.is_first:
+                return render(request, 'gestionTemplates/partials/campaign_plasmids.html', context)
 
         # -------------------------------
         # Collections personnelles
         # -------------------------------
-        my_collections_qs = PlasmidCollection.objects.filter(user=request.user).order_by('-created_at')
-        collections_with_plasmids = []
-
-        def extract_plasmids_from_zip(zip_path):
-            results = []
-            try:
-                with zipfile.ZipFile(zip_path, 'r') as zf:
-                    for f in zf.namelist():
-                        if f.lower().endswith(('.gb', '.gbk')):
-                            try:
-                                with zf.open(f) as gb_file:
-                                    text_stream = TextIOWrapper(gb_file, encoding='utf-8')
-                                    for record in SeqIO.parse(text_stream, "genbank"):
-                                        # On prend le nom du fichier pour éviter "exported"
-                                        name = f.split('/')[-1].rsplit('.', 1)[0]  
-                                        results.append({
-                                            "name": name,
-                                            "organism": record.annotations.get("organism", ""),
-                                            "length": len(record.seq)
-                                        })
-                            except Exception as e:
-                                results.append({"name": f"{f} (Erreur parsing: {e})"})
-            except Exception as e:
-                results.append({"name": f"Erreur lecture archive : {e}"})
-            return results
-
-        for c in my_collections_qs:
-            plasmids = []
-            if c.plasmid_archive:
-                plasmids = extract_plasmids_from_zip(c.plasmid_archive.path)
-            collections_with_plasmids.append({
-                "collection": c,
-                "plasmids": plasmids
-            })
-
-        context['my_collections'] = collections_with_plasmids
-
+        elif filter_type == 'my_collections':
+            my_collections_qs = PlasmidCollection.objects.filter(user=request.user).prefetch_related(
+                Prefetch('archive_members', queryset=members_qs, to_attr='catalog_members')
+            )
+            page = pagination.paginate(request, my_collections_qs, ordering=('-created_at', '-pk'),
+                                       param='collections_after')
+            context['collections_page'] = page
+            context['my_collections'] = [
+                {"collection": c, "plasmids": c.catalog_members}
+                for c in page
+            ]
+            if is_next_page and not page.is_first:
+                return render(request, 'gestionTemplates/partials/collection_plasmids.html', context)
 
         # -------------------------------
         # Collections des équipes (groupées par équipe)
         # -------------------------------
-        teams = request.user.equipes_membres.all()
-        team_collections_qs = Seqcollection.objects.filter(equipe__in=teams).order_by('equipe__name', '-created_at')
-
-        query_name = request.GET.get('name', '').strip()
-        if query_name:
-            team_collections_qs = team_collections_qs.filter(name__icontains=query_name)
-
-        # Fonction pour extraire plasmides depuis un ZIP
-        def extract_plasmids_from_zip(zip_path):
-            results = []
-            try:
-                with zipfile.ZipFile(zip_path, 'r') as zf:
-                    for f in zf.namelist():
-                        if f.lower().endswith(('.gb', '.gbk')):
-                            try:
-                                with zf.open(f) as gb_file:
-                                    text_stream = TextIOWrapper(gb_file, encoding='utf-8')
-                                    for record in SeqIO.parse(text_stream, "genbank"):
-                                        name = f.split('/')[-1].rsplit('.', 1)[0]  # vrai nom de fichier
-                                        results.append({
-                                            "name": name,
-                                            "organism": record.annotations.get("organism", ""),
-                                            "length": len(record.seq)
-                                        })
-                            except Exception as e:
-                                results.append({"name": f"{f} (Erreur parsing: {e})"})
-            except Exception as e:
-                results.append({"name": f"Erreur lecture archive : {e}"})
-            return results
-
-        # Grouper par équipe
-        from collections import defaultdict
-        team_groups = defaultdict(list)
-
-        for c in team_collections_qs:
-            plasmids = []
-            if c.fichier:
-                plasmids = extract_plasmids_from_zip(c.fichier.path)
-            team_groups[c.equipe].append({
-                "collection": c,
-                "plasmids": plasmids
-            })
-
-        context['team_collections_grouped'] = dict(team_groups)
+        elif filter_type == 'team_collections':
+            teams = request.user.equipes_membres.all()
+            team_collections_qs = Seqcollection.objects.filter(equipe__in=teams)
+
+            query_name = request.GET.get('name', '').strip()
+            if query_name:
+                team_collections_qs = team_collections_qs.filter(name__icontains=query_name)
+            team_collections_qs = team_collections_qs.select_related('equipe').prefetch_related(
+                Prefetch('archive_members', queryset=members_qs, to_attr='catalog_members')
+            )
+            # Tri par nom d'équipe : les collections d'une même équipe se suivent d'une page à l'autre
+            page = pagination.paginate(request, team_collections_qs,
+                                       ordering=('equipe__name', 'equipe_id', '-created_at', '-pk'),
+                                       param='teams_after')
+            context['team_collections_page'] = page
+            # En-tête d'équipe au début de chaque groupe seulement, y compris quand le
+            # groupe se poursuit depuis la page précédente (équipe lue dans le curseur)
+            previous_team = page.after[1] if page.after else None
+            context['team_collections'] = []
+            for c in page:
+                context['team_collections'].append(
+                    {"collection": c, "plasmids": c.catalog_members, "new_team": c.equipe_id != previous_team})
+                previous_team = c.equipe_id
+            if is_next_page and not page.is_first:
+                return render(request, 'gestionTemplates/partials/team_collection_plasmids.html', context)
 
     # -------------------------------
     # Cas 3 : recherche publique
     # -------------------------------
     elif privacy == "public" or (privacy == "private" and filter_type == "public"):
-        plasmides_qs = Plasmide.objects.all()
-        if query_name:
-            plasmides_qs = plasmides_qs.filter(name__icontains=query_name)
-        if query_organism:
-            plasmides_qs = plasmides_qs.filter(organism__icontains=query_organism)
-        if query_seq:
-            plasmides_qs = plasmides_qs.filter(sequence__icontains=query_seq)
-        if query_site:
-            plasmides_qs = plasmides_qs.filter(features__icontains=query_site)
-
-        public_plasmids = []
-        for p in plasmides_qs:
-            display_features = []
-            raw_features = getattr(p, 'features', None)
-            lines = []
-            if isinstance(raw_features, dict) and 'raw' in raw_features:
-                lines = str(raw_features['raw']).splitlines()
-            elif isinstance(raw_features, list):
-                for f in raw_features:
-                    if isinstance(f, dict) and 'raw' in f:
-                        lines.extend(str(f['raw']).splitlines())
-                    elif isinstance(f, str):
-                        lines.extend(f.splitlines())
-            for line in lines:
-                line = line.strip()
-                if line.startswith('/label='):
-                    display_features.append(line.replace('/label=', '').strip())
-                elif line.startswith('/allele='):
-                    display_features.append(line.replace('/allele=', '').strip())
-            p.display_features = ", ".join(display_features[:5])
-            public_plasmids.append(p)
-
-        context['public_plasmids'] = public_plasmids
+        context['public_plasmids'] = _search_public_plasmids(request, query_name, query_organism, query_seq, query_site,
+                                                             site_enzyme, site_count, no_internal_site)
+        if request.headers.get('HX-Request') and not context['public_plasmids'].is_first:
+            return render(request, 'gestionTemplates/partials/plasmid_rows.html', context)
 
     else:
         context['campaigns_with_plasmids'] = []
 
+    context['site_enzymes'] = list(sites.ENZYMES)
     return render(request, 'gestionTemplates/plasmid_search.html', context)
 
 
 def search_public_templates(request):
     query = request.GET.get('q', '')
-    templates = CampaignTemplate.objects.filter(name__icontains=query, isPublic=True)
+    templates = fulltext.ranked(CampaignTemplate.objects.filter(isPublic=True), 'template', {'name': query})
+    templates = pagination.paginate(request, templates, ordering=('name', 'pk'))
 
     if "HX-Request" in request.headers:
         return render(request, 'gestionTemplates/partials/results_list.html', {'templates': templates})
@@ -1508,35 +1365,16 @@ def publier_template(request, template_id):
 def user_view_plasmid_archive(request, campaign_id):
     campaign = get_object_or_404(Campaign, id=campaign_id)
     plasmid_name = request.GET.get('plasmid', None)
-    plasmid_maps = []  # liste des tuples (nom, linear_url, circular_url)
+    plasmid_maps = []  # liste des triplets (nom, map_cache.Maps, données de la carte)
     files_in_zip = []  # liste des fichiers dans le zip (hors .gb)
 
     if campaign.plasmid_archive:
-        zip_path = campaign.plasmid_archive.path
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # filtrer les .gb et enlever les dossiers
-                gb_files = [
-                    f for f in zip_ref.namelist()
-                    if f.lower().endswith('.gb')
-                ]
-                if plasmid_name:
-                    # Filtrer pour ne garder que le plasmide demandé
-                    gb_files = [f for f in gb_files if os.path.basename(f).replace('.gb', '') == plasmid_name]
-
-                for f in gb_files:
-                    # extraire le fichier dans un dossier temporaire
-                    temp_dir = os.path.join("temp_uploads", "gb_temp")
-                    os.makedirs(temp_dir, exist_ok=True)
-                    extracted_path = zip_ref.extract(f, path=temp_dir)
-
-                    # générer les cartes
-                    linear_url, circular_url = generate_plasmid_maps(extracted_path)
-                    # récupérer juste le nom du plasmide pour l'affichage
-                    plasmid_name = os.path.basename(f).replace('.gb', '')
-                    plasmid_maps.append((plasmid_name, linear_url, circular_url))
-
-        except zipfile.BadZipFile:
+            # cartes dessinées dans le navigateur ; clé et données de carte lues dans le
+            # catalogue (ArchiveMember), fichiers à télécharger dessinés en arrière-plan
+            plasmid_maps = map_render.archive_maps(campaign, 'plasmid_archive', ArchiveMember.SOURCE_ARCHIVE,
+                                                   plasmid_name)
+        except (zipfile.BadZipFile, OSError):
             plasmid_maps = []
 
     return render(request, 'gestionTemplates/user_view_plasmid_archive.html', {
@@ -1605,10 +1443,13 @@ def make_public(request):
                 "dossier": "public",
                 "organism": record.annotations.get("organism", ""),
                 "length": len(record.seq),
+                "topology": record.annotations.get("topology", "circular"),
                 "sequence": str(record.seq),
-                "features": {"raw": [f.qualifiers for f in record.features]}
+                "features": features.raw_features(record),
             }
         )
+        # Cartes du plasmide public dessinées en arrière-plan
+        map_render.enqueue_plasmides([plasmide])
 
         # ---- Créer une PublicationRequest ----
         PublicationRequest.objects.create(
@@ -1651,41 +1492,32 @@ def make_public_bulk(request):
 
     # --- Fonction interne pour traiter les ZIP ---
     def process_zip(zip_path, source_user):
-        created_count = 0
         try:
-            with zipfile.ZipFile(zip_path, "r") as zf:
-                for f in zf.namelist():
-                    if f.lower().endswith((".gb", ".gbk")):
-                        with zf.open(f) as gb_file:
-                            text_stream = TextIOWrapper(gb_file, encoding="utf-8")
-                            record = SeqIO.read(text_stream, "genbank")
-
-                            if Plasmide.objects.filter(name=record.name, dossier="public").exists():
-                                continue
-
-                            plasmide = Plasmide.objects.create(
-                                name=record.name,
-                                dossier="public",
-                                organism=record.annotations.get("organism", ""),
-                                length=len(record.seq),
-                                sequence=str(record.seq),
-                                features={"raw": [f.qualifiers for f in record.features]},
-                            )
-
-                            PublicationRequest.objects.create(
-                                plasmid_name=plasmide.name,
-                                requested_by=source_user,
-                                campaign=campaign,
-                                reviewed_by=request.user,
-                                status="approved",
-                                reviewed_at=timezone.now(),
-                                notified=False,
-                            )
-
-                            created_count += 1
+            # Parsing (parallèle si l'archive est grosse) puis insertion groupée
+            records, errors = ingest.parse_archive(zip_path, dossier_nom="public")
+            for record in records:
+                # Le nom public est celui du LOCUS GenBank
+                record['name'] = record.get('locus') or record['name']
+            plasmides, created = ingest.ingest_records(records)
+
+            PublicationRequest.objects.bulk_create([
+                PublicationRequest(
+                    plasmid_name=plasmide.name,
+                    requested_by=source_user,
+                    campaign=campaign,
+                    reviewed_by=request.user,
+                    status="approved",
+                    reviewed_at=timezone.now(),
+                    notified=False,
+                )
+                for plasmide in created
+            ])
+            for member, error in errors:
+                messages.error(request, f"Erreur lors de l'import de {member} : {error}")
+            return len(created)
         except Exception as e:
             messages.error(request, f"Erreur lors de l'import depuis {zip_path} : {e}")
-        return created_count
+            return 0
 
     # --- Appliquer selon la source ---
     total_created = 0
@@ -1811,48 +1643,52 @@ def ct_search(request):
 
 def ct_search(request):
     filter_type = request.GET.get('filter', 'public')  # public par défaut
+    query = request.GET.get('q', '')
 
     # Tables publiques
-    public_tables = MappingTemplate.objects.filter(is_public=True)
+    tables = MappingTemplate.objects.select_related('correspondance_table')
+    public_tables = fulltext.ranked(tables.filter(is_public=True), 'mapping', {None: query})
 
     # Mes tables
     if request.user.is_authenticated:
-        my_tables = MappingTemplate.objects.filter(user=request.user)
+        my_tables = fulltext.ranked(tables.filter(user=request.user), 'mapping', {None: query})
     else:
         my_tables = MappingTemplate.objects.none()
 
-    # Préparer le contenu de toutes les tables pour affichage
+    # Aperçu enregistré à l'upload (voir mapping_tables) : aucun fichier relu
     def get_table_data(tables):
         all_tables = []
         for table in tables:
-            try:
-                file_path = table.mapping_file.path
-                if file_path.lower().endswith('.csv'):
-                    df = pd.read_csv(file_path, sep = ';')
-                else:
-                    df = pd.read_excel(file_path)
-                table_content = df.values.tolist()   # liste de listes
-                table_columns = df.columns.tolist()  # liste de colonnes
-            except Exception:
-                table_content = []
-                table_columns = []
+            mapping = mapping_tables.preview(table)
             all_tables.append({
                 "id": table.id,
                 "name": table.name,
                 "description": table.description,
-                "columns": table_columns,
-                "content": table_content,
+                "is_public": table.is_public,
+                "columns": mapping['columns'],
+                "content": mapping['preview'],
+                "row_count": mapping['row_count'],
             })
         return all_tables
 
-    public_tables_data = get_table_data(public_tables)
-    my_tables_data = get_table_data(my_tables)
+    # Seule la liste affichée est paginée
+    if filter_type == 'mine':
+        page, partial = pagination.paginate(request, my_tables, ordering=('-created_at', '-pk')), 'my_table_cards.html'
+        public_tables, my_tables = [], page
+    else:
+        page, partial = pagination.paginate(request, public_tables, ordering=('-created_at', '-pk')), 'public_table_cards.html'
+        public_tables, my_tables = page, []
+    page.items = get_table_data(page.items)
 
-    return render(request, 'gestionTemplates/ct_search.html', {
-        'public_tables': public_tables_data,
-        'my_tables': my_tables_data,
+    context = {
+        'public_tables': public_tables,
+        'my_tables': my_tables,
         'filter_type': filter_type,
-    })
+        'query': query,
+    }
+    if request.headers.get('HX-Request') and not page.is_first:
+        return render(request, f'gestionTemplates/partials/{partial}', context)
+    return render(request, 'gestionTemplates/ct_search.html', context)
 
 
 def download_ct(request, table_id):
@@ -1901,53 +1737,57 @@ def request_table_public(request):
 
 def template_search(request):
     filter_type = request.GET.get('filter', 'public')  # public par défaut
+    query = request.GET.get('q', '')
 
     # Templates publics
-    public_templates = CampaignTemplate.objects.filter(isPublic=True)
+    public_templates = fulltext.ranked(CampaignTemplate.objects.filter(isPublic=True), 'template', {None: query})
 
     # Mes templates
     if request.user.is_authenticated:
-        my_templates = CampaignTemplate.objects.filter(user=request.user)
+        my_templates = fulltext.ranked(CampaignTemplate.objects.filter(user=request.user), 'template', {None: query})
     else:
         my_templates = CampaignTemplate.objects.none()
 
-    # Préparer le contenu des fichiers pour affichage
+    # Aperçus calculés à l'upload (voir template_previews) : aucun fichier ouvert
     def get_template_data(templates):
+        templates = list(templates)
+        previews = template_previews.previews(templates)
         all_templates = []
         for template in templates:
-            try:
-                if template.template_file:
-                    file_path = template.template_file.path
-                    if file_path.lower().endswith('.csv'):
-                        df = pd.read_csv(file_path, sep=';')
-                    else:
-                        df = pd.read_excel(file_path)
-                    content = df.values.tolist()   # liste de listes
-                    columns = df.columns.tolist()  # liste de colonnes
-                else:
-                    content, columns = [], []
-            except Exception:
-                content, columns = [], []
+            preview = previews[template.pk]
             all_templates.append({
                 "id": template.id,
                 "name": template.name,
                 "description": template.description,
                 "user": template.user,
+                "isPublic": template.isPublic,
                 "created_at": template.created_at,
                 "template_file": template.template_file,
-                "columns": columns,
-                "content": content
+                "preview": preview,
+                "columns": preview.columns if preview else [],
+                "content": preview.rows if preview else [],
+                "row_count": preview.row_count if preview else 0,
             })
         return all_templates
 
-    public_templates_data = get_template_data(public_templates)
-    my_templates_data = get_template_data(my_templates)
+    # Seule la liste affichée est paginée
+    if filter_type == 'mine':
+        page, partial = pagination.paginate(request, my_templates, ordering=('-created_at', '-pk')), 'my_template_cards.html'
+        public_templates, my_templates = [], page
+    else:
+        page, partial = pagination.paginate(request, public_templates, ordering=('-created_at', '-pk')), 'public_template_cards.html'
+        public_templates, my_templates = page, []
+    page.items = get_template_data(page.items)
 
-    return render(request, 'gestionTemplates/template_search.html', {
-        'public_templates': public_templates_data,
-        'my_templates': my_templates_data,
+    context = {
+        'public_templates': public_templates,
+        'my_templates': my_templates,
         'filter_type': filter_type,
-    })
+        'query': query,
+    }
+    if request.headers.get('HX-Request') and not page.is_first:
+        return render(request, f'gestionTemplates/partials/{partial}', context)
+    return render(request, 'gestionTemplates/template_search.html', context)
 
 def request_table_public(request):
     if request.method == "POST" and request.user.is_authenticated:
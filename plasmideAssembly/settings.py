@@ -132,3 +132,43 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'  # L'URL commencera par /media/
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') # Le dossier physique
+
+# File d'attente des traitements longs (python manage.py run_workers)
+JOB_WORKERS = 2  # Nombre de processus exécutant les jobs
+JOB_POLL_INTERVAL = 2  # Secondes entre deux consultations de la file
+JOB_STALE_AFTER = 3600  # Un job 'running' plus ancien est remis en attente au démarrage
+
+# Cache des résultats de simulation (python manage.py prune_simulation_cache)
+SIMULATION_CACHE_MAX_AGE_DAYS = 30  # Entrées non réutilisées depuis plus longtemps supprimées
+SIMULATION_CACHE_MAX_BYTES = 2 * 1024 ** 3  # Taille totale maximale des archives en cache
+
+# Archives de plasmides extraites une seule fois et partagées entre simulations
+ARCHIVE_STORE_DIR = os.path.join(MEDIA_ROOT, 'archives')
+ARCHIVE_STORE_MAX_BYTES = 5 * 1024 ** 3  # Quota disque, éviction LRU au-delà
+
+# Parsing GenBank des archives : pool de processus au-delà d'un certain nombre de fichiers
+GENBANK_PARSE_WORKERS = min(4, os.cpu_count() or 1)  # 1 pour toujours parser dans le processus courant
+GENBANK_PARALLEL_MIN_MEMBERS = 32  # En dessous, parsing séquentiel (le pool coûterait plus cher)
+
+# Pagination par curseur des listes et recherches (paramètre page_size borné)
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 200
+
+# Nombre de lignes des fichiers de correspondance et de template conservées pour l'aperçu des listes
+MAPPING_PREVIEW_ROWS = 20
+TEMPLATE_PREVIEW_ROWS = 20
+
+# Taille maximale (en bases) d'une fenêtre de séquence renvoyée par plasmid_sequence
+SEQUENCE_WINDOW_MAX = 10000
+
+# Cartes de plasmides : résolution des vignettes et des PNG écran (un SVG est aussi
+# produit pour le téléchargement), taille maximale du cache disque (éviction LRU)
+PLASMID_MAP_THUMB_DPI = 30
+PLASMID_MAP_SCREEN_DPI = 100
+PLASMID_MAP_CACHE_MAX_BYTES = 512 * 1024 ** 2
+PLASMID_MAP_EVICT_EVERY = 100  # Éviction tous les N rendus par processus (0 : prune_map_cache uniquement)
+
+# Envoi des fichiers de résultats par le serveur frontal (voir gestionTemplate/file_serving.py) :
+# None (Django), 'x-accel-redirect' (nginx, location internal sur MEDIA_ROOT) ou 'x-sendfile' (Apache)
+FILE_SERVING_OFFLOAD = None
+FILE_SERVING_ACCEL_PREFIX = '/protected-media/'
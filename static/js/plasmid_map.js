@@ -0,0 +1,276 @@
+// Cartes de plasmides dessinées dans le navigateur (SVG) à partir des données
+// renvoyées par la vue plasmid_map_data ou intégrées à la page (json_script).
+//
+// <div class="plasmid-map" data-kind="lineaire|circulaire" data-url="..."></div>
+// Sans data-url, les données sont lues dans le <script type="application/json">
+// du bloc parent [data-map-group].
+//
+// Molette : zoom autour du curseur ; glisser : déplacement ; double-clic : vue initiale.
+(function () {
+    "use strict";
+
+    const SVG_NS = "http://www.w3.org/2000/svg";
+    const requests = {};  // une seule requête par URL (cartes linéaire et circulaire d'une même page)
+
+    function svgElement(name, attrs, parent) {
+        const el = document.createElementNS(SVG_NS, name);
+        for (const key in attrs) {
+            el.setAttribute(key, attrs[key]);
+        }
+        if (parent) {
+            parent.appendChild(el);
+        }
+        return el;
+    }
+
+    function text(parent, x, y, content, attrs) {
+        const el = svgElement("text", Object.assign({x: x, y: y, "font-size": 12}, attrs || {}), parent);
+        el.textContent = content;
+        return el;
+    }
+
+    function loadData(container) {
+        const url = container.dataset.url;
+        if (url) {
+            requests[url] = requests[url] || fetch(url, {credentials: "same-origin"}).then(response => {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            });
+            return requests[url];
+        }
+        const group = container.closest("[data-map-group]");
+        const script = group && group.querySelector('script[type="application/json"]');
+        return script ? Promise.resolve(JSON.parse(script.textContent)) : Promise.reject(new Error("données absentes"));
+    }
+
+    // Niveaux d'empilement : deux features qui se chevauchent ne sont pas sur le même niveau
+    function assignLevels(features, gap) {
+        const ends = [];
+        return features
+            .slice()
+            .sort((a, b) => a.start - b.start)
+            .map(feature => {
+                let level = ends.findIndex(end => end + gap < feature.start);
+                if (level < 0) {
+                    level = ends.length;
+                }
+                ends[level] = feature.end;
+                return Object.assign({level: level}, feature);
+            });
+    }
+
+    function niceStep(span, ticks) {
+        const raw = span / ticks;
+        const power = Math.pow(10, Math.floor(Math.log10(raw)));
+        const unit = [1, 2, 5, 10].find(u => u * power >= raw);
+        return unit * power;
+    }
+
+    // --- Carte linéaire : la fenêtre affichée [from, to] (en bases) change avec le zoom ---
+    function drawLinear(container, data) {
+        const width = 1000;
+        const levelHeight = 34;
+        const features = assignLevels(data.features, data.length / 50);
+        const levels = features.reduce((max, f) => Math.max(max, f.level + 1), 1);
+        const height = 70 + levels * levelHeight;
+        const axisY = height - 40;
+        const svg = svgElement("svg", {viewBox: `0 0 ${width} ${height}`, width: "100%", role: "img"});
+        svg.style.cursor = "grab";
+        const view = {from: 0, to: Math.max(data.length, 1)};
+
+        function render() {
+            svg.replaceChildren();
+            const scale = width / (view.to - view.from);
+            const x = position => (position - view.from) * scale;
+            text(svg, width / 2, 20, `Carte linéaire du plasmide ${data.name}`, {"text-anchor": "middle", "font-size": 16});
+
+            svgElement("line", {x1: x(0), x2: x(data.length), y1: axisY, y2: axisY, stroke: "#333", "stroke-width": 2}, svg);
+            const step = niceStep(view.to - view.from, 8);
+            for (let tick = Math.ceil(view.from / step) * step; tick <= view.to; tick += step) {
+                svgElement("line", {x1: x(tick), x2: x(tick), y1: axisY, y2: axisY + 6, stroke: "#333"}, svg);
+                text(svg, x(tick), axisY + 20, tick.toLocaleString("fr-FR"), {"text-anchor": "middle", "font-size": 10});
+            }
+
+            for (const feature of features) {
+                if (feature.end < view.from || feature.start > view.to) {
+                    continue;
+                }
+                const x1 = x(feature.start);
+                const x2 = x(feature.end);
+                const y = axisY - 24 - feature.level * levelHeight;
+                const head = Math.min(10, (x2 - x1) / 2);
+                const points = feature.strand === -1
+                    ? [[x1, y + 6], [x1 + head, y], [x2, y], [x2, y + 12], [x1 + head, y + 12]]
+                    : feature.strand === 1
+                        ? [[x1, y], [x2 - head, y], [x2, y + 6], [x2 - head, y + 12], [x1, y + 12]]
+                        : [[x1, y], [x2, y], [x2, y + 12], [x1, y + 12]];
+                const shape = svgElement("polygon", {
+                    points: points.map(p => p.join(",")).join(" "),
+                    fill: feature.color, stroke: "#333", "stroke-width": 0.5,
+                }, svg);
+                svgElement("title", {}, shape).textContent =
+                    `${feature.label} (${feature.type}) ${feature.start}..${feature.end}`;
+                if (x2 - x1 > 4) {
+                    text(svg, (x1 + x2) / 2, y - 3, feature.label, {"text-anchor": "middle", "font-size": 11});
+                }
+            }
+        }
+
+        function toBases(event) {
+            const box = svg.getBoundingClientRect();
+            return view.from + (event.clientX - box.left) / box.width * (view.to - view.from);
+        }
+
+        svg.addEventListener("wheel", event => {
+            event.preventDefault();
+            const center = toBases(event);
+            const factor = event.deltaY > 0 ? 1.25 : 0.8;
+            const span = Math.min(data.length, Math.max(20, (view.to - view.from) * factor));
+            const from = Math.max(0, Math.min(data.length - span, center - (center - view.from) * span / (view.to - view.from)));
+            view.from = from;
+            view.to = from + span;
+            render();
+        }, {passive: false});
+
+        let dragStart = null;
+        svg.addEventListener("mousedown", event => {
+            dragStart = {clientX: event.clientX, from: view.from};
+            svg.style.cursor = "grabbing";
+        });
+        window.addEventListener("mousemove", event => {
+            if (!dragStart) {
+                return;
+            }
+            const span = view.to - view.from;
+            const shift = (event.clientX - dragStart.clientX) / svg.getBoundingClientRect().width * span;
+            view.from = Math.max(0, Math.min(data.length - span, dragStart.from - shift));
+            view.to = view.from + span;
+            render();
+        });
+        window.addEventListener("mouseup", () => {
+            dragStart = null;
+            svg.style.cursor = "grab";
+        });
+        svg.addEventListener("dblclick", () => {
+            view.from = 0;
+            view.to = Math.max(data.length, 1);
+            render();
+        });
+
+        render();
+        return svg;
+    }
+
+    // --- Carte circulaire : le zoom agit sur la viewBox ---
+    function drawCircular(container, data) {
+        const size = 600;
+        const radius = 170;
+        const ringWidth = 14;
+        const features = assignLevels(data.features, 0);
+        const svg = svgElement("svg", {width: "100%", role: "img"});
+        svg.style.maxWidth = "600px";
+        svg.style.cursor = "grab";
+        const angle = position => 2 * Math.PI * position / Math.max(data.length, 1) - Math.PI / 2;
+        const point = (r, a) => [r * Math.cos(a), r * Math.sin(a)];
+
+        svgElement("circle", {cx: 0, cy: 0, r: radius, fill: "none", stroke: "#333", "stroke-width": 2}, svg);
+        text(svg, 0, -6, data.name, {"text-anchor": "middle", "font-size": 16});
+        text(svg, 0, 14, `${data.length.toLocaleString("fr-FR")} pb (${data.topology === "linear" ? "linéaire" : "circulaire"})`,
+            {"text-anchor": "middle", "font-size": 12});
+
+        for (const feature of features) {
+            const inner = radius + 4 + feature.level * (ringWidth + 4);
+            const outer = inner + ringWidth;
+            const a1 = angle(feature.start);
+            const a2 = angle(Math.max(feature.end, feature.start + 1));
+            const large = a2 - a1 > Math.PI ? 1 : 0;
+            const [ox1, oy1] = point(outer, a1);
+            const [ox2, oy2] = point(outer, a2);
+            const [ix2, iy2] = point(inner, a2);
+            const [ix1, iy1] = point(inner, a1);
+            const shape = svgElement("path", {
+                d: `M ${ox1} ${oy1} A ${outer} ${outer} 0 ${large} 1 ${ox2} ${oy2} `
+                    + `L ${ix2} ${iy2} A ${inner} ${inner} 0 ${large} 0 ${ix1} ${iy1} Z`,
+                fill: feature.color, stroke: "#333", "stroke-width": 0.5,
+            }, svg);
+            svgElement("title", {}, shape).textContent =
+                `${feature.label} (${feature.type}) ${feature.start}..${feature.end}`;
+
+            // Libellé à l'extérieur, relié au milieu de la feature
+            const middle = (a1 + a2) / 2;
+            const [lx1, ly1] = point(outer, middle);
+            const [lx2, ly2] = point(radius * 1.35 + feature.level * 18, middle);
+            svgElement("line", {x1: lx1, y1: ly1, x2: lx2, y2: ly2, stroke: "#999", "stroke-width": 0.5}, svg);
+            text(svg, lx2, ly2, feature.label, {
+                "text-anchor": Math.cos(middle) >= 0 ? "start" : "end", "dominant-baseline": "middle", "font-size": 11,
+            });
+        }
+
+        const initial = {x: -size / 2, y: -size / 2, size: size};
+        const view = Object.assign({}, initial);
+        const apply = () => svg.setAttribute("viewBox", `${view.x} ${view.y} ${view.size} ${view.size}`);
+
+        function toUser(event) {
+            const box = svg.getBoundingClientRect();
+            return [view.x + (event.clientX - box.left) / box.width * view.size,
+                    view.y + (event.clientY - box.top) / box.height * view.size];
+        }
+
+        svg.addEventListener("wheel", event => {
+            event.preventDefault();
+            const [cx, cy] = toUser(event);
+            const factor = event.deltaY > 0 ? 1.25 : 0.8;
+            const newSize = Math.min(initial.size, Math.max(initial.size / 40, view.size * factor));
+            view.x = cx - (cx - view.x) * newSize / view.size;
+            view.y = cy - (cy - view.y) * newSize / view.size;
+            view.size = newSize;
+            apply();
+        }, {passive: false});
+
+        let dragStart = null;
+        svg.addEventListener("mousedown", event => {
+            dragStart = {clientX: event.clientX, clientY: event.clientY, x: view.x, y: view.y};
+            svg.style.cursor = "grabbing";
+        });
+        window.addEventListener("mousemove", event => {
+            if (!dragStart) {
+                return;
+            }
+            const ratio = view.size / svg.getBoundingClientRect().width;
+            view.x = dragStart.x - (event.clientX - dragStart.clientX) * ratio;
+            view.y = dragStart.y - (event.clientY - dragStart.clientY) * ratio;
+            apply();
+        });
+        window.addEventListener("mouseup", () => {
+            dragStart = null;
+            svg.style.cursor = "grab";
+        });
+        svg.addEventListener("dblclick", () => {
+            Object.assign(view, initial);
+            apply();
+        });
+
+        apply();
+        return svg;
+    }
+
+    function init(root) {
+        root.querySelectorAll(".plasmid-map:not([data-drawn])").forEach(container => {
+            container.dataset.drawn = "1";
+            loadData(container)
+                .then(data => {
+                    const draw = container.dataset.kind === "circulaire" ? drawCircular : drawLinear;
+                    container.replaceChildren(draw(container, data));
+                })
+                .catch(() => {
+                    container.textContent = "Carte indisponible.";
+                });
+        });
+    }
+
+    document.addEventListener("DOMContentLoaded", () => init(document));
+    // Contenu remplacé par htmx
+    document.addEventListener("htmx:load", event => init(event.target));
+})();
@@ -6,6 +6,8 @@ from django.views.decorators.http import require_POST
 from django.contrib import messages
 from .models import Equipe, UserModel, MembreEquipe, Tablecor, Seqcollection
 from django.http import FileResponse, Http404
+from gestionTemplate import catalog
+from gestionTemplate.models import ArchiveMember
 
 
 def register_view(request):
@@ -220,13 +222,15 @@ def add_seqcol(request, team_id):
         uploaded_seqcol = request.FILES.get('uploaded_seqcol')
         if uploaded_seqcol:
             is_leader = (request.user == team.leader)
-            Seqcollection.objects.create(
+            seqcol = Seqcollection.objects.create(
                 name = uploaded_seqcol.name,
                 equipe = team,
                 fichier = uploaded_seqcol,
                 uploaded_by=request.user,
                 is_validated=is_leader
             )
+            # Catalogue des plasmides de l'archive pour la recherche privée
+            catalog.index_archive(seqcol.fichier.path, ArchiveMember.SOURCE_TEAM, team_collection=seqcol)
             if (is_leader) :
                 messages.success(request, "Collection de plasmides ajoutée pour l'équipe.")
             else :